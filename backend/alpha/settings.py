@@ -211,6 +211,12 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 打字练习静态章节包（build_chapter_packs 生成，由nginx直接提供）
+TYPING_CHAPTER_PACK_ROOT = os.path.join(MEDIA_ROOT, 'typing_packs')
+TYPING_CHAPTER_PACK_URL = f'{MEDIA_URL}typing_packs/'
+# 不再被清单引用的旧章节包保留的秒数（拿着旧清单的客户端在此期间仍能下载）
+TYPING_CHAPTER_PACK_RETENTION = 24 * 3600
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -445,6 +451,50 @@ XFYUN_API_KEY = os.environ.get('XFYUN_API_KEY', '')
 XFYUN_API_SECRET = os.environ.get('XFYUN_API_SECRET', '')
 CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'english-close-idle-typing-sessions': {
+        'task': 'apps.english.tasks.close_idle_typing_sessions',
+        'schedule': 300.0,
+    },
+    'english-build-daily-learning-batches': {
+        'task': 'apps.english.tasks.build_daily_learning_batches',
+        'schedule': 3600.0,
+    },
+    'english-refresh-word-sample-pools': {
+        'task': 'apps.english.tasks.refresh_word_sample_pools',
+        'schedule': 3600.0,
+    },
+}
+
+# 进行中的打字练习会话空闲超过该分钟数后由定时任务自动结算关闭
+TYPING_SESSION_IDLE_MINUTES = int(os.environ.get('TYPING_SESSION_IDLE_MINUTES', '30'))
+# 数据分析中的练习次数：同一用户相邻两条练习记录间隔不小于该分钟数时算作新的一轮练习
+TYPING_EXERCISE_GAP_MINUTES = int(os.environ.get('TYPING_EXERCISE_GAP_MINUTES', '30'))
+# 打字练习数据列式导出（export_practice_parquet）的默认输出目录，不放在MEDIA下以免被公开访问
+TYPING_EXPORT_ROOT = os.environ.get('TYPING_EXPORT_ROOT', os.path.join(BASE_DIR, 'exports'))
+# 单词检索后端：mysql（释义FULLTEXT ngram索引）、memory（进程内倒排索引+BM25）、auto（按数据库类型选择）
+WORD_SEARCH_BACKEND = os.environ.get('WORD_SEARCH_BACKEND', 'auto')
+# MySQL不支持带条件的唯一约束，"每用户一个进行中会话"由迁移中的生成列+唯一索引保证
+SILENCED_SYSTEM_CHECKS = ['models.W036']
+
+# 打字练习写后缓冲（write-behind）配置
+# 开启后 submit 只校验并写入持久队列，返回202，由Celery任务批量落库
+TYPING_WRITE_BEHIND_ENABLED = os.environ.get('TYPING_WRITE_BEHIND_ENABLED', 'False').lower() == 'true'
+# 队列后端：redis（生产）或 sqlite（本地文件队列，单机/开发替代）
+TYPING_WRITE_BEHIND_BACKEND = os.environ.get('TYPING_WRITE_BEHIND_BACKEND', 'redis')
+TYPING_WRITE_BEHIND_REDIS_URL = os.environ.get('TYPING_WRITE_BEHIND_REDIS_URL', CELERY_BROKER_URL)
+TYPING_WRITE_BEHIND_SPOOL_PATH = os.environ.get(
+    'TYPING_WRITE_BEHIND_SPOOL_PATH', os.path.join(BASE_DIR, 'spool', 'typing_write_behind.sqlite3')
+)
+TYPING_WRITE_BEHIND_DRAIN_SIZE = int(os.environ.get('TYPING_WRITE_BEHIND_DRAIN_SIZE', '500'))
+# 信封落库失败达到该次数后移入死信队列，不再重试
+TYPING_WRITE_BEHIND_MAX_ATTEMPTS = int(os.environ.get('TYPING_WRITE_BEHIND_MAX_ATTEMPTS', '5'))
+# 只有开启写后缓冲时才定时落库，未开启时不轮询队列
+if TYPING_WRITE_BEHIND_ENABLED:
+    CELERY_BEAT_SCHEDULE['english-drain-typing-buffer'] = {
+        'task': 'apps.english.tasks.drain_typing_buffer',
+        'schedule': 5.0,
+    }
 
 # Fallback update when direct import above not applicable
 try:
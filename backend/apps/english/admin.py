@@ -5,6 +5,7 @@ from .models import (
     WordCategory, WordCategoryLink, WordTag, WordTagLink,
     WordExample, WordRelation, EntityVersion, TypingSession, UserTypingStats, TypingWord, Dictionary
 )
+from .word_packs import bump_word_pack_version
 
 
 @admin.register(Word)
@@ -182,6 +183,11 @@ class DictionaryAdmin(admin.ModelAdmin):
     ordering = ['category', 'name']
     list_per_page = 50
 
+    # 词包中包含词库名称，修改词库后同样需要使词包失效
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_word_pack_version(obj.pk)
+
 
 @admin.register(TypingWord)
 class TypingWordAdmin(admin.ModelAdmin):
@@ -191,6 +197,23 @@ class TypingWordAdmin(admin.ModelAdmin):
     ordering = ['word']
     list_per_page = 50
 
+    # 编辑单词后递增所属词库的词包版本号，使缓存的词包失效
+    def save_model(self, request, obj, form, change):
+        old_dictionary_id = None
+        if change:
+            old_dictionary_id = TypingWord.objects.filter(pk=obj.pk).values_list('dictionary_id', flat=True).first()
+        super().save_model(request, obj, form, change)
+        bump_word_pack_version(obj.dictionary_id, old_dictionary_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_word_pack_version(obj.dictionary_id)
+
+    def delete_queryset(self, request, queryset):
+        dictionary_ids = set(queryset.values_list('dictionary_id', flat=True))
+        super().delete_queryset(request, queryset)
+        bump_word_pack_version(*dictionary_ids)
+
 
 @admin.register(TypingSession)
 class TypingSessionAdmin(admin.ModelAdmin):
@@ -0,0 +1,404 @@
+"""
+打字练习写后缓冲（write-behind）
+提交接口只把校验后的练习结果写入持久队列，由Celery任务批量落库
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .response_cache import bump_user_data_version
+
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled() -> bool:
+    """是否开启写后缓冲模式"""
+    return bool(getattr(settings, 'TYPING_WRITE_BEHIND_ENABLED', False))
+
+
+class WriteBehindBuffer(ABC):
+    """写后缓冲队列接口
+
+    队列中的每个元素是一个信封：
+    {'receipt': 回执ID, 'user_id': 用户ID, 'chapter': 章节, 'items': [已校验的练习结果], 'queued_at': 入队时间,
+     'attempts': 已失败的落库次数（首次失败后才有）}
+    """
+
+    def push(self, user_id: int, items: List[Dict[str, Any]], chapter: int = 1) -> str:
+        """写入一批练习结果，返回回执ID"""
+        envelope = {
+            'receipt': uuid.uuid4().hex,
+            'user_id': user_id,
+            'chapter': chapter,
+            'items': items,
+            'queued_at': timezone.now().isoformat(),
+        }
+        self._push(envelope)
+        # 读己之写：统计接口会合并缓冲中的结果，入队后使该用户的缓存响应失效
+        bump_user_data_version(user_id)
+        return envelope['receipt']
+
+    @abstractmethod
+    def claim(self, max_envelopes: int) -> List[Dict[str, Any]]:
+        """取出一批待落库的信封（落库成功后需调用 ack）"""
+
+    @abstractmethod
+    def ack(self, envelopes: List[Dict[str, Any]]) -> None:
+        """确认信封已落库，从队列中删除"""
+
+    @abstractmethod
+    def release(self, envelopes: List[Dict[str, Any]]) -> None:
+        """落库失败时把信封放回队列，失败次数加一"""
+
+    @abstractmethod
+    def park(self, envelopes: List[Dict[str, Any]], error: str) -> None:
+        """失败次数达到上限的信封移入死信队列，不再重试，也不再合并进统计"""
+
+    @abstractmethod
+    def pending_for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        """返回该用户尚未落库的练习结果（用于读己之写）"""
+
+    @abstractmethod
+    def _push(self, envelope: Dict[str, Any]) -> None:
+        """把信封写入队列"""
+
+
+class RedisWriteBehindBuffer(WriteBehindBuffer):
+    """基于Redis列表的队列
+
+    - queue：待处理信封（LPUSH 入队，LMOVE 到 processing 列表出队）
+    - processing：处理中的信封，ack 后删除
+    - claimed：信封回执 -> 取出时间；每次 claim 前把超过 visibility_timeout 秒仍未确认的信封移回 queue，
+      保证 worker 异常退出时数据不丢失（与SQLite队列一致）
+    - pending:{user_id}：按用户索引的未落库信封，供读接口合并
+    - dead：多次落库失败的信封（死信），需人工排查
+    """
+
+    QUEUE_KEY = 'english:typing_wb:queue'
+    PROCESSING_KEY = 'english:typing_wb:processing'
+    CLAIMED_KEY = 'english:typing_wb:claimed'
+    DEAD_KEY = 'english:typing_wb:dead'
+    PENDING_KEY = 'english:typing_wb:pending:{user_id}'
+
+    # 原子地扫描 processing 列表：没有取出时间的（取出后、记录时间前worker退出）补记当前时间，超时的移回 queue
+    REQUEUE_EXPIRED_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local cutoff = now - tonumber(ARGV[2])
+    local requeued = 0
+    for _, payload in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+        local receipt = cjson.decode(payload)['receipt']
+        local claimed_at = redis.call('HGET', KEYS[3], receipt)
+        if not claimed_at then
+            redis.call('HSET', KEYS[3], receipt, now)
+        elseif tonumber(claimed_at) < cutoff then
+            redis.call('LREM', KEYS[1], 1, payload)
+            redis.call('RPUSH', KEYS[2], payload)
+            redis.call('HDEL', KEYS[3], receipt)
+            requeued = requeued + 1
+        end
+    end
+    return requeued
+    """
+
+    def __init__(self, url: Optional[str] = None, visibility_timeout: int = 300):
+        import redis
+        self.client = redis.Redis.from_url(url or settings.TYPING_WRITE_BEHIND_REDIS_URL)
+        self.visibility_timeout = visibility_timeout
+        self._requeue_expired = self.client.register_script(self.REQUEUE_EXPIRED_SCRIPT)
+
+    def _push(self, envelope):
+        payload = json.dumps(envelope)
+        pipe = self.client.pipeline()
+        pipe.hset(self.PENDING_KEY.format(user_id=envelope['user_id']), envelope['receipt'], payload)
+        pipe.lpush(self.QUEUE_KEY, payload)
+        pipe.execute()
+
+    def requeue_expired(self) -> int:
+        """把超时未确认的信封移回队列，返回移回的个数"""
+        return self._requeue_expired(
+            keys=[self.PROCESSING_KEY, self.QUEUE_KEY, self.CLAIMED_KEY],
+            args=[time.time(), self.visibility_timeout]
+        )
+
+    def claim(self, max_envelopes):
+        requeued = self.requeue_expired()
+        if requeued:
+            logger.warning(f"写后缓冲：{requeued} 个信封超时未确认，已移回队列")
+
+        pipe = self.client.pipeline()
+        for _ in range(max_envelopes):
+            pipe.lmove(self.QUEUE_KEY, self.PROCESSING_KEY, 'RIGHT', 'LEFT')
+        envelopes = []
+        for payload in pipe.execute():
+            if payload is None:
+                break
+            envelope = json.loads(payload)
+            envelope['_raw'] = payload
+            envelopes.append(envelope)
+        if envelopes:
+            now = time.time()
+            self.client.hset(self.CLAIMED_KEY, mapping={envelope['receipt']: now for envelope in envelopes})
+        return envelopes
+
+    def ack(self, envelopes):
+        pipe = self.client.pipeline()
+        for envelope in envelopes:
+            pipe.lrem(self.PROCESSING_KEY, 1, envelope['_raw'])
+            pipe.hdel(self.CLAIMED_KEY, envelope['receipt'])
+            pipe.hdel(self.PENDING_KEY.format(user_id=envelope['user_id']), envelope['receipt'])
+        pipe.execute()
+
+    def release(self, envelopes):
+        pipe = self.client.pipeline()
+        for envelope in envelopes:
+            raw = envelope.pop('_raw')
+            envelope['attempts'] = envelope.get('attempts', 0) + 1
+            pipe.lrem(self.PROCESSING_KEY, 1, raw)
+            pipe.hdel(self.CLAIMED_KEY, envelope['receipt'])
+            pipe.rpush(self.QUEUE_KEY, json.dumps(envelope))
+        pipe.execute()
+
+    def park(self, envelopes, error):
+        pipe = self.client.pipeline()
+        for envelope in envelopes:
+            raw = envelope.pop('_raw')
+            pipe.lrem(self.PROCESSING_KEY, 1, raw)
+            pipe.hdel(self.CLAIMED_KEY, envelope['receipt'])
+            pipe.hdel(self.PENDING_KEY.format(user_id=envelope['user_id']), envelope['receipt'])
+            pipe.lpush(self.DEAD_KEY, json.dumps({**envelope, 'error': error, 'failed_at': time.time()}))
+        pipe.execute()
+
+    def pending_for_user(self, user_id):
+        payloads = self.client.hvals(self.PENDING_KEY.format(user_id=user_id))
+        items = []
+        for payload in payloads:
+            items.extend(json.loads(payload)['items'])
+        return items
+
+
+class SQLiteWriteBehindBuffer(WriteBehindBuffer):
+    """基于本地SQLite文件的队列（单机部署或开发环境替代Redis）
+
+    已取出但超过 visibility_timeout 秒仍未确认的信封会被重新取出，
+    保证 worker 异常退出时数据不丢失；多次落库失败的信封移入 dead_letter 表。
+    """
+
+    def __init__(self, path: Optional[str] = None, visibility_timeout: int = 300):
+        self.path = path or settings.TYPING_WRITE_BEHIND_SPOOL_PATH
+        self.visibility_timeout = visibility_timeout
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS spool ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' receipt TEXT NOT NULL,'
+                ' user_id INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' claimed_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS spool_user ON spool (user_id)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS dead_letter ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' receipt TEXT NOT NULL,'
+                ' user_id INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' error TEXT NOT NULL,'
+                ' failed_at REAL NOT NULL)'
+            )
+
+    @contextmanager
+    def _connect(self):
+        # isolation_level=None 为自动提交模式，需要事务时显式 BEGIN
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            yield conn
+        finally:
+            conn.close()
+
+    def _push(self, envelope):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO spool (receipt, user_id, payload) VALUES (?, ?, ?)',
+                (envelope['receipt'], envelope['user_id'], json.dumps(envelope))
+            )
+
+    def claim(self, max_envelopes):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT id, payload FROM spool WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY id LIMIT ?',
+                (now - self.visibility_timeout, max_envelopes)
+            ).fetchall()
+            if rows:
+                conn.executemany('UPDATE spool SET claimed_at = ? WHERE id = ?', [(now, row[0]) for row in rows])
+            conn.execute('COMMIT')
+
+        envelopes = []
+        for row_id, payload in rows:
+            envelope = json.loads(payload)
+            envelope['_id'] = row_id
+            envelopes.append(envelope)
+        return envelopes
+
+    def ack(self, envelopes):
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM spool WHERE id = ?', [(e['_id'],) for e in envelopes])
+
+    def release(self, envelopes):
+        rows = []
+        for envelope in envelopes:
+            row_id = envelope.pop('_id')
+            envelope['attempts'] = envelope.get('attempts', 0) + 1
+            rows.append((json.dumps(envelope), row_id))
+        with self._connect() as conn:
+            conn.executemany('UPDATE spool SET claimed_at = NULL, payload = ? WHERE id = ?', rows)
+
+    def park(self, envelopes, error):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for envelope in envelopes:
+                row_id = envelope.pop('_id')
+                conn.execute(
+                    'INSERT INTO dead_letter (receipt, user_id, payload, error, failed_at) VALUES (?, ?, ?, ?, ?)',
+                    (envelope['receipt'], envelope['user_id'], json.dumps(envelope), error, now)
+                )
+                conn.execute('DELETE FROM spool WHERE id = ?', (row_id,))
+            conn.execute('COMMIT')
+
+    def pending_for_user(self, user_id):
+        with self._connect() as conn:
+            rows = conn.execute('SELECT payload FROM spool WHERE user_id = ? ORDER BY id', (user_id,)).fetchall()
+        items = []
+        for (payload,) in rows:
+            items.extend(json.loads(payload)['items'])
+        return items
+
+
+def get_write_behind_buffer() -> WriteBehindBuffer:
+    """按配置返回写后缓冲队列"""
+    backend = getattr(settings, 'TYPING_WRITE_BEHIND_BACKEND', 'redis')
+    if backend == 'sqlite':
+        return SQLiteWriteBehindBuffer()
+    return RedisWriteBehindBuffer()
+
+
+def drain_write_behind_buffer(max_envelopes: Optional[int] = None) -> Dict[str, int]:
+    """
+    把队列中的练习结果批量落库，按用户分组，每个用户一个事务
+
+    记录时间取信封的入队时间，零点前提交、零点后落库的结果仍计入提交当天。
+    某个用户的一组信封落库失败时逐个信封重试，只有失败的信封放回队列；
+    失败次数达到 TYPING_WRITE_BEHIND_MAX_ATTEMPTS 的信封移入死信队列。
+    """
+    buffer = get_write_behind_buffer()
+    envelopes = buffer.claim(max_envelopes or settings.TYPING_WRITE_BEHIND_DRAIN_SIZE)
+    if not envelopes:
+        return {'envelopes': 0, 'records': 0, 'failed': 0, 'parked': 0}
+
+    by_user: Dict[int, List[Dict[str, Any]]] = {}
+    for envelope in envelopes:
+        by_user.setdefault(envelope['user_id'], []).append(envelope)
+
+    users = get_user_model().objects.in_bulk(list(by_user.keys()))
+    summary = {'envelopes': len(envelopes), 'records': 0, 'failed': 0, 'parked': 0}
+    for user_id, user_envelopes in by_user.items():
+        user = users.get(user_id)
+        if user is None:
+            # 用户已删除，丢弃其缓冲数据
+            buffer.ack(user_envelopes)
+            continue
+
+        try:
+            summary['records'] += _record_envelopes(user, user_envelopes)
+        except Exception:
+            logger.exception(f"写后缓冲落库失败 user={user_id}，逐个信封重试")
+        else:
+            _ack_recorded(buffer, user_envelopes)
+            continue
+
+        for envelope in user_envelopes:
+            try:
+                summary['records'] += _record_envelopes(user, [envelope])
+            except Exception as e:
+                logger.exception(f"写后缓冲信封落库失败 receipt={envelope['receipt']}")
+                summary['failed'] += 1
+                if envelope.get('attempts', 0) + 1 >= settings.TYPING_WRITE_BEHIND_MAX_ATTEMPTS:
+                    buffer.park([envelope], str(e))
+                    # 移入死信队列后不再计入待落库结果，缓存的统计同样需要重新计算
+                    bump_user_data_version(user_id)
+                    summary['parked'] += 1
+                else:
+                    buffer.release([envelope])
+            else:
+                _ack_recorded(buffer, [envelope])
+
+    return summary
+
+
+def _ack_recorded(buffer: WriteBehindBuffer, envelopes: List[Dict[str, Any]]) -> None:
+    """
+    确认已落库的信封，并使这些用户的缓存响应失效
+
+    record_results 提交时已递增版本号，但 ack 之前信封仍在待落库索引中：这期间的统计请求
+    会把已落库的记录再合并一次并按新版本缓存。ack 后再递增一次，之后的第一次读取重新计算。
+    """
+    buffer.ack(envelopes)
+    bump_user_data_version(*{envelope['user_id'] for envelope in envelopes})
+
+
+def _record_envelopes(user, envelopes: List[Dict[str, Any]]) -> int:
+    """在一个事务内写入一组信封的练习结果，返回成功写入的条数"""
+    from .services import TypingPracticeService
+
+    items = []
+    for envelope in envelopes:
+        recorded_at = parse_datetime(envelope['queued_at'])
+        items.extend({**item, 'recorded_at': recorded_at} for item in envelope['items'])
+    outcome = TypingPracticeService().record_results(user, items, chapter=envelopes[0].get('chapter', 1))
+    return sum(1 for r in outcome['results'] if r['status'] == 'success')
+
+
+def merge_pending_typing_stats(stats: Dict[str, Any], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把尚未落库的练习结果合并进用户打字统计，保证提交后立即可见"""
+    if not items:
+        return stats
+
+    merged = dict(stats)
+    count = len(items)
+    correct = sum(1 for item in items if item['is_correct'])
+    speed_sum = sum(item['typing_speed'] for item in items)
+    time_sum = sum(item['response_time'] for item in items)
+
+    # average_wpm 等于 WPM累计值/练习单词数，可由已有平均值还原累计值
+    total_words = merged['total_words_practiced'] + count
+    total_speed = merged['average_wpm'] * merged['total_words_practiced'] + speed_sum
+    total_correct = merged['total_correct_words'] + correct
+
+    merged['total_practices'] = total_words
+    merged['total_words_practiced'] = total_words
+    merged['total_correct_words'] = total_correct
+    merged['average_accuracy'] = round(total_correct / total_words * 100, 2)
+    merged['average_wpm'] = round(total_speed / total_words, 2)
+    merged['average_speed'] = merged['average_wpm']
+    merged['total_practice_time'] = merged['total_practice_time'] + time_sum
+    merged['last_practice_date'] = timezone.now().date().isoformat()
+    merged['pending_count'] = count
+    return merged
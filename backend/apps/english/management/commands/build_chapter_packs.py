@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.english.word_packs import build_chapter_packs, chapter_pack_root
+
+
+class Command(BaseCommand):
+    help = '把词库章节预编译为静态JSON章节包（含.gz/.br预压缩和清单），供nginx直接提供'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dictionary',
+            type=int,
+            nargs='+',
+            dest='dictionary_ids',
+            help='只构建指定词库ID的章节包，默认重建全部词库'
+        )
+
+    def handle(self, *args, **options):
+        dictionary_ids = options.get('dictionary_ids')
+
+        if dictionary_ids:
+            self.stdout.write(f'开始构建词库 {dictionary_ids} 的章节包...')
+        else:
+            self.stdout.write('开始构建全部词库的章节包...')
+
+        summary = build_chapter_packs(dictionary_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'构建完成！共 {summary["dictionaries"]} 个词库、{summary["chapters"]} 个章节包，'
+            f'输出目录: {chapter_pack_root()}'
+        ))
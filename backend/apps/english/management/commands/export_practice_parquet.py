@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.english import practice_export
+
+
+class Command(BaseCommand):
+    help = '把打字练习记录、打字会话记录和练习会话导出为按月分区的Parquet文件（供离线分析）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=getattr(settings, 'TYPING_EXPORT_ROOT', 'exports'),
+            help='输出目录（默认 TYPING_EXPORT_ROOT）'
+        )
+        parser.add_argument(
+            '--table',
+            nargs='+',
+            dest='tables',
+            choices=list(practice_export.EXPORT_TABLES),
+            help='只导出指定的表，默认导出全部'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='只导出主键大于上次水位的行；不加时全量导出并覆盖该表已有的分区'
+        )
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=practice_export.FILE_FORMATS,
+            default=practice_export.default_file_format(),
+            help='文件格式（默认parquet，未安装pyarrow时为gzip压缩的csv）'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=practice_export.DEFAULT_CHUNK_SIZE,
+            help=f'每次从数据库读取的行数（默认{practice_export.DEFAULT_CHUNK_SIZE}）'
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output']
+        tables = options.get('tables') or list(practice_export.EXPORT_TABLES)
+        mode = '增量' if options['incremental'] else '全量'
+        self.stdout.write(f'开始{mode}导出 {", ".join(tables)} 到 {output_dir}（{options["file_format"]}）...')
+
+        for table in tables:
+            started = time.monotonic()
+            try:
+                result = practice_export.export_table(
+                    output_dir, table,
+                    file_format=options['file_format'],
+                    incremental=options['incremental'],
+                    chunk_size=options['chunk_size'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f'{table}: 导出 {result["rows"]} 行，写入 {len(result["files"])} 个分区文件，'
+                f'水位 id={result["last_id"]}，用时 {time.monotonic() - started:.1f} 秒'
+            )
+
+        self.stdout.write(self.style.SUCCESS('导出完成！'))
@@ -3,6 +3,7 @@ from django.db import transaction
 import json
 import os
 from apps.english.models import TypingWord
+from apps.english.word_packs import bump_word_pack_version
 
 
 class Command(BaseCommand):
@@ -57,6 +58,8 @@ class Command(BaseCommand):
                 )
         
         if not dry_run:
+            # 按单词导入可能涉及任意词库，递增全局版本号使所有词包失效
+            bump_word_pack_version()
             self.stdout.write(
                 self.style.SUCCESS(
                     f'导入完成！总计导入: {total_imported} 个单词，跳过: {total_skipped} 个'
@@ -1,8 +1,10 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import transaction
 import json
 import os
 from apps.english.models import Dictionary, TypingWord
+from apps.english.word_packs import bump_word_pack_version
 
 
 class Command(BaseCommand):
@@ -55,8 +57,10 @@ class Command(BaseCommand):
         # 清除现有数据
         if clear_existing and not dry_run:
             self.stdout.write('清除现有词库数据...')
+            dictionary_ids = list(Dictionary.objects.values_list('id', flat=True))
             TypingWord.objects.all().delete()
             Dictionary.objects.all().delete()
+            bump_word_pack_version(*dictionary_ids)
             self.stdout.write(self.style.SUCCESS('现有数据已清除'))
         
         # 定义词库配置
@@ -202,6 +206,8 @@ class Command(BaseCommand):
                     f'导入完成！总计导入: {total_imported} 个单词，跳过: {total_skipped} 个'
                 )
             )
+            # 重新生成静态章节包（内容未变的章节文件名不变，不会重复写入）
+            call_command('build_chapter_packs', stdout=self.stdout)
         else:
             self.stdout.write(
                 self.style.SUCCESS(
@@ -326,6 +332,10 @@ class Command(BaseCommand):
                 )
                 skipped_count += 1
         
+        if not dry_run:
+            # 词库内容已变化，使该词库缓存的词包失效
+            bump_word_pack_version(dictionary.id)
+        
         self.stdout.write(
             self.style.SUCCESS(
                 f'成功导入 {config["name"]} 词库: {imported_count} 个新单词，跳过: {skipped_count} 个，章节数: {chapter_count}'
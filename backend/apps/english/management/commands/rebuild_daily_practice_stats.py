@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.english.services import DataAnalysisService
+
+
+class Command(BaseCommand):
+    help = '从打字练习原始记录分块重建每日练习统计（用于数据修复，上线回填已在迁移中完成）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='user_ids',
+            help='只重建指定用户ID的统计，默认重建全部用户'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='每次聚合查询处理的用户数（默认200）'
+        )
+        parser.add_argument(
+            '--gap-minutes',
+            type=int,
+            dest='gap_minutes',
+            help='切分练习轮次的间隔分钟数，默认使用 TYPING_EXERCISE_GAP_MINUTES'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get('user_ids')
+
+        if user_ids:
+            self.stdout.write(f'开始重建用户 {user_ids} 的每日练习统计...')
+        else:
+            self.stdout.write('开始重建全部用户的每日练习统计...')
+
+        rebuilt = DataAnalysisService().rebuild_daily_stats(
+            user_ids, chunk_size=options['chunk_size'], gap_minutes=options.get('gap_minutes')
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'重建完成！共写入 {rebuilt} 天的统计'))
@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.english.models import KeyErrorStats, TypingPracticeRecord
+from apps.english.services import DataAnalysisService
+
+
+def _init_worker():
+    """工作进程初始化：spawn 出的进程需要先初始化Django，fork 出的进程不能复用父进程的数据库连接"""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _rebuild_batch(user_ids, chunk_size):
+    """在工作进程中重建一批用户的按键错误统计"""
+    return DataAnalysisService().rebuild_key_error_stats(user_ids, chunk_size=chunk_size)
+
+
+class Command(BaseCommand):
+    help = '从打字练习原始记录流式重建按键错误统计，可多进程并行（用于结构变更后的数据修复）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='user_ids',
+            help='只重建指定用户ID的统计，默认重建全部用户'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='并行的工作进程数（默认1，在当前进程内执行）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='每个任务处理的用户数，也是进度汇报的粒度（默认100）'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='流式读取练习记录时每批的行数（默认2000）'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get('user_ids')
+
+        if user_ids:
+            self.stdout.write(f'开始重建用户 {user_ids} 的按键错误统计...')
+        else:
+            self.stdout.write('开始重建全部用户的按键错误统计...')
+            # 只有统计没有记录的用户也要处理，清除残留的按键
+            user_ids = sorted(
+                set(TypingPracticeRecord.objects.values_list('user_id', flat=True).distinct())
+                | set(KeyErrorStats.objects.values_list('user_id', flat=True).distinct())
+            )
+
+        batch_size = options['batch_size']
+        chunk_size = options['chunk_size']
+        batches = [user_ids[i:i + batch_size] for i in range(0, len(user_ids), batch_size)]
+        started = time.monotonic()
+        done = 0
+
+        if options['workers'] <= 1:
+            for batch in batches:
+                done += _rebuild_batch(batch, chunk_size)
+                self._report_progress(done, len(user_ids), started)
+        else:
+            # 子进程不能继承打开的数据库连接
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+                futures = [executor.submit(_rebuild_batch, batch, chunk_size) for batch in batches]
+                for future in as_completed(futures):
+                    done += future.result()
+                    self._report_progress(done, len(user_ids), started)
+
+        self.stdout.write(self.style.SUCCESS(f'重建完成！共处理 {done} 个用户的按键错误统计'))
+
+    def _report_progress(self, done, total, started):
+        self.stdout.write(f'已处理 {done}/{total} 个用户，用时 {time.monotonic() - started:.1f} 秒')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.english.services import TypingPracticeService
+
+
+class Command(BaseCommand):
+    help = '从打字练习原始记录重建用户打字统计累计值和章节完成度（用于数据修复）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='user_ids',
+            help='只重建指定用户ID的统计，默认重建全部用户'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options.get('user_ids')
+
+        if user_ids:
+            self.stdout.write(f'开始重建用户 {user_ids} 的打字统计...')
+        else:
+            self.stdout.write('开始重建全部用户的打字统计...')
+
+        service = TypingPracticeService()
+        rebuilt = service.rebuild_user_stats(user_ids)
+        chapters = service.rebuild_chapter_completion(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(f'重建完成！共更新 {rebuilt} 个用户的统计、{chapters} 个章节的完成度'))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:57
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_stat_sums(apps, schema_editor):
+    """用TypingSession原始记录补齐累计值，否则下一次提交会用0作为历史总和把平均值拉低"""
+    TypingSession = apps.get_model("english", "TypingSession")
+    UserTypingStats = apps.get_model("english", "UserTypingStats")
+    aggregated = (
+        TypingSession.objects.values("user_id")
+        .annotate(speed_sum=Sum("typing_speed"), time_sum=Sum("response_time"))
+        .order_by("user_id")
+    )
+    for row in aggregated.iterator():
+        UserTypingStats.objects.filter(user_id=row["user_id"]).update(
+            total_typing_speed=row["speed_sum"] or 0.0,
+            total_response_time=row["time_sum"] or 0.0,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0012_wrongwordrecord_dailypracticeduration_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usertypingstats",
+            name="total_response_time",
+            field=models.FloatField(default=0.0, verbose_name="累计响应时间(秒)"),
+        ),
+        migrations.AddField(
+            model_name="usertypingstats",
+            name="total_typing_speed",
+            field=models.FloatField(default=0.0, verbose_name="WPM累计值"),
+        ),
+        migrations.RunPython(backfill_stat_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:21
+
+from django.db import migrations, models
+from django.db.models import Max
+from django.utils import timezone
+
+
+TABLE = "english_typing_practice_sessions"
+
+
+def close_duplicate_open_sessions(apps, schema_editor):
+    """每个用户只保留最新的进行中会话，其余标记为完成，保证唯一约束可以建立"""
+    TypingPracticeSession = apps.get_model("english", "TypingPracticeSession")
+    latest_open = (
+        TypingPracticeSession.objects.filter(is_completed=False)
+        .values("user_id")
+        .annotate(latest_id=Max("id"))
+        .values_list("latest_id", flat=True)
+    )
+    TypingPracticeSession.objects.filter(is_completed=False).exclude(
+        id__in=list(latest_open)
+    ).update(is_completed=True, end_time=timezone.now())
+
+
+def add_mysql_open_session_index(apps, schema_editor):
+    """MySQL不支持带条件的唯一约束：用生成列（完成后为NULL）加唯一索引实现"""
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE `{TABLE}` ADD COLUMN `open_user_id` BIGINT "
+        f"GENERATED ALWAYS AS (IF(`is_completed`, NULL, `user_id`)) STORED"
+    )
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX `uniq_open_typing_session_user` ON `{TABLE}` (`open_user_id`)"
+    )
+
+
+def remove_mysql_open_session_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(f"DROP INDEX `uniq_open_typing_session_user` ON `{TABLE}`")
+    schema_editor.execute(f"ALTER TABLE `{TABLE}` DROP COLUMN `open_user_id`")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0013_usertypingstats_total_response_time_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="typingpracticesession",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_completed", False)),
+                fields=("user",),
+                name="uniq_open_typing_session_per_user",
+            ),
+        ),
+        migrations.RunPython(
+            add_mysql_open_session_index, remove_mysql_open_session_index
+        ),
+    ]
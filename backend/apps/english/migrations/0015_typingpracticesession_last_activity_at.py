@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:26
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_open_session_counters(apps, schema_editor):
+    """进行中会话的计数器此前只在结算时写入，这里从已挂载的练习记录补齐"""
+    TypingPracticeSession = apps.get_model("english", "TypingPracticeSession")
+    open_sessions = TypingPracticeSession.objects.filter(is_completed=False).annotate(
+        record_count=Count("typingpracticerecord"),
+        correct_count=Count(
+            "typingpracticerecord", filter=Q(typingpracticerecord__is_correct=True)
+        ),
+        time_sum=Sum("typingpracticerecord__response_time"),
+        last_record_at=Max("typingpracticerecord__created_at"),
+    )
+    for session in open_sessions:
+        session.total_words = session.record_count
+        session.correct_words = session.correct_count
+        session.total_time = session.time_sum or 0.0
+        session.last_activity_at = session.last_record_at
+        session.save(
+            update_fields=[
+                "total_words",
+                "correct_words",
+                "total_time",
+                "last_activity_at",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0014_typingpracticesession_open_session_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="typingpracticesession",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="最后活动时间"
+            ),
+        ),
+        migrations.RunPython(backfill_open_session_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_chapter_completion(apps, schema_editor):
+    """按 (用户, 词库, 章节) 统计已练习的不同单词数"""
+    TypingSession = apps.get_model("english", "TypingSession")
+    ChapterCompletion = apps.get_model("english", "ChapterCompletion")
+    aggregated = (
+        TypingSession.objects.filter(word__dictionary__isnull=False)
+        .values("user_id", "word__dictionary_id", "word__chapter")
+        .annotate(practiced=Count("word_id", distinct=True))
+        .order_by()
+    )
+    ChapterCompletion.objects.bulk_create(
+        (
+            ChapterCompletion(
+                user_id=row["user_id"],
+                dictionary_id=row["word__dictionary_id"],
+                chapter=row["word__chapter"],
+                practiced_words=row["practiced"],
+            )
+            for row in aggregated.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("english", "0015_typingpracticesession_last_activity_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChapterCompletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chapter", models.IntegerField(verbose_name="章节")),
+                (
+                    "practiced_words",
+                    models.IntegerField(default=0, verbose_name="练习过的不同单词数"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+                (
+                    "dictionary",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="english.dictionary",
+                        verbose_name="词库",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="用户",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "章节完成度",
+                "verbose_name_plural": "章节完成度",
+                "db_table": "english_chapter_completion",
+                "unique_together": {("user", "dictionary", "chapter")},
+            },
+        ),
+        migrations.RunPython(backfill_chapter_completion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:58
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+CHUNK_SIZE = 200
+
+
+def backfill_daily_counters(apps, schema_editor):
+    """
+    按用户分块从练习记录重建每日计数器：此前该表只由手动命令填充，
+    不补齐的话历史为空，之后的提交也会在清零的行上累加
+    """
+    TypingPracticeRecord = apps.get_model("english", "TypingPracticeRecord")
+    DailyPracticeStats = apps.get_model("english", "DailyPracticeStats")
+    fields = [
+        "exercise_count",
+        "word_count",
+        "correct_count",
+        "wpm_sum",
+        "wpm_count",
+        "total_time",
+        "wrong_count",
+        "avg_wpm",
+        "accuracy_rate",
+    ]
+    user_ids = list(
+        TypingPracticeRecord.objects.order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    for offset in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[offset : offset + CHUNK_SIZE]
+        rows = (
+            TypingPracticeRecord.objects.filter(user_id__in=chunk)
+            .values("user_id", "session_date")
+            .annotate(
+                word_count=Count("id"),
+                correct_count=Count("id", filter=Q(is_correct=True)),
+                wpm_sum=Coalesce(
+                    Sum("typing_speed", filter=Q(typing_speed__gt=0)), 0.0
+                ),
+                wpm_count=Count("id", filter=Q(typing_speed__gt=0)),
+                total_time=Coalesce(Sum("total_time"), 0.0),
+                wrong_count=Coalesce(Sum("wrong_count"), 0),
+            )
+            .order_by()
+        )
+        existing = {
+            (stats.user_id, stats.date): stats
+            for stats in DailyPracticeStats.objects.filter(user_id__in=chunk)
+        }
+        created, updated = [], []
+        for row in rows:
+            key = (row["user_id"], row["session_date"])
+            stats = existing.get(key)
+            if stats is None:
+                stats = DailyPracticeStats(user_id=key[0], date=key[1])
+                created.append(stats)
+            else:
+                updated.append(stats)
+            stats.exercise_count = row["word_count"]
+            stats.word_count = row["word_count"]
+            stats.correct_count = row["correct_count"]
+            stats.wpm_sum = row["wpm_sum"]
+            stats.wpm_count = row["wpm_count"]
+            stats.total_time = row["total_time"]
+            stats.wrong_count = row["wrong_count"]
+            stats.avg_wpm = row["wpm_sum"] / row["wpm_count"] if row["wpm_count"] else 0
+            stats.accuracy_rate = (
+                row["correct_count"] * 100.0 / row["word_count"]
+                if row["word_count"]
+                else 0
+            )
+        DailyPracticeStats.objects.bulk_create(created, batch_size=CHUNK_SIZE)
+        DailyPracticeStats.objects.bulk_update(updated, fields, batch_size=CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0016_chapter_completion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="correct_count",
+            field=models.IntegerField(default=0, verbose_name="正确单词数"),
+        ),
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="wpm_count",
+            field=models.IntegerField(default=0, verbose_name="有效WPM记录数"),
+        ),
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="wpm_sum",
+            field=models.FloatField(default=0, verbose_name="WPM累计值"),
+        ),
+        migrations.RunPython(backfill_daily_counters, migrations.RunPython.noop),
+    ]
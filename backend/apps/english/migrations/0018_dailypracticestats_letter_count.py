@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:05
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, Length
+
+CHUNK_SIZE = 200
+
+
+def backfill_letter_count(apps, schema_editor):
+    """按用户分块从练习记录汇总每天练习的字母数"""
+    TypingPracticeRecord = apps.get_model("english", "TypingPracticeRecord")
+    DailyPracticeStats = apps.get_model("english", "DailyPracticeStats")
+    user_ids = list(
+        TypingPracticeRecord.objects.order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    for offset in range(0, len(user_ids), CHUNK_SIZE):
+        rows = (
+            TypingPracticeRecord.objects.filter(
+                user_id__in=user_ids[offset : offset + CHUNK_SIZE]
+            )
+            .values("user_id", "session_date")
+            .annotate(letter_count=Coalesce(Sum(Length("word")), 0))
+            .order_by()
+        )
+        for row in rows:
+            DailyPracticeStats.objects.filter(
+                user_id=row["user_id"], date=row["session_date"]
+            ).update(letter_count=row["letter_count"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0017_dailypracticestats_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="letter_count",
+            field=models.IntegerField(default=0, verbose_name="练习字母数"),
+        ),
+        migrations.RunPython(backfill_letter_count, migrations.RunPython.noop),
+    ]
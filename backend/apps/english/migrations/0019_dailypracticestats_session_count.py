@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:25
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lag
+
+
+def backfill_session_count(apps, schema_editor):
+    """用窗口函数 LAG 按时间间隔切分已有记录，写入每天开始的练习轮数"""
+    TypingPracticeRecord = apps.get_model("english", "TypingPracticeRecord")
+    DailyPracticeStats = apps.get_model("english", "DailyPracticeStats")
+    gap = timedelta(minutes=getattr(settings, "TYPING_EXERCISE_GAP_MINUTES", 30))
+    starts = (
+        TypingPracticeRecord.objects.annotate(
+            previous_at=Window(
+                Lag("created_at"),
+                partition_by=[F("user_id")],
+                order_by=[F("created_at").asc(), F("id").asc()],
+            )
+        )
+        .filter(Q(previous_at__isnull=True) | Q(created_at__gte=F("previous_at") + gap))
+        .values_list("user_id", "session_date")
+    )
+    counts = {}
+    for key in starts.iterator():
+        counts[key] = counts.get(key, 0) + 1
+    for (user_id, session_date), session_count in counts.items():
+        DailyPracticeStats.objects.filter(user_id=user_id, date=session_date).update(
+            session_count=session_count
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0018_dailypracticestats_letter_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="session_count",
+            field=models.IntegerField(default=0, verbose_name="练习轮数（按间隔切分）"),
+        ),
+        migrations.RunPython(backfill_session_count, migrations.RunPython.noop),
+    ]
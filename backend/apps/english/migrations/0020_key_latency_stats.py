@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("english", "0019_dailypracticestats_session_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KeyLatencyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bigram", models.CharField(max_length=2, verbose_name="字母组合")),
+                ("sample_count", models.IntegerField(default=0, verbose_name="样本数")),
+                ("mean_ms", models.FloatField(default=0, verbose_name="平均间隔(毫秒)")),
+                ("m2", models.FloatField(default=0, verbose_name="离差平方和")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="用户",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "按键间隔统计",
+                "verbose_name_plural": "按键间隔统计",
+                "db_table": "english_key_latency_stats",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "mean_ms"],
+                        name="english_key_user_id_7c46d1_idx",
+                    )
+                ],
+                "unique_together": {("user", "bigram")},
+            },
+        ),
+    ]
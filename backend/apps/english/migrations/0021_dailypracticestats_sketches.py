@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+from apps.english import quantile_sketch
+
+
+def backfill_sketches(apps, schema_editor):
+    """按 (用户, 日期) 顺序流式读取已有记录，逐天写入WPM和反应时间的分位数草图"""
+    TypingPracticeRecord = apps.get_model("english", "TypingPracticeRecord")
+    DailyPracticeStats = apps.get_model("english", "DailyPracticeStats")
+
+    def flush(key, wpm_sketch, response_time_sketch):
+        if key is not None:
+            DailyPracticeStats.objects.filter(user_id=key[0], date=key[1]).update(
+                wpm_sketch=wpm_sketch, response_time_sketch=response_time_sketch
+            )
+
+    current, wpm_sketch, response_time_sketch = None, {}, {}
+    rows = (
+        TypingPracticeRecord.objects.order_by("user_id", "session_date")
+        .values_list("user_id", "session_date", "typing_speed", "response_time")
+        .iterator(chunk_size=2000)
+    )
+    for user_id, session_date, typing_speed, response_time in rows:
+        if (user_id, session_date) != current:
+            flush(current, wpm_sketch, response_time_sketch)
+            current, wpm_sketch, response_time_sketch = (user_id, session_date), {}, {}
+        if typing_speed > 0:
+            quantile_sketch.add_values(wpm_sketch, [typing_speed])
+        quantile_sketch.add_values(response_time_sketch, [response_time])
+    flush(current, wpm_sketch, response_time_sketch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0020_key_latency_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="response_time_sketch",
+            field=models.JSONField(default=dict, verbose_name="反应时间分位数草图"),
+        ),
+        migrations.AddField(
+            model_name="dailypracticestats",
+            name="wpm_sketch",
+            field=models.JSONField(default=dict, verbose_name="WPM分位数草图"),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0021_dailypracticestats_sketches"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LearningPlanDailyBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="日期")),
+                ("word_ids", models.JSONField(default=list, verbose_name="单词ID列表")),
+                ("review_count", models.IntegerField(default=0, verbose_name="复习单词数")),
+                (
+                    "expression_ids",
+                    models.JSONField(default=list, verbose_name="表达ID列表"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="生成时间"),
+                ),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_batches",
+                        to="english.learningplan",
+                        verbose_name="学习计划",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "学习计划每日批次",
+                "verbose_name_plural": "学习计划每日批次",
+                "db_table": "english_learning_plan_daily_batches",
+                "unique_together": {("plan", "date")},
+            },
+        ),
+    ]
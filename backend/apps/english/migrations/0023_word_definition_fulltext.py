@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:40
+
+from django.db import migrations
+
+
+TABLE = "english_words"
+INDEX = "ft_english_words_definition"
+
+
+def add_mysql_fulltext_index(apps, schema_editor):
+    """释义的全文索引：ngram 解析器按二元组切分，中文释义也能检索；其他数据库使用进程内倒排索引"""
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(
+        f"CREATE FULLTEXT INDEX `{INDEX}` ON `{TABLE}` (`definition`) WITH PARSER ngram"
+    )
+
+
+def remove_mysql_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(f"DROP INDEX `{INDEX}` ON `{TABLE}`")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0022_learning_plan_daily_batch"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_mysql_fulltext_index, remove_mysql_fulltext_index),
+    ]
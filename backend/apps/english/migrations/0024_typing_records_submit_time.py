@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:05
+
+import datetime
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0023_word_definition_fulltext"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="typingpracticerecord",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False, verbose_name="创建时间"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="typingpracticerecord",
+            name="session_date",
+            field=models.DateField(
+                default=datetime.date.today, editable=False, verbose_name="练习日期"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="typingsession",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False, verbose_name="创建时间"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="typingsession",
+            name="session_date",
+            field=models.DateField(
+                default=datetime.date.today, editable=False, verbose_name="练习日期"
+            ),
+        ),
+    ]
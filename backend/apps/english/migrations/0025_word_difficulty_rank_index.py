@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("english", "0024_typing_records_submit_time"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="word",
+            index=models.Index(
+                fields=["difficulty_level", "frequency_rank", "id"],
+                name="english_wor_difficu_1eab3e_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,8 @@
+from datetime import date
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class TimeStampedModel(models.Model):
@@ -48,6 +51,8 @@ class Word(TimeStampedModel, SoftDeleteModel):
             models.Index(fields=['difficulty_level']),
             models.Index(fields=['frequency_rank']),
             models.Index(fields=['quality_score']),
+            # 学习计划按难度分段、段内按 (词频排名, id) 游标分页挑选新单词
+            models.Index(fields=['difficulty_level', 'frequency_rank', 'id']),
         ]
         verbose_name = '单词'
         verbose_name_plural = '单词'
@@ -319,6 +324,23 @@ class LearningPlan(TimeStampedModel, SoftDeleteModel):
         return f"{self.user.username} - {self.name}"
 
 
+class LearningPlanDailyBatch(models.Model):
+    """学习计划每日批次：定时任务每天为每个激活的计划预先生成，接口只按 (计划, 日期) 读取一行"""
+    plan = models.ForeignKey(LearningPlan, on_delete=models.CASCADE, related_name='daily_batches', verbose_name='学习计划')
+    date = models.DateField(verbose_name='日期')
+    # 到期复习的单词在前，新单词在后
+    word_ids = models.JSONField(default=list, verbose_name='单词ID列表')
+    review_count = models.IntegerField(default=0, verbose_name='复习单词数')
+    expression_ids = models.JSONField(default=list, verbose_name='表达ID列表')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='生成时间')
+
+    class Meta:
+        db_table = 'english_learning_plan_daily_batches'
+        unique_together = (('plan', 'date'),)
+        verbose_name = '学习计划每日批次'
+        verbose_name_plural = '学习计划每日批次'
+
+
 class PracticeRecord(TimeStampedModel):
     """练习记录模型"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='practice_records', verbose_name='用户')
@@ -469,8 +491,9 @@ class TypingSession(models.Model):
     is_correct = models.BooleanField(verbose_name="是否正确")
     typing_speed = models.FloatField(default=0.0, verbose_name="打字速度(WPM)")
     response_time = models.FloatField(default=0.0, verbose_name="响应时间(秒)")
-    session_date = models.DateField(auto_now_add=True, verbose_name="练习日期")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    # 用默认值而不是 auto_now_add，写后缓冲落库时可以传入提交时间
+    session_date = models.DateField(default=date.today, editable=False, verbose_name="练习日期")
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="创建时间")
 
     class Meta:
         verbose_name = "打字练习记录"
@@ -502,6 +525,8 @@ class TypingPracticeSession(models.Model):
     accuracy_rate = models.FloatField(default=0.0, verbose_name="正确率")
     is_completed = models.BooleanField(default=False, verbose_name="是否完成")
     session_date = models.DateField(auto_now_add=True, verbose_name="练习日期")
+    # 每次挂载练习记录时与计数器一起原子更新，空闲会话自动关闭依据此列
+    last_activity_at = models.DateTimeField(null=True, blank=True, verbose_name="最后活动时间")
 
     class Meta:
         verbose_name = "打字练习会话"
@@ -511,26 +536,78 @@ class TypingPracticeSession(models.Model):
             models.Index(fields=['user', 'session_date']),
             models.Index(fields=['user', 'is_completed']),
         ]
+        constraints = [
+            # 每个用户最多一个进行中的会话（SQLite/PostgreSQL为部分唯一索引，
+            # MySQL不支持带条件的唯一约束，由迁移0014中的生成列+唯一索引实现）
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(is_completed=False),
+                name='uniq_open_typing_session_per_user',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.dictionary} Ch{self.chapter} ({'完成' if self.is_completed else '进行中'})"
 
-    def complete_session(self, total_words, correct_words, total_time):
-        """完成会话并计算统计"""
+    @staticmethod
+    def open_session_cache_key(user_id):
+        """用户当前进行中会话的缓存键"""
+        return f'typing_open_session_{user_id}'
+
+    @staticmethod
+    def final_stats_updates(end_time):
+        """
+        完成会话的 UPDATE 赋值：平均WPM和正确率在数据库端由会话行上的计数器算出
+
+        表达式只引用计数器列，不会被同一语句中的其他赋值影响（MySQL从左到右求值）。
+        """
+        from django.db.models import Case, F, FloatField, When
+        from django.db.models.functions import Cast, Round
+        words = Cast('total_words', FloatField())
+        return {
+            # 5个字符算一个单词
+            'average_wpm': Case(
+                When(total_time__gt=0, then=Round(words * 5 / (F('total_time') / 60), 2)),
+                default=F('average_wpm')
+            ),
+            'accuracy_rate': Case(
+                When(total_words__gt=0, then=Round(Cast('correct_words', FloatField()) * 100 / words, 2)),
+                default=F('accuracy_rate')
+            ),
+            'end_time': end_time,
+            'is_completed': True,
+        }
+
+    def complete_session(self, total_words=None, correct_words=None, total_time=None):
+        """
+        完成会话并计算统计
+
+        不传参数时直接使用增量维护的计数器，整个结算只有一条UPDATE；
+        传入统计值时按传入值结算（兼容旧调用）。
+        """
+        from django.core.cache import cache
         from django.utils import timezone
-        self.total_words = total_words
-        self.correct_words = correct_words
-        self.total_time = total_time
-        self.end_time = timezone.now()
-        self.is_completed = True
-        
-        # 计算平均WPM和正确率
-        if total_time > 0:
-            self.average_wpm = round((total_words * 5) / (total_time / 60), 2)  # 5个字符算一个单词
-        if total_words > 0:
-            self.accuracy_rate = round((correct_words / total_words) * 100, 2)
-        
-        self.save()
+        if total_words is None:
+            TypingPracticeSession.objects.filter(pk=self.pk).update(**self.final_stats_updates(timezone.now()))
+            self.refresh_from_db(fields=[
+                'total_words', 'correct_words', 'total_time', 'average_wpm',
+                'accuracy_rate', 'end_time', 'is_completed'
+            ])
+        else:
+            self.total_words = total_words
+            self.correct_words = correct_words
+            self.total_time = total_time
+            self.end_time = timezone.now()
+            self.is_completed = True
+            
+            # 计算平均WPM和正确率
+            if total_time > 0:
+                self.average_wpm = round((total_words * 5) / (total_time / 60), 2)  # 5个字符算一个单词
+            if total_words > 0:
+                self.accuracy_rate = round((correct_words / total_words) * 100, 2)
+            
+            self.save()
+        cache.delete(self.open_session_cache_key(self.user_id))
 
 
 class TypingPracticeRecord(models.Model):
@@ -545,8 +622,9 @@ class TypingPracticeRecord(models.Model):
     wrong_count = models.IntegerField(default=0, verbose_name="错误次数")
     mistakes = models.JSONField(default=dict, verbose_name="按键错误详情")
     timing = models.JSONField(default=list, verbose_name="每个字符的输入时间")
-    session_date = models.DateField(auto_now_add=True, verbose_name="练习日期")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    # 用默认值而不是 auto_now_add，写后缓冲落库时可以传入提交时间
+    session_date = models.DateField(default=date.today, editable=False, verbose_name="练习日期")
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="创建时间")
 
     class Meta:
         verbose_name = "打字练习详细记录"
@@ -563,14 +641,21 @@ class TypingPracticeRecord(models.Model):
 
 
 class DailyPracticeStats(models.Model):
-    """每日练习统计"""
+    """每日练习统计（提交时按 (用户, 日期) 增量upsert，热力图和趋势图直接读取）"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="用户")
     date = models.DateField(verbose_name="统计日期")
     exercise_count = models.IntegerField(default=0, verbose_name="练习次数")
+    session_count = models.IntegerField(default=0, verbose_name="练习轮数（按间隔切分）")
     word_count = models.IntegerField(default=0, verbose_name="练习单词数")
+    correct_count = models.IntegerField(default=0, verbose_name="正确单词数")
+    wpm_sum = models.FloatField(default=0, verbose_name="WPM累计值")
+    wpm_count = models.IntegerField(default=0, verbose_name="有效WPM记录数")
     total_time = models.FloatField(default=0, verbose_name="总用时(毫秒)")
     wrong_count = models.IntegerField(default=0, verbose_name="总错误次数")
+    letter_count = models.IntegerField(default=0, verbose_name="练习字母数")
     wrong_keys = models.JSONField(default=list, verbose_name="错误按键列表")
+    wpm_sketch = models.JSONField(default=dict, verbose_name="WPM分位数草图")
+    response_time_sketch = models.JSONField(default=dict, verbose_name="反应时间分位数草图")
     avg_wpm = models.FloatField(default=0, verbose_name="平均WPM")
     accuracy_rate = models.FloatField(default=0, verbose_name="正确率")
 
@@ -608,6 +693,33 @@ class KeyErrorStats(models.Model):
         return f"{self.user.username} - {self.key} ({self.error_count}次)"
 
 
+class KeyLatencyStats(models.Model):
+    """字母组合按键间隔统计（提交时按 (用户, 字母组合) 在线合并均值和离差平方和）"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="用户")
+    bigram = models.CharField(max_length=2, verbose_name="字母组合")
+    sample_count = models.IntegerField(default=0, verbose_name="样本数")
+    mean_ms = models.FloatField(default=0, verbose_name="平均间隔(毫秒)")
+    m2 = models.FloatField(default=0, verbose_name="离差平方和")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        verbose_name = "按键间隔统计"
+        verbose_name_plural = "按键间隔统计"
+        db_table = 'english_key_latency_stats'
+        unique_together = [('user', 'bigram')]
+        indexes = [
+            models.Index(fields=['user', 'mean_ms']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.bigram} ({self.mean_ms:.0f}ms)"
+
+    @property
+    def std_ms(self):
+        """样本标准差"""
+        return (self.m2 / (self.sample_count - 1)) ** 0.5 if self.sample_count > 1 else 0.0
+
+
 class UserTypingStats(models.Model):
     """用户打字统计"""
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="用户")
@@ -615,6 +727,9 @@ class UserTypingStats(models.Model):
     total_correct_words = models.IntegerField(default=0, verbose_name="总正确单词数")
     average_wpm = models.FloatField(default=0.0, verbose_name="平均WPM")
     total_practice_time = models.IntegerField(default=0, verbose_name="总练习时长(分钟)")
+    # 增量维护的累计值，提交时用F()表达式原子更新，避免全量重算
+    total_typing_speed = models.FloatField(default=0.0, verbose_name="WPM累计值")
+    total_response_time = models.FloatField(default=0.0, verbose_name="累计响应时间(秒)")
     last_practice_date = models.DateField(null=True, blank=True, verbose_name="最后练习日期")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
 
@@ -634,6 +749,32 @@ class UserTypingStats(models.Model):
         return round((self.total_correct_words / self.total_words_practiced) * 100, 2)
 
 
+class ChapterCompletion(models.Model):
+    """用户章节完成度（按章节统计练习过的不同单词数，提交时增量维护）"""
+    # 章节至少练习这么多个不同单词（或全部单词）才算完成
+    COMPLETION_THRESHOLD = 5
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="用户")
+    dictionary = models.ForeignKey(Dictionary, on_delete=models.CASCADE, verbose_name="词库")
+    chapter = models.IntegerField(verbose_name="章节")
+    practiced_words = models.IntegerField(default=0, verbose_name="练习过的不同单词数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        verbose_name = "章节完成度"
+        verbose_name_plural = "章节完成度"
+        db_table = 'english_chapter_completion'
+        unique_together = [('user', 'dictionary', 'chapter')]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.dictionary_id} Ch{self.chapter} ({self.practiced_words}词)"
+
+    @classmethod
+    def is_completed(cls, practiced_words, chapter_words):
+        """至少练习5个单词或全部单词即算完成"""
+        return practiced_words >= min(cls.COMPLETION_THRESHOLD, chapter_words)
+
+
 class ChapterPracticeRecord(TimeStampedModel):
     """章节练习记录模型"""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="用户")
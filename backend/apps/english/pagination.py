@@ -1,4 +1,9 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
 
 
@@ -18,3 +23,60 @@ class StandardResultsSetPagination(PageNumberPagination):
                 'total': self.page.paginator.count
             }
         })
+
+
+class DueReviewPagination(BasePagination):
+    """
+    待复习卡片的键集分页：按 (next_review_date, id) 排序，游标是上一页最后一张卡片的这两个值
+
+    每页是一条走 (user, next_review_date) 索引的 LIMIT 查询，不做 COUNT(*) 和 OFFSET，翻到多深都一样快。
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            due_at, last_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(next_review_date__gt=due_at) | Q(next_review_date=due_at, id__gt=last_id)
+            )
+        page = list(queryset.order_by('next_review_date', 'id')[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_next else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(card):
+        return urlsafe_base64_encode(f'{card.next_review_date.isoformat()}|{card.id}'.encode())
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            due_at, last_id = urlsafe_base64_decode(cursor).decode().split('|')
+            return datetime.fromisoformat(due_at), int(last_id)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('无效的游标')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'success': True,
+            'message': 'OK',
+            'data': data,
+            'pagination': {
+                'page_size': self.page_size,
+                'next_cursor': self.next_cursor
+            }
+        })
@@ -0,0 +1,293 @@
+"""
+打字练习数据列式导出（离线分析用）
+- 练习记录、打字会话记录、练习会话三张表按 session_date 的月份分区写出：
+  <输出目录>/<表名>/month=YYYY-MM/part-<起始ID>-<截止ID>.parquet
+- 按主键键集分页读取，每页 chunk_size 行，内存占用与表的大小无关
+- 增量模式只导出主键大于上次水位的行，水位保存在输出目录的 _watermark.json
+- pyarrow 为可选依赖：未安装时命令写 gzip 压缩的CSV，流式接口输出CSV
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.db.models import Max, Min
+
+from .models import TypingPracticeRecord, TypingPracticeSession, TypingSession
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+WATERMARK_FILE = '_watermark.json'
+DEFAULT_CHUNK_SIZE = 5000
+FILE_FORMATS = ('parquet', 'csv')
+STREAM_FORMATS = ('arrow', 'csv')
+
+# 表名 -> 模型和导出列（列名, 类型）；排除 pending 条件匹配的行（它们还会被更新），水位也不越过其中最小的主键
+EXPORT_TABLES = {
+    'typing_practice_records': {
+        'model': TypingPracticeRecord,
+        'columns': [
+            ('id', 'int'), ('user_id', 'int'), ('session_id', 'int'), ('word', 'string'),
+            ('is_correct', 'bool'), ('typing_speed', 'float'), ('response_time', 'float'),
+            ('total_time', 'float'), ('wrong_count', 'int'), ('mistakes', 'json'), ('timing', 'json'),
+            ('session_date', 'date'), ('created_at', 'timestamp'),
+        ],
+    },
+    'typing_sessions': {
+        'model': TypingSession,
+        'columns': [
+            ('id', 'int'), ('user_id', 'int'), ('word_id', 'int'), ('is_correct', 'bool'),
+            ('typing_speed', 'float'), ('response_time', 'float'),
+            ('session_date', 'date'), ('created_at', 'timestamp'),
+        ],
+    },
+    'typing_practice_sessions': {
+        'model': TypingPracticeSession,
+        'columns': [
+            ('id', 'int'), ('user_id', 'int'), ('dictionary', 'string'), ('chapter', 'int'),
+            ('start_time', 'timestamp'), ('end_time', 'timestamp'), ('total_words', 'int'),
+            ('correct_words', 'int'), ('total_time', 'float'), ('average_wpm', 'float'),
+            ('accuracy_rate', 'float'), ('session_date', 'date'),
+        ],
+        # 空闲会话由定时任务自动关闭，水位不会长期停在进行中的会话前
+        'pending': {'is_completed': False},
+    },
+}
+
+
+def default_file_format() -> str:
+    return 'parquet' if PYARROW_AVAILABLE else 'csv'
+
+
+def default_stream_format() -> str:
+    return 'arrow' if PYARROW_AVAILABLE else 'csv'
+
+
+def _column_names(table: str) -> List[str]:
+    return [name for name, _ in EXPORT_TABLES[table]['columns']]
+
+
+def _arrow_schema(table: str):
+    types = {
+        'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'string': pa.string(),
+        'json': pa.string(), 'date': pa.date32(), 'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_TABLES[table]['columns']])
+
+
+def _record_batch(rows: List[tuple], schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+    )
+
+
+def export_upper_bound(table: str) -> Optional[int]:
+    """本次导出的主键上限（含）：开始时的最大主键，且不越过仍会被更新的行；表为空时返回None"""
+    spec = EXPORT_TABLES[table]
+    manager = spec['model'].objects
+    upper = manager.aggregate(value=Max('id'))['value']
+    if upper is not None and spec.get('pending'):
+        first_pending = manager.filter(**spec['pending']).aggregate(value=Min('id'))['value']
+        if first_pending is not None:
+            upper = first_pending - 1
+    return upper
+
+
+def iter_row_chunks(table: str, after_id: int = 0, upper_id: Optional[int] = None,
+                    month: Optional[datetime] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """
+    按主键键集分页读取一张表，逐页产出行元组列表（JSON列已序列化为字符串）
+
+    每页是一条 WHERE id > 上页最后ID ORDER BY id LIMIT chunk_size 的查询，走主键索引；
+    不依赖数据库驱动的服务端游标（mysqlclient 会把 .iterator() 的整个结果集读进客户端）。
+    """
+    spec = EXPORT_TABLES[table]
+    json_positions = [i for i, (_, kind) in enumerate(spec['columns']) if kind == 'json']
+    queryset = spec['model'].objects.all()
+    if spec.get('pending'):
+        queryset = queryset.exclude(**spec['pending'])
+    if upper_id is not None:
+        queryset = queryset.filter(id__lte=upper_id)
+    if month is not None:
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        queryset = queryset.filter(session_date__gte=month.date(), session_date__lt=next_month.date())
+    queryset = queryset.order_by('id').values_list(*_column_names(table))
+
+    while True:
+        rows = list(queryset.filter(id__gt=after_id)[:chunk_size])
+        if not rows:
+            return
+        if json_positions:
+            rows = [_encode_json(row, json_positions) for row in rows]
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1][0]
+
+
+def _encode_json(row: tuple, positions: List[int]) -> tuple:
+    row = list(row)
+    for i in positions:
+        row[i] = json.dumps(row[i], ensure_ascii=False, separators=(',', ':'))
+    return tuple(row)
+
+
+class _PartitionedWriter:
+    """按月份分区写文件：每个分区一个打开的写入器，先写临时文件，关闭时改名为正式文件"""
+
+    def __init__(self, table_dir: str, table: str, file_format: str, file_name: str):
+        self.table_dir = table_dir
+        self.table = table
+        self.file_format = file_format
+        self.file_name = f'{file_name}.parquet' if file_format == 'parquet' else f'{file_name}.csv.gz'
+        self.month_index = _column_names(table).index('session_date')
+        self.schema = _arrow_schema(table) if file_format == 'parquet' else None
+        self.partitions = {}
+
+    def write(self, rows: List[tuple]) -> None:
+        by_month: Dict[str, List[tuple]] = {}
+        for row in rows:
+            by_month.setdefault(row[self.month_index].strftime('%Y-%m'), []).append(row)
+        for month, month_rows in by_month.items():
+            handle = self.partitions.get(month) or self._open(month)
+            if self.file_format == 'parquet':
+                handle['writer'].write_table(pa.Table.from_batches([_record_batch(month_rows, self.schema)]))
+            else:
+                handle['writer'].writerows(month_rows)
+
+    def _open(self, month: str) -> dict:
+        directory = os.path.join(self.table_dir, f'month={month}')
+        os.makedirs(directory, exist_ok=True)
+        # 以点开头的临时文件会被 pyarrow.dataset 等读取方忽略，中断的导出不会留下半个文件
+        temp_path = os.path.join(directory, f'.{self.file_name}.tmp')
+        if self.file_format == 'parquet':
+            handle = {'writer': pq.ParquetWriter(temp_path, self.schema)}
+        else:
+            stream = gzip.open(temp_path, 'wt', encoding='utf-8', newline='')
+            handle = {'stream': stream, 'writer': csv.writer(stream)}
+            handle['writer'].writerow(_column_names(self.table))
+        handle['temp_path'] = temp_path
+        handle['path'] = os.path.join(directory, self.file_name)
+        self.partitions[month] = handle
+        return handle
+
+    def close(self) -> List[str]:
+        paths = []
+        for month in sorted(self.partitions):
+            handle = self.partitions[month]
+            if self.file_format == 'parquet':
+                handle['writer'].close()
+            else:
+                handle['stream'].close()
+            os.replace(handle['temp_path'], handle['path'])
+            paths.append(handle['path'])
+        self.partitions = {}
+        return paths
+
+
+def load_watermarks(output_dir: str) -> Dict[str, dict]:
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_watermark(output_dir: str, table: str, last_id: int) -> None:
+    watermarks = load_watermarks(output_dir)
+    watermarks[table] = {'last_id': last_id, 'exported_at': datetime.now().isoformat(timespec='seconds')}
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+
+
+def export_table(output_dir: str, table: str, file_format: Optional[str] = None, incremental: bool = False,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    把一张表导出为按月分区的文件，返回 {'rows': 行数, 'files': [文件路径], 'last_id': 水位}
+
+    增量模式从 _watermark.json 中该表的水位之后开始；全量模式先清空该表已有的分区目录。
+    所有分区文件写完后才推进水位，中断后重跑同一区间会覆盖同名文件。
+    """
+    file_format = file_format or default_file_format()
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'不支持的导出格式: {file_format}')
+    if file_format == 'parquet' and not PYARROW_AVAILABLE:
+        raise ValueError('导出Parquet需要安装 pyarrow，或改用 csv 格式')
+
+    table_dir = os.path.join(output_dir, table)
+    after_id = 0
+    if incremental:
+        after_id = load_watermarks(output_dir).get(table, {}).get('last_id', 0)
+    elif os.path.isdir(table_dir):
+        shutil.rmtree(table_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    upper_id = export_upper_bound(table)
+    if upper_id is None or upper_id <= after_id:
+        return {'rows': 0, 'files': [], 'last_id': after_id}
+
+    writer = _PartitionedWriter(table_dir, table, file_format, f'part-{after_id + 1:010d}-{upper_id:010d}')
+    rows = 0
+    for chunk in iter_row_chunks(table, after_id, upper_id, chunk_size=chunk_size):
+        writer.write(chunk)
+        rows += len(chunk)
+    files = writer.close()
+    _save_watermark(output_dir, table, upper_id)
+    return {'rows': rows, 'files': files, 'last_id': upper_id}
+
+
+def stream_table(table: str, stream_format: Optional[str] = None, month: Optional[datetime] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """把一张表（或其中一个月份分区）编码为字节流逐页产出：Arrow IPC 流格式或带表头的CSV"""
+    stream_format = stream_format or default_stream_format()
+    chunks = iter_row_chunks(table, month=month, chunk_size=chunk_size)
+    if stream_format == 'arrow':
+        return _stream_arrow(table, chunks)
+    return _stream_csv(table, chunks)
+
+
+def _stream_arrow(table: str, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    schema = _arrow_schema(table)
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield _drain(sink)
+    for rows in chunks:
+        writer.write_batch(_record_batch(rows, schema))
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+
+def _stream_csv(table: str, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_column_names(table))
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
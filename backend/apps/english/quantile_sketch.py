@@ -0,0 +1,80 @@
+"""
+可合并的分位数草图（DDSketch 思路的对数分桶直方图）
+- 正数 x 落入第 ceil(log_γ(x)) 个桶，γ = (1 + α) / (1 - α)，返回的分位数相对误差不超过 α
+- 草图是 {桶序号: 次数} 的字典，可直接存入JSONField；合并就是按桶累加，与数据的切分方式无关
+- 每日汇总行各存一份，任意日期范围的分位数只需合并这些草图，不扫描原始记录
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+# 相对误差上限
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+# 不大于该值的数统一计入零桶
+MIN_POSITIVE = 1e-6
+ZERO_BUCKET = 'z'
+
+Sketch = Dict[str, int]
+
+
+def _bucket(value: float) -> str:
+    if value <= MIN_POSITIVE:
+        return ZERO_BUCKET
+    return str(math.ceil(math.log(value) / _LOG_GAMMA))
+
+
+def _bucket_value(bucket: str) -> float:
+    """桶的代表值：使桶内任意值的相对误差都不超过 α"""
+    if bucket == ZERO_BUCKET:
+        return 0.0
+    index = int(bucket)
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def _bucket_order(bucket: str) -> float:
+    return -math.inf if bucket == ZERO_BUCKET else int(bucket)
+
+
+def add_values(sketch: Sketch, values: Iterable[float]) -> Sketch:
+    """把一组数累加进草图（原地修改并返回）"""
+    for value in values:
+        bucket = _bucket(value)
+        sketch[bucket] = sketch.get(bucket, 0) + 1
+    return sketch
+
+
+def merge(*sketches: Optional[Sketch]) -> Sketch:
+    """合并多个草图，返回新草图"""
+    merged: Sketch = {}
+    for sketch in sketches:
+        for bucket, count in (sketch or {}).items():
+            merged[bucket] = merged.get(bucket, 0) + count
+    return merged
+
+
+def total_count(sketch: Optional[Sketch]) -> int:
+    return sum((sketch or {}).values())
+
+
+def quantiles(sketch: Optional[Sketch], qs: List[float]) -> Dict[float, Optional[float]]:
+    """
+    计算草图的多个分位数，返回 {q: 估计值}，空草图返回 None
+
+    按最近秩取第 floor(q * (n - 1)) 个样本所在的桶，与 numpy.percentile 的 'lower' 插值一致。
+    """
+    n = total_count(sketch)
+    if n == 0:
+        return {q: None for q in qs}
+
+    buckets = sorted(sketch, key=_bucket_order)
+    result: Dict[float, Optional[float]] = {}
+    position = 0
+    cumulative = sketch[buckets[0]]
+    for q in sorted(qs):
+        rank = math.floor(q * (n - 1))
+        while cumulative <= rank:
+            position += 1
+            cumulative += sketch[buckets[position]]
+        result[q] = _bucket_value(buckets[position])
+    return result
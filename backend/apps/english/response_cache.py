@@ -0,0 +1,100 @@
+"""
+按用户缓存的接口响应
+- 缓存键包含用户ID和该用户的数据版本号，提交练习时递增版本号使旧响应失效
+- 响应带内容哈希ETag，客户端携带 If-None-Match 重新验证，未变化时返回304
+替代按URL缓存、不区分用户的 cache_page
+"""
+import functools
+import hashlib
+import json
+import time
+from typing import Optional
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+USER_DATA_VERSION_KEY = 'typing_user_data_version_{user_id}'
+USER_RESPONSE_KEY = 'typing_user_response_{prefix}_{user_id}_{version}_{day}_{query}'
+
+
+def get_user_data_version(user_id: int) -> int:
+    """返回用户数据版本号，缺失时初始化（不设过期时间）"""
+    key = USER_DATA_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_data_version(*user_ids: int) -> None:
+    """递增用户数据版本号，使这些用户的全部缓存响应失效"""
+    # 用纳秒时间戳作为版本号：版本键被淘汰后重新生成的版本也不会与旧响应撞键
+    version = time.time_ns()
+    cache.set_many({USER_DATA_VERSION_KEY.format(user_id=user_id): version for user_id in set(user_ids)}, None)
+
+
+def response_etag(data) -> str:
+    """响应数据的内容哈希ETag"""
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, ensure_ascii=False)
+    return quote_etag(hashlib.md5(body.encode('utf-8')).hexdigest())
+
+
+def conditional_response(request, data, etag: Optional[str] = None) -> Response:
+    """返回带ETag的响应；If-None-Match 命中时返回304"""
+    etag = etag or response_etag(data)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def user_cache_response(timeout: int, key_prefix: Optional[str] = None):
+    """
+    按用户缓存DRF action的200响应
+
+    缓存键 = 前缀 + 用户ID + 用户数据版本号 + 当天日期 + 排序后的查询参数。
+    日期参与键计算，按天统计的接口跨天后自动重新计算。未登录请求不缓存。
+    """
+    def decorator(view_func):
+        prefix = key_prefix or view_func.__name__
+
+        @functools.wraps(view_func)
+        def wrapper(self, request, *args, **kwargs):
+            user = request.user
+            if not user.is_authenticated:
+                return view_func(self, request, *args, **kwargs)
+
+            query = hashlib.md5(
+                '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.lists())).encode('utf-8')
+            ).hexdigest()
+            cache_key = USER_RESPONSE_KEY.format(
+                prefix=prefix,
+                user_id=user.id,
+                version=get_user_data_version(user.id),
+                day=time.strftime('%Y%m%d'),
+                query=query
+            )
+
+            cached = cache.get(cache_key)
+            if cached is None:
+                response = view_func(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cached = (response.data, response_etag(response.data))
+                cache.set(cache_key, cached, timeout)
+
+            data, etag = cached
+            return conditional_response(request, data, etag)
+
+        return wrapper
+
+    return decorator
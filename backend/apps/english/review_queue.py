@@ -0,0 +1,68 @@
+"""
+每个用户的待复习优先队列（缓存）
+- 缓存按下次复习时间排序的前 QUEUE_SIZE 张卡片（含尚未到期的），取"接下来N张到期卡片"时按当前时间从队首截取，不查数据库
+- 每次复习后用一条走 (user, next_review_date) 索引的 LIMIT 查询重建；进度被直接增删改时失效
+- 队列被截断且其中的到期卡片不够时，回退到同一索引上的数据库查询
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import UserWordProgress
+from .serializers import UserWordProgressSerializer
+
+QUEUE_SIZE = 200
+QUEUE_TIMEOUT = 24 * 3600
+
+
+def _cache_key(user_id: int) -> str:
+    return f'review_queue_{user_id}'
+
+
+def scheduled_cards(user_id: int):
+    """用户已排期的卡片，按 (下次复习时间, id) 排序"""
+    return (
+        UserWordProgress.objects
+        .filter(user_id=user_id, is_deleted=False, next_review_date__isnull=False)
+        .select_related('word')
+        .order_by('next_review_date', 'id')
+    )
+
+
+def refresh_review_queue(user_id: int) -> Dict[str, Any]:
+    """从数据库重建用户的队列并写入缓存"""
+    cards = list(scheduled_cards(user_id)[:QUEUE_SIZE])
+    queue = {
+        'cards': [
+            (card.next_review_date.timestamp(), data)
+            for card, data in zip(cards, UserWordProgressSerializer(cards, many=True).data)
+        ],
+        # 没有被截断时队列就是全部已排期的卡片，到期卡片不够也不必再查数据库
+        'complete': len(cards) < QUEUE_SIZE,
+    }
+    cache.set(_cache_key(user_id), queue, QUEUE_TIMEOUT)
+    return queue
+
+
+def invalidate_review_queue(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
+
+
+def get_next_due_cards(user_id: int, limit: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """接下来最多 limit 张到期卡片（序列化后的进度），最早到期的在前"""
+    now = now or timezone.now()
+    queue = cache.get(_cache_key(user_id)) or refresh_review_queue(user_id)
+
+    cutoff = now.timestamp()
+    due = []
+    for due_at, data in queue['cards']:
+        if due_at > cutoff or len(due) == limit:
+            break
+        due.append(data)
+    if len(due) == limit or queue['complete'] or len(due) < len(queue['cards']):
+        return due
+
+    cards = scheduled_cards(user_id).filter(next_review_date__lte=now)[:limit]
+    return list(UserWordProgressSerializer(cards, many=True).data)
@@ -74,6 +74,12 @@ class UserWordProgressSerializer(serializers.ModelSerializer):
         return value
 
 
+class WordProgressReviewSerializer(serializers.Serializer):
+    """单词复习结果序列化器（SM-2评分 0~5）"""
+    word_id = serializers.IntegerField()
+    quality = serializers.IntegerField(min_value=0, max_value=5)
+
+
 class ExpressionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expression
@@ -162,6 +168,46 @@ class PracticeRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'created_at']
 
 
+class PracticeSubmissionSerializer(serializers.Serializer):
+    """练习答案提交序列化器"""
+    practice_type = serializers.ChoiceField(choices=PracticeRecord._meta.get_field('practice_type').choices)
+    content_id = serializers.IntegerField(min_value=0)
+    content_type = serializers.ChoiceField(choices=PracticeRecord._meta.get_field('content_type').choices)
+    question = serializers.CharField()
+    user_answer = serializers.CharField(allow_blank=True)
+    correct_answer = serializers.CharField()
+    time_spent = serializers.IntegerField(min_value=0)
+
+
+class PracticeQuestionSerializer(serializers.Serializer):
+    """练习题目序列化器"""
+    type = serializers.CharField()
+    word_id = serializers.IntegerField()
+    question = serializers.CharField()
+    options = serializers.ListField(child=serializers.CharField())
+    correct_answer = serializers.CharField()
+    explanation = serializers.CharField(allow_blank=True)
+
+
+class PracticeQuestionQuerySerializer(serializers.Serializer):
+    """练习出题参数"""
+    type = serializers.ChoiceField(choices=['word_spelling', 'word_meaning'], default='word_spelling')
+    count = serializers.IntegerField(min_value=1, max_value=50, default=5)
+    difficulty = serializers.CharField(required=False)
+    exclude = serializers.CharField(required=False)
+    exclude_seen = serializers.BooleanField(default=False)
+    seed = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_difficulty(self, value):
+        return [item for item in value.split(',') if item]
+
+    def validate_exclude(self, value):
+        try:
+            return [int(item) for item in value.split(',') if item]
+        except ValueError:
+            raise serializers.ValidationError('exclude 应为逗号分隔的单词ID')
+
+
 class PronunciationRecordSerializer(serializers.ModelSerializer):
     """发音记录序列化器"""
     class Meta:
@@ -2,16 +2,39 @@
 数据分析服务
 提供数据分析相关的业务逻辑
 """
+import json
+import math
+import random
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple
-from django.db.models import Q, Count, Avg, Sum
+from typing import List, Dict, Any, Tuple, Optional
+from django.conf import settings
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Q, F, Case, Count, IntegerField, Sum, Max, When, Window
+from django.db.models.functions import Coalesce, Lag, Length, RowNumber
+from django.core.cache import cache
 from django.utils import timezone
 from .models import (
+    ChapterCompletion,
+    Expression,
     TypingPracticeRecord,
     DailyPracticeStats,
     KeyErrorStats,
-    TypingSession
+    KeyLatencyStats,
+    LearningPlan,
+    LearningPlanDailyBatch,
+    LearningStats,
+    PracticeRecord,
+    TypingSession,
+    TypingWord,
+    TypingPracticeSession,
+    UserTypingStats,
+    UserWordProgress,
+    Word
 )
+from . import quantile_sketch, word_sampling
+from .response_cache import bump_user_data_version
 
 
 class DataAnalysisService:
@@ -20,100 +43,146 @@ class DataAnalysisService:
     def __init__(self):
         pass
     
+    # 看板包含的面板，dashboard 接口的 panels 参数从中选择
+    DASHBOARD_PANELS = (
+        'exercise_heatmap', 'word_heatmap', 'wpm_trend', 'accuracy_trend',
+        'key_error_stats', 'overview', 'monthly_calendar', 'daily_progress'
+    )
+    
+    def get_daily_rows(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """日期范围内的每日汇总行（每天一行，一年最多366行），各面板都从这些行计算"""
+        return list(DailyPracticeStats.objects.filter(
+            user_id=user_id,
+            date__range=[start_date.date(), end_date.date()]
+        ).order_by('date').values('date', *self.DAILY_COUNTER_FIELDS))
+    
     def get_exercise_heatmap(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
         """获取练习次数热力图数据"""
-        # 获取日期范围内的练习记录
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date__range=[start_date.date(), end_date.date()]
-        ).values('session_date').annotate(
-            exercise_count=Count('id')
-        ).order_by('session_date')
-        
-        # 生成热力图数据
-        heatmap_data = []
-        for record in records:
-            date_str = record['session_date'].strftime('%Y-%m-%d')
-            count = record['exercise_count']
-            level = self._get_heatmap_level(count)
-            
-            heatmap_data.append({
-                'date': date_str,
-                'count': count,
-                'level': level
-            })
-        
-        return heatmap_data
+        return self._build_heatmap(self.get_daily_rows(user_id, start_date, end_date), 'exercise_count')
     
     def get_word_heatmap(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """获取练习单词数热力图数据"""
-        # 获取日期范围内的练习记录，按日期分组统计单词数（不去重）
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date__range=[start_date.date(), end_date.date()]
-        ).values('session_date').annotate(
-            word_count=Count('id')  # 统计所有练习记录，不去重
-        ).order_by('session_date')
-        
-        # 生成热力图数据
-        heatmap_data = []
-        for record in records:
-            date_str = record['session_date'].strftime('%Y-%m-%d')
-            count = record['word_count']
-            level = self._get_heatmap_level(count)
-            
-            heatmap_data.append({
-                'date': date_str,
-                'count': count,
-                'level': level
-            })
-        
-        return heatmap_data
+        """获取练习单词数热力图数据（不去重）"""
+        return self._build_heatmap(self.get_daily_rows(user_id, start_date, end_date), 'word_count')
     
     def get_wpm_trend(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Tuple[str, float]]:
         """获取WPM趋势数据"""
-        # 获取日期范围内的练习记录，按日期分组计算平均WPM
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date__range=[start_date.date(), end_date.date()],
-            typing_speed__gt=0  # 排除无效数据
-        ).values('session_date').annotate(
-            avg_wpm=Avg('typing_speed')
-        ).order_by('session_date')
-        
-        # 生成趋势数据
-        trend_data = []
-        for record in records:
-            date_str = record['session_date'].strftime('%Y-%m-%d')
-            wpm = round(record['avg_wpm'], 2)
-            
-            trend_data.append([date_str, wpm])
-        
-        return trend_data
+        return self._build_wpm_trend(self.get_daily_rows(user_id, start_date, end_date))
     
     def get_accuracy_trend(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Tuple[str, float]]:
         """获取正确率趋势数据"""
-        # 获取日期范围内的练习记录，按日期分组计算正确率
-        records = TypingPracticeRecord.objects.filter(
+        return self._build_accuracy_trend(self.get_daily_rows(user_id, start_date, end_date))
+    
+    def _build_heatmap(self, rows: List[Dict[str, Any]], field: str) -> List[Dict[str, Any]]:
+        """生成热力图数据，跳过数量为0的日期"""
+        return [
+            {
+                'date': row['date'].strftime('%Y-%m-%d'),
+                'count': row[field],
+                'level': self._get_heatmap_level(row[field])
+            }
+            for row in rows if row[field] > 0
+        ]
+    
+    def _build_wpm_trend(self, rows: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """生成WPM趋势数据，只统计有效WPM（typing_speed > 0）的记录"""
+        return [
+            [row['date'].strftime('%Y-%m-%d'), round(row['wpm_sum'] / row['wpm_count'], 2)]
+            for row in rows if row['wpm_count'] > 0
+        ]
+    
+    def _build_accuracy_trend(self, rows: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """生成正确率趋势数据"""
+        return [
+            [row['date'].strftime('%Y-%m-%d'), round((row['correct_count'] / row['word_count']) * 100, 2)]
+            for row in rows if row['word_count'] > 0
+        ]
+    
+    def get_daily_progress(self, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """获取每日学习进度（范围内每天一条，没有练习的日期补0）"""
+        return self._build_daily_progress(self.get_daily_rows(user_id, start_date, end_date), start_date, end_date)
+    
+    def _build_daily_progress(self, rows: List[Dict[str, Any]], start_date: datetime,
+                              end_date: datetime) -> List[Dict[str, Any]]:
+        """按日期建索引后单次遍历日期范围生成每日进度，耗时与天数成线性关系"""
+        rows_by_date = {row['date']: row for row in rows}
+        start = start_date.date()
+        progress = []
+        for offset in range((end_date.date() - start).days + 1):
+            day = start + timedelta(days=offset)
+            row = rows_by_date.get(day)
+            words_practiced = row['word_count'] if row else 0
+            correct_words = row['correct_count'] if row else 0
+            wpm_count = row['wpm_count'] if row else 0
+            progress.append({
+                'date': day.isoformat(),
+                'words_practiced': words_practiced,
+                'correct_words': correct_words,
+                'accuracy': round((correct_words / words_practiced) * 100, 2) if words_practiced > 0 else 0,
+                'avg_wpm': round(row['wpm_sum'] / wpm_count, 2) if wpm_count > 0 else 0
+            })
+        return progress
+    
+    # 分位数接口支持的指标及其在每日汇总上的草图列
+    PERCENTILES = (0.5, 0.9, 0.99)
+    PERCENTILE_METRICS = {'wpm': 'wpm_sketch', 'response_time': 'response_time_sketch'}
+    
+    def get_percentile_trend(self, user_id: int, start_date: datetime, end_date: datetime,
+                             metric: str = 'wpm') -> Dict[str, Any]:
+        """
+        获取每天以及整个日期范围的 p50/p90/p99
+        
+        从每日汇总行上的分位数草图计算，整个范围的分位数由各天草图合并得到，一年也只读366行，
+        不扫描原始记录；结果相对误差不超过 quantile_sketch.RELATIVE_ACCURACY。
+        """
+        field = self.PERCENTILE_METRICS[metric]
+        rows = DailyPracticeStats.objects.filter(
             user_id=user_id,
-            session_date__range=[start_date.date(), end_date.date()]
-        ).values('session_date').annotate(
-            total_words=Count('id'),
-            correct_words=Count('id', filter=Q(is_correct=True))
-        ).order_by('session_date')
-        
-        # 生成趋势数据
-        trend_data = []
-        for record in records:
-            date_str = record['session_date'].strftime('%Y-%m-%d')
-            total = record['total_words']
-            correct = record['correct_words']
-            
-            if total > 0:
-                accuracy = round((correct / total) * 100, 2)
-                trend_data.append([date_str, accuracy])
+            date__range=[start_date.date(), end_date.date()]
+        ).order_by('date').values_list('date', field)
+        
+        daily = []
+        sketches = []
+        for day, sketch in rows:
+            if not sketch:
+                continue
+            daily.append({'date': day.strftime('%Y-%m-%d'), **self._sketch_percentiles(sketch)})
+            sketches.append(sketch)
         
-        return trend_data
+        return {
+            'metric': metric,
+            'daily': daily,
+            'overall': self._sketch_percentiles(quantile_sketch.merge(*sketches))
+        }
+    
+    def get_session_percentiles(self, user_id: int, session_id: int) -> Optional[Dict[str, Any]]:
+        """获取单个练习会话的WPM和反应时间分位数：会话记录数有限，直接取出数组精确计算"""
+        rows = list(TypingPracticeRecord.objects.filter(
+            user_id=user_id,
+            session_id=session_id
+        ).values_list('typing_speed', 'response_time'))
+        if not rows:
+            return None
+        
+        return {
+            'session_id': session_id,
+            'wpm': self._exact_percentiles([speed for speed, _ in rows if speed > 0]),
+            'response_time': self._exact_percentiles([response_time for _, response_time in rows])
+        }
+    
+    def _sketch_percentiles(self, sketch: Dict[str, int]) -> Dict[str, Any]:
+        values = quantile_sketch.quantiles(sketch, list(self.PERCENTILES))
+        result: Dict[str, Any] = {'count': quantile_sketch.total_count(sketch)}
+        for q in self.PERCENTILES:
+            result[f'p{round(q * 100)}'] = round(values[q], 2) if values[q] is not None else None
+        return result
+    
+    def _exact_percentiles(self, values: List[float]) -> Dict[str, Any]:
+        """与草图相同的取秩方式（第 floor(q * (n - 1)) 个），便于两者对照"""
+        values = sorted(values)
+        result: Dict[str, Any] = {'count': len(values)}
+        for q in self.PERCENTILES:
+            result[f'p{round(q * 100)}'] = round(values[int(q * (len(values) - 1))], 2) if values else None
+        return result
     
     def get_key_error_stats(self, user_id: int) -> List[Dict[str, Any]]:
         """获取按键错误统计"""
@@ -135,43 +204,22 @@ class DataAnalysisService:
     
     def get_data_overview(self, user_id: int, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """获取数据概览"""
-        # 获取日期范围内的统计数据
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date__range=[start_date.date(), end_date.date()]
-        ).order_by('created_at')
-        
-        # 计算概览数据
-        # 练习次数：按时间间隔分组，间隔超过30分钟算新会话
-        total_exercises = self._count_exercise_sessions(records)
-        total_words = records.count()  # 不去重，统计所有练习过的单词总数
-        
-        # 计算平均WPM
-        wpm_records = records.filter(typing_speed__gt=0)
-        # 修复：安全处理聚合查询结果
-        avg_wpm_result = wpm_records.aggregate(avg_wpm=Avg('typing_speed'))
-        avg_wpm = avg_wpm_result['avg_wpm'] if avg_wpm_result and avg_wpm_result['avg_wpm'] is not None else 0
-        
-        # 计算平均正确率 - 使用字母级别统计（与练习界面保持一致）
-        total_letters = 0
-        correct_letters = 0
-        
-        for record in records:
-            word_length = len(record.word)
-            total_letters += word_length
-            
-            # 如果有错误次数记录，使用错误次数计算正确字母数
-            if hasattr(record, 'wrong_count') and record.wrong_count is not None:
-                correct_letters += word_length - record.wrong_count
-            else:
-                # 如果没有错误次数记录，默认全部正确（保持向后兼容）
-                correct_letters += word_length
+        return self._build_overview(self.get_daily_rows(user_id, start_date, end_date), start_date, end_date)
+    
+    def _build_overview(self, rows: List[Dict[str, Any]], start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """从每日汇总行计算概览：练习次数为按间隔切分的练习轮数，单词数不去重"""
+        wpm_sum = sum(row['wpm_sum'] for row in rows)
+        wpm_count = sum(row['wpm_count'] for row in rows)
+        avg_wpm = wpm_sum / wpm_count if wpm_count else 0
         
+        # 正确率使用字母级别统计（与练习界面保持一致）：正确字母数 = 单词长度 - 错误次数
+        total_letters = sum(row['letter_count'] for row in rows)
+        correct_letters = total_letters - sum(row['wrong_count'] for row in rows)
         avg_accuracy = (correct_letters / total_letters * 100) if total_letters > 0 else 0
         
         return {
-            'total_exercises': total_exercises,
-            'total_words': total_words,
+            'total_exercises': sum(row['session_count'] for row in rows),
+            'total_words': sum(row['word_count'] for row in rows),
             'correct_letters': correct_letters,  # 正确字母数
             'total_letters': total_letters,  # 总字母数
             'avg_accuracy': round(avg_accuracy, 2),  # 保持原有字段名以匹配测试期望
@@ -179,6 +227,50 @@ class DataAnalysisService:
             'date_range': [start_date, end_date]
         }
     
+    def get_dashboard(self, user_id: int, start_date: datetime, end_date: datetime,
+                      panels: Optional[List[str]] = None, year: Optional[int] = None,
+                      month: Optional[int] = None) -> Dict[str, Any]:
+        """
+        一次计算数据分析页的多个面板，返回 {面板名: 数据}
+        
+        热力图、趋势图、每日进度和概览都从同一批每日汇总行计算，只查询一次；月历在所选月份
+        落在日期范围内时也复用这些行。按键错误统计单独一条小查询。
+        """
+        panels = panels or list(self.DASHBOARD_PANELS)
+        daily_panels = {'exercise_heatmap', 'word_heatmap', 'wpm_trend', 'accuracy_trend', 'overview', 'daily_progress'}
+        rows = self.get_daily_rows(user_id, start_date, end_date) if daily_panels.intersection(panels) else []
+        
+        builders = {
+            'exercise_heatmap': lambda: self._build_heatmap(rows, 'exercise_count'),
+            'word_heatmap': lambda: self._build_heatmap(rows, 'word_count'),
+            'wpm_trend': lambda: self._build_wpm_trend(rows),
+            'accuracy_trend': lambda: self._build_accuracy_trend(rows),
+            'key_error_stats': lambda: self.get_key_error_stats(user_id),
+            'overview': lambda: self._build_overview(rows, start_date, end_date),
+            'monthly_calendar': lambda: self._dashboard_calendar(user_id, start_date, end_date, rows, year, month),
+            'daily_progress': lambda: self._build_daily_progress(rows, start_date, end_date),
+        }
+        return {panel: builders[panel]() for panel in panels}
+    
+    def _dashboard_calendar(self, user_id: int, start_date: datetime, end_date: datetime,
+                            rows: List[Dict[str, Any]], year: Optional[int], month: Optional[int]) -> Dict[str, Any]:
+        """看板中的月历：所选月份完整落在日期范围内且已取到汇总行时复用，否则单独查询"""
+        import calendar
+        
+        today = datetime.now()
+        year = year or today.year
+        month = month or today.month
+        first_day = datetime(year, month, 1).date()
+        last_day = datetime(year, month, calendar.monthrange(year, month)[1]).date()
+        
+        daily_counts = None
+        if rows and start_date.date() <= first_day and last_day <= end_date.date():
+            daily_counts = {
+                row['date']: (row['word_count'], row['session_count']) for row in rows
+                if first_day <= row['date'] <= last_day and row['word_count'] > 0
+            }
+        return self.get_monthly_calendar_data(user_id, year, month, daily_counts)
+    
     def _get_heatmap_level(self, count: int) -> int:
         """根据数量计算热力图等级"""
         if count == 0:
@@ -192,27 +284,120 @@ class DataAnalysisService:
         else:
             return 4
     
-    def _count_exercise_sessions(self, records) -> int:
-        """按会话级别统计练习次数（参考QWERTY Learner逻辑）"""
-        if not records:
-            return 0
-
-        # 使用TypingPracticeSession模型统计会话数（包括进行中的会话）
-        from .models import TypingPracticeSession
+    # 月历缓存：已结束的月份不过期（只有补写历史数据时失效），当前月份在提交时增量修补
+    CALENDAR_VERSION_KEY = 'typing_calendar_version_{user_id}'
+    CALENDAR_CACHE_KEY = 'typing_monthly_calendar_{user_id}_{version}_{year}_{month}'
+    CALENDAR_CURRENT_MONTH_TIMEOUT = 10 * 60
+    
+    def _calendar_version(self, user_id: int) -> int:
+        """用户月历缓存的版本号，缺失时初始化（不设过期时间）"""
+        key = self.CALENDAR_VERSION_KEY.format(user_id=user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+    
+    def _calendar_cache_key(self, user_id: int, year: int, month: int, version: Optional[int] = None) -> str:
+        if version is None:
+            version = self._calendar_version(user_id)
+        return self.CALENDAR_CACHE_KEY.format(user_id=user_id, version=version, year=year, month=month)
+    
+    def _calendar_timeout(self, year: int, month: int) -> Optional[int]:
+        """已结束的月份不再变化，永久缓存；当前及未来月份短期缓存，兜底修补遗漏"""
+        today = datetime.now().date()
+        if (year, month) < (today.year, today.month):
+            return None
+        return self.CALENDAR_CURRENT_MONTH_TIMEOUT
+    
+    def invalidate_calendar_cache(self, *user_ids: int) -> None:
+        """补写或重建历史数据后使这些用户的全部月历缓存失效"""
+        cache.set_many({
+            self.CALENDAR_VERSION_KEY.format(user_id=user_id): time.time_ns() for user_id in set(user_ids)
+        }, None)
+    
+    def patch_calendar_day(self, user_id: int, day, exercise_delta: int = 0, word_delta: int = 0) -> None:
+        """
+        把某一天的练习次数/单词数增量修补到已缓存的月历上
         
-        user_id = records.first().user.id if records.exists() else None
-        if not user_id:
-            return 0
+        只修补当前月份；写入已结束月份的数据属于补写历史，直接删除该月缓存，下次读取时重建。
+        该月尚未缓存时不做任何事。
+        """
+        key = self._calendar_cache_key(user_id, day.year, day.month)
+        timeout = self._calendar_timeout(day.year, day.month)
+        if timeout is None:
+            cache.delete(key)
+            return
+        
+        data = cache.get(key)
+        if data is None:
+            return
+        
+        date_str = day.strftime('%Y-%m-%d')
+        seen = set()
+        for entry in data['calendar_data'] + [d for week in data['weeks_data'] for d in week]:
+            if entry['date'] != date_str or not entry['is_current_month'] or id(entry) in seen:
+                continue
+            seen.add(id(entry))
+            entry['exercise_count'] += exercise_delta
+            entry['word_count'] += word_delta
+            entry['exercise_level'] = self._get_heatmap_level(entry['exercise_count'])
+            entry['word_level'] = self._get_heatmap_level(entry['word_count'])
+            entry['has_data'] = entry['word_count'] > 0
+        
+        current_month_days = [d for d in data['calendar_data'] if d['is_current_month']]
+        data['month_stats'].update({
+            'total_exercises': sum(d['exercise_count'] for d in current_month_days),
+            'total_words': sum(d['word_count'] for d in current_month_days),
+            'days_with_practice': len([d for d in current_month_days if d['has_data']]),
+        })
+        cache.set(key, data, timeout)
+    
+    def get_monthly_calendar_data(self, user_id: int, year: int, month: int,
+                                  daily_counts: Optional[Dict[Any, Tuple[int, int]]] = None) -> Dict[str, Any]:
+        """
+        获取指定月份的日历热力图数据（Windows风格），结果按 (用户, 年, 月) 缓存
+        
+        daily_counts 为 {日期: (练习单词数, 练习轮数)}，调用方已取到该月每日统计时传入，避免重复查询。
+        """
+        key = self._calendar_cache_key(user_id, year, month)
+        data = cache.get(key)
+        if data is None:
+            data = self._build_monthly_calendar(user_id, year, month, daily_counts)
+            cache.set(key, data, self._calendar_timeout(year, month))
+        return data
+    
+    def get_yearly_calendar_data(self, user_id: int, year: int) -> Dict[str, Any]:
+        """
+        一次获取全年12个月的月历
+        
+        已缓存的月份直接返回；其余月份的每日统计用一条查询取回后按月拆分。
+        """
+        version = self._calendar_version(user_id)
+        keys = {month: self._calendar_cache_key(user_id, year, month, version) for month in range(1, 13)}
+        cached = cache.get_many(list(keys.values()))
+        months = {month: cached[key] for month, key in keys.items() if key in cached}
+        
+        missing = [month for month in range(1, 13) if month not in months]
+        if missing:
+            daily_counts: Dict[int, Dict[Any, Tuple[int, int]]] = {month: {} for month in missing}
+            for day, word_count, session_count in DailyPracticeStats.objects.filter(
+                user_id=user_id, date__year=year, date__month__in=missing, word_count__gt=0
+            ).values_list('date', 'word_count', 'session_count'):
+                daily_counts[day.month][day] = (word_count, session_count)
             
-        # 统计所有会话数量（包括进行中和已完成的）
-        all_sessions = TypingPracticeSession.objects.filter(
-            user_id=user_id
-        ).count()
+            for month in missing:
+                months[month] = self._build_monthly_calendar(user_id, year, month, daily_counts[month])
+                cache.set(keys[month], months[month], self._calendar_timeout(year, month))
         
-        return all_sessions
+        return {
+            'year': year,
+            'months': [months[month] for month in range(1, 13)]
+        }
     
-    def get_monthly_calendar_data(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
-        """获取指定月份的日历热力图数据（Windows风格）"""
+    def _build_monthly_calendar(self, user_id: int, year: int, month: int,
+                                daily_counts: Optional[Dict[Any, Tuple[int, int]]] = None) -> Dict[str, Any]:
+        """计算月历数据：单词数和练习次数（按间隔切分的练习轮数）都来自每日统计"""
         from datetime import date, timedelta
         import calendar
         
@@ -220,46 +405,26 @@ class DataAnalysisService:
         first_day = date(year, month, 1)
         last_day = date(year, month, calendar.monthrange(year, month)[1])
         
-        # 获取该月的所有练习记录
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date__range=[first_day, last_day]
-        )
-        
-        # 按日期分组统计练习单词数
-        daily_stats = records.values('session_date').annotate(
-            word_count=Count('id')  # 练习单词数（不去重）
-        ).order_by('session_date')
-        
-        # 按日期统计练习次数（基于完成的会话）
-        from .models import TypingPracticeSession
-        daily_exercise_counts = {}
-        
-        # 获取该月完成的会话
-        completed_sessions = TypingPracticeSession.objects.filter(
-            user_id=user_id,
-            is_completed=True,
-            session_date__range=[first_day, last_day]
-        )
-        
-        # 按日期统计会话数量
-        for session in completed_sessions:
-            session_date = session.session_date
-            if session_date in daily_exercise_counts:
-                daily_exercise_counts[session_date] += 1
-            else:
-                daily_exercise_counts[session_date] = 1
+        # 按日期统计练习单词数（不去重）和练习轮数
+        if daily_counts is None:
+            daily_counts = {
+                day: (word_count, session_count)
+                for day, word_count, session_count in DailyPracticeStats.objects.filter(
+                    user_id=user_id,
+                    date__range=[first_day, last_day],
+                    word_count__gt=0
+                ).values_list('date', 'word_count', 'session_count')
+            }
         
         # 创建日期到统计数据的映射
         stats_dict = {}
-        for stat in daily_stats:
-            date_str = stat['session_date'].strftime('%Y-%m-%d')
-            exercise_count = daily_exercise_counts.get(stat['session_date'], 0)
+        for session_date, (word_count, exercise_count) in sorted(daily_counts.items()):
+            date_str = session_date.strftime('%Y-%m-%d')
             stats_dict[date_str] = {
                 'exercise_count': exercise_count,
-                'word_count': stat['word_count'],
+                'word_count': word_count,
                 'exercise_level': self._get_heatmap_level(exercise_count),
-                'word_level': self._get_heatmap_level(stat['word_count'])
+                'word_level': self._get_heatmap_level(word_count)
             }
         
         # 生成完整的月历数据
@@ -407,119 +572,941 @@ class DataAnalysisService:
         }
     
     def aggregate_daily_stats(self, user_id: int, date: datetime.date) -> None:
-        """聚合每日统计数据"""
-        # 获取指定日期的所有练习记录
-        records = TypingPracticeRecord.objects.filter(
-            user_id=user_id,
-            session_date=date
-        )
+        """从练习记录重新聚合某一天的每日统计（覆盖增量值）"""
+        self.rebuild_daily_stats([user_id], dates=[date])
+    
+    # 每日统计的累加列，顺序即upsert的列顺序
+    DAILY_COUNTER_FIELDS = (
+        'exercise_count', 'session_count', 'word_count', 'correct_count', 'wpm_sum', 'wpm_count', 'total_time',
+        'wrong_count', 'letter_count'
+    )
+    # 每日统计上的分位数草图列（见 quantile_sketch），按桶累加合并
+    DAILY_SKETCH_FIELDS = ('wpm_sketch', 'response_time_sketch')
+    
+    @staticmethod
+    def exercise_gap() -> timedelta:
+        """练习轮次的切分间隔：同一用户相邻两条记录间隔不小于该值时开始新的一轮"""
+        return timedelta(minutes=getattr(settings, 'TYPING_EXERCISE_GAP_MINUTES', 30))
+    
+    @staticmethod
+    def count_session_starts(records: List[TypingPracticeRecord], gap: timedelta,
+                             previous_at: Optional[datetime] = None) -> Dict[Any, int]:
+        """
+        按时间间隔切分一批记录，返回 {练习日期: 当天开始的练习轮数}
         
-        if not records.exists():
-            return
+        records 按 created_at 升序，previous_at 为这批记录之前该用户最后一条记录的时间。
+        每一轮计入它第一条记录的练习日期，与 _count_session_starts 的窗口函数算法一致。
+        """
+        starts: Dict[Any, int] = {}
+        for record in records:
+            if previous_at is None or record.created_at - previous_at >= gap:
+                starts[record.session_date] = starts.get(record.session_date, 0) + 1
+            previous_at = record.created_at
+        return starts
+    
+    def _count_session_starts(self, records, gap: timedelta) -> Dict[Tuple[int, Any], int]:
+        """
+        在数据库端按时间间隔切分练习轮次，返回 {(用户ID, 练习日期): 开始的练习轮数}
         
-        # 计算统计数据
-        exercise_count = records.count()
-        word_count = records.values('word').distinct().count()
-        total_time = sum(record.total_time for record in records)
-        wrong_count = sum(record.wrong_count for record in records)
+        用窗口函数 LAG 取同一用户上一条记录的时间（MySQL 8 / SQLite 3.25+），
+        只取回每轮的第一条记录，不加载全部原始记录。
+        """
+        starts = records.annotate(
+            previous_at=Window(
+                Lag('created_at'),
+                partition_by=[F('user_id')],
+                order_by=[F('created_at').asc(), F('id').asc()]
+            )
+        ).filter(
+            Q(previous_at__isnull=True) | Q(created_at__gte=F('previous_at') + gap)
+        ).values_list('user_id', 'session_date')
         
-        # 收集错误按键
-        wrong_keys = []
+        counts: Dict[Tuple[int, Any], int] = {}
+        for key in starts:
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+    
+    @classmethod
+    def count_daily_totals(cls, records: List[TypingPracticeRecord]) -> Dict[Any, Dict[str, Any]]:
+        """把一批练习记录按练习日期汇总为每日统计增量（练习轮数由 count_session_starts 另行计入）"""
+        daily_totals: Dict[Any, Dict[str, Any]] = {}
         for record in records:
-            if record.mistakes:
-                wrong_keys.extend(record.mistakes.values())
-        
-        # 计算平均WPM
-        wpm_records = records.filter(typing_speed__gt=0)
-        # 修复：安全处理聚合查询结果
-        avg_wpm_result = wpm_records.aggregate(avg_wpm=Avg('typing_speed'))
-        avg_wpm = avg_wpm_result['avg_wpm'] if avg_wpm_result and avg_wpm_result['avg_wpm'] is not None else 0
-        
-        # 计算正确率
-        total_words_count = records.count()
-        correct_words_count = records.filter(is_correct=True).count()
-        accuracy_rate = (correct_words_count / total_words_count * 100) if total_words_count > 0 else 0
-        
-        # 更新或创建每日统计
-        daily_stats, created = DailyPracticeStats.objects.get_or_create(
+            totals = daily_totals.get(record.session_date)
+            if totals is None:
+                totals = dict.fromkeys(cls.DAILY_COUNTER_FIELDS, 0)
+                totals.update({field: {} for field in cls.DAILY_SKETCH_FIELDS})
+                daily_totals[record.session_date] = totals
+            totals['exercise_count'] += 1
+            totals['word_count'] += 1
+            totals['correct_count'] += 1 if record.is_correct else 0
+            if record.typing_speed > 0:
+                totals['wpm_sum'] += record.typing_speed
+                totals['wpm_count'] += 1
+                quantile_sketch.add_values(totals['wpm_sketch'], [record.typing_speed])
+            quantile_sketch.add_values(totals['response_time_sketch'], [record.response_time])
+            totals['total_time'] += record.total_time
+            totals['wrong_count'] += record.wrong_count or 0
+            totals['letter_count'] += len(record.word)
+        return daily_totals
+    
+    def rebuild_daily_stats(self, user_ids: Optional[List[int]] = None, dates: Optional[List[Any]] = None,
+                            chunk_size: int = 200, gap_minutes: Optional[int] = None) -> int:
+        """
+        从TypingPracticeRecord原始记录重建每日统计，返回写入的 (用户, 日期) 行数
+        
+        按用户ID分块，每块一条 GROUP BY (user, session_date) 查询、一条切分练习轮次的窗口查询，
+        再流式读取WPM和反应时间构建分位数草图，结果用upsert覆盖写入，不会一次加载全部原始记录。
+        """
+        gap = timedelta(minutes=gap_minutes) if gap_minutes is not None else self.exercise_gap()
+        if user_ids is None:
+            user_ids = list(TypingPracticeRecord.objects.order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct())
+        
+        rebuilt = 0
+        for offset in range(0, len(user_ids), chunk_size):
+            chunk = TypingPracticeRecord.objects.filter(user_id__in=user_ids[offset:offset + chunk_size])
+            records = chunk if dates is None else chunk.filter(session_date__in=dates)
+            # 切分练习轮次时带上前一天的记录，跨零点的一轮不会被误算成新的一轮
+            session_records = chunk if dates is None else chunk.filter(
+                session_date__in={day - timedelta(days=1) for day in dates} | set(dates)
+            )
+            session_starts = self._count_session_starts(session_records, gap)
+            sketches = self._build_daily_sketches(records)
+            rows = records.values('user_id', 'session_date').annotate(
+                exercise_count=Count('id'),
+                word_count=Count('id'),
+                correct_count=Count('id', filter=Q(is_correct=True)),
+                wpm_sum=Coalesce(Sum('typing_speed', filter=Q(typing_speed__gt=0)), 0.0),
+                wpm_count=Count('id', filter=Q(typing_speed__gt=0)),
+                total_time=Coalesce(Sum('total_time'), 0.0),
+                wrong_count=Coalesce(Sum('wrong_count'), 0),
+                letter_count=Coalesce(Sum(Length('word')), 0)
+            ).order_by()
+            
+            per_user: Dict[int, Dict[Any, Dict[str, float]]] = {}
+            for row in rows:
+                totals = {field: row[field] for field in self.DAILY_COUNTER_FIELDS if field != 'session_count'}
+                totals['session_count'] = session_starts.get((row['user_id'], row['session_date']), 0)
+                totals.update(sketches[(row['user_id'], row['session_date'])])
+                per_user.setdefault(row['user_id'], {})[row['session_date']] = totals
+            with transaction.atomic():
+                for user_id, daily_totals in per_user.items():
+                    self.upsert_daily_stats(user_id, daily_totals, replace=True)
+                    rebuilt += len(daily_totals)
+            self.invalidate_calendar_cache(*per_user)
+            bump_user_data_version(*per_user)
+        
+        return rebuilt
+    
+    def _build_daily_sketches(self, records) -> Dict[Tuple[int, Any], Dict[str, Dict[str, int]]]:
+        """流式读取记录的WPM和反应时间，按 (用户, 日期) 构建分位数草图"""
+        sketches: Dict[Tuple[int, Any], Dict[str, Dict[str, int]]] = {}
+        for user_id, session_date, typing_speed, response_time in records.values_list(
+            'user_id', 'session_date', 'typing_speed', 'response_time'
+        ).iterator(chunk_size=2000):
+            day = sketches.setdefault((user_id, session_date), {field: {} for field in self.DAILY_SKETCH_FIELDS})
+            if typing_speed > 0:
+                quantile_sketch.add_values(day['wpm_sketch'], [typing_speed])
+            quantile_sketch.add_values(day['response_time_sketch'], [response_time])
+        return sketches
+    
+    def merge_stored_sketches(self, user_id: int, daily_totals: Dict[Any, Dict[str, Any]]) -> None:
+        """
+        把已存的分位数草图合并进本批的每日增量（原地修改），之后由 upsert_daily_stats 整体写回
+        
+        草图无法像计数器那样在SQL里累加，这里先 SELECT ... FOR UPDATE 锁住当天的汇总行再合并；
+        当天第一次提交时若并发插入，可能丢失其中一批的草图样本，重建命令可修复。
+        """
+        stored = DailyPracticeStats.objects.select_for_update().filter(
             user_id=user_id,
-            date=date,
-            defaults={
-                'exercise_count': exercise_count,
-                'word_count': word_count,
-                'total_time': total_time,
-                'wrong_count': wrong_count,
-                'wrong_keys': wrong_keys,
-                'avg_wpm': avg_wpm,
-                'accuracy_rate': accuracy_rate
-            }
-        )
+            date__in=list(daily_totals)
+        ).values_list('date', *self.DAILY_SKETCH_FIELDS)
+        for day, *day_sketches in stored:
+            for field, sketch in zip(self.DAILY_SKETCH_FIELDS, day_sketches):
+                daily_totals[day][field] = quantile_sketch.merge(sketch, daily_totals[day][field])
+    
+    def upsert_daily_stats(self, user_id: int, daily_totals: Dict[Any, Dict[str, Any]], replace: bool = False) -> None:
+        """
+        批量upsert每日统计，整批只执行一条SQL
+        
+        依赖 (user, date) 唯一约束，计数器在数据库端累加（写法同 upsert_key_error_stats），
+        平均WPM和正确率由累加后的计数器在同一条语句中算出。replace=True 时用新值覆盖。
+        分位数草图总是整体写入，增量写入前需先用 merge_stored_sketches 合并已存的草图；
+        daily_totals 不带草图时保留已存的草图。
+        """
+        if not daily_totals:
+            return
+        
+        ops = connection.ops
+        table = ops.quote_name(DailyPracticeStats._meta.db_table)
+        user_col = ops.quote_name('user_id')
+        date_col = ops.quote_name('date')
+        wpm_col = ops.quote_name('avg_wpm')
+        accuracy_col = ops.quote_name('accuracy_rate')
+        keys_col = ops.quote_name('wrong_keys')
+        counter_cols = {field: ops.quote_name(field) for field in self.DAILY_COUNTER_FIELDS}
+        sketch_cols = {field: ops.quote_name(field) for field in self.DAILY_SKETCH_FIELDS}
+        
+        # 按日期排序，保证并发事务以相同顺序加锁
+        dates = sorted(daily_totals)
+        with_sketches = all(field in daily_totals[date] for date in dates for field in self.DAILY_SKETCH_FIELDS)
+        params: List[Any] = []
+        for date in dates:
+            totals = daily_totals[date]
+            avg_wpm = totals['wpm_sum'] / totals['wpm_count'] if totals['wpm_count'] else 0
+            accuracy = totals['correct_count'] * 100.0 / totals['word_count'] if totals['word_count'] else 0
+            params.extend([user_id, ops.adapt_datefield_value(date)])
+            params.extend(totals[field] for field in self.DAILY_COUNTER_FIELDS)
+            params.extend(json.dumps(totals.get(field, {})) for field in self.DAILY_SKETCH_FIELDS)
+            params.extend([avg_wpm, accuracy, '[]'])
+        placeholders = ', '.join(['%s'] * (len(self.DAILY_COUNTER_FIELDS) + len(self.DAILY_SKETCH_FIELDS) + 5))
+        values = ', '.join([f'({placeholders})'] * len(dates))
         
-        if not created:
-            # 更新现有记录
-            daily_stats.exercise_count = exercise_count
-            daily_stats.word_count = word_count
-            daily_stats.total_time = total_time
-            daily_stats.wrong_count = wrong_count
-            daily_stats.wrong_keys = wrong_keys
-            daily_stats.avg_wpm = avg_wpm
-            daily_stats.accuracy_rate = accuracy_rate
-            daily_stats.save()
+        if connection.vendor == 'mysql':
+            def new(col):
+                return f'VALUES({col})'
+            
+            def old(col):
+                return col
+        else:
+            def new(col):
+                return f'excluded.{col}'
+            
+            def old(col):
+                return f'{table}.{col}'
+        
+        if replace:
+            assignments = [f'{col} = {new(col)}' for col in (*counter_cols.values(), wpm_col, accuracy_col)]
+        else:
+            def total(field):
+                col = counter_cols[field]
+                return f'({old(col)} + {new(col)})'
+            
+            # 注意：MySQL 的 UPDATE 从左到右求值，派生列必须排在计数器之前，保证基于旧值计算
+            assignments = [
+                f"{wpm_col} = CASE WHEN {total('wpm_count')} > 0 "
+                f"THEN {total('wpm_sum')} / {total('wpm_count')} ELSE 0 END",
+                f"{accuracy_col} = CASE WHEN {total('word_count')} > 0 "
+                f"THEN {total('correct_count')} * 100.0 / {total('word_count')} ELSE 0 END",
+            ] + [f'{col} = {old(col)} + {new(col)}' for col in counter_cols.values()]
+        if with_sketches:
+            assignments += [f'{col} = {new(col)}' for col in sketch_cols.values()]
+        
+        if connection.vendor == 'mysql':
+            conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(assignments)
+        else:
+            conflict = f'ON CONFLICT ({user_col}, {date_col}) DO UPDATE SET ' + ', '.join(assignments)
+        
+        columns = ', '.join([
+            user_col, date_col, *counter_cols.values(), *sketch_cols.values(), wpm_col, accuracy_col, keys_col
+        ])
+        sql = f'INSERT INTO {table} ({columns}) VALUES {values} {conflict}'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
     
     def update_key_error_stats(self, user_id: int, mistakes: Dict[str, List[str]]) -> None:
-        """更新按键错误统计"""
-        for key, errors in mistakes.items():
-            if errors:
-                # 更新或创建按键错误统计
-                key_stat, created = KeyErrorStats.objects.get_or_create(
-                    user_id=user_id,
-                    key=key.upper(),
-                    defaults={'error_count': len(errors)}
-                )
-                
-                if not created:
-                    key_stat.error_count += len(errors)
-                    key_stat.save()
+        """更新按键错误统计（内存聚合后一条语句批量upsert）"""
+        key_error_counts = self._count_key_errors(mistakes)
+        self.upsert_key_error_stats(user_id, key_error_counts)
     
-    def update_key_error_stats_from_records(self, user_id: int) -> None:
-        """从练习记录更新按键错误统计"""
-        from .models import TypingPracticeRecord
+    def update_key_error_stats_from_records(self, user_id: int, chunk_size: int = 2000) -> int:
+        """
+        从练习记录流式重建某个用户的按键错误统计，返回写入的按键数
         
-        # 获取所有有错误的练习记录
-        records_with_mistakes = TypingPracticeRecord.objects.filter(
+        只取mistakes字段按 chunk_size 分批读取，用Counter累加后一条upsert覆盖写入，
+        并删除原始记录中已经不存在的按键；内存占用只与按键数有关，与记录数无关。
+        """
+        mistakes_list = TypingPracticeRecord.objects.filter(
             user_id=user_id,
             wrong_count__gt=0
-        )
+        ).values_list('mistakes', flat=True).iterator(chunk_size=chunk_size)
+        
+        key_error_counts: Counter = Counter()
+        for mistakes in mistakes_list:
+            if mistakes:
+                key_error_counts.update(self._count_key_errors(mistakes))
         
-        # 统计每个按键的错误次数
-        key_error_counts = {}
-        
-        for record in records_with_mistakes:
-            if record.mistakes:
-                # 处理mistakes字段中的错误
-                for key, errors in record.mistakes.items():
-                    if isinstance(errors, list):
-                        error_count = len(errors)
-                    else:
-                        error_count = 1
-                    
-                    key_upper = key.upper()
-                    if key_upper in key_error_counts:
-                        key_error_counts[key_upper] += error_count
-                    else:
-                        key_error_counts[key_upper] = error_count
-        
-        # 更新数据库中的按键错误统计
-        for key, count in key_error_counts.items():
-            key_stat, created = KeyErrorStats.objects.get_or_create(
-                user_id=user_id,
-                key=key,
-                defaults={'error_count': count}
+        with transaction.atomic():
+            KeyErrorStats.objects.filter(user_id=user_id).exclude(key__in=list(key_error_counts)).delete()
+            self.upsert_key_error_stats(user_id, dict(key_error_counts), replace=True)
+        return len(key_error_counts)
+    
+    def rebuild_key_error_stats(self, user_ids: List[int], chunk_size: int = 2000) -> int:
+        """逐个用户流式重建按键错误统计（用于数据修复），返回处理的用户数"""
+        for user_id in user_ids:
+            self.update_key_error_stats_from_records(user_id, chunk_size=chunk_size)
+        bump_user_data_version(*user_ids)
+        return len(user_ids)
+    
+    @staticmethod
+    def _count_key_errors(mistakes: Dict[str, Any]) -> Dict[str, int]:
+        """把mistakes字段聚合为 {按键大写: 错误次数}，列表按长度计数，其他非空值计1次"""
+        key_error_counts: Dict[str, int] = {}
+        for key, errors in mistakes.items():
+            if not errors:
+                continue
+            count = len(errors) if isinstance(errors, list) else 1
+            key_upper = key.upper()
+            key_error_counts[key_upper] = key_error_counts.get(key_upper, 0) + count
+        return key_error_counts
+    
+    def upsert_key_error_stats(self, user_id: int, key_error_counts: Dict[str, int], replace: bool = False) -> None:
+        """
+        批量upsert按键错误统计，整批只执行一条SQL
+        
+        依赖 (user, key) 唯一约束：MySQL 使用 ON DUPLICATE KEY UPDATE，
+        SQLite/PostgreSQL 使用 ON CONFLICT DO UPDATE。错误次数在数据库端累加，
+        并发提交不会丢失增量。replace=True 时用新值覆盖（用于从原始记录重建）。
+        """
+        if not key_error_counts:
+            return
+        
+        ops = connection.ops
+        table = ops.quote_name(KeyErrorStats._meta.db_table)
+        user_col = ops.quote_name('user_id')
+        key_col = ops.quote_name('key')
+        count_col = ops.quote_name('error_count')
+        date_col = ops.quote_name('last_error_date')
+        created_col = ops.quote_name('created_at')
+        
+        today = ops.adapt_datefield_value(timezone.now().date())
+        now = ops.adapt_datetimefield_value(timezone.now())
+        # 按键排序，保证并发事务以相同顺序加锁
+        keys = sorted(key_error_counts)
+        params: List[Any] = []
+        for key in keys:
+            params.extend([user_id, key, key_error_counts[key], today, now])
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(keys))
+        
+        if connection.vendor == 'mysql':
+            new_count = f'VALUES({count_col})'
+            count_expr = new_count if replace else f'{count_col} + {new_count}'
+            conflict = f'ON DUPLICATE KEY UPDATE {count_col} = {count_expr}, {date_col} = VALUES({date_col})'
+        else:
+            new_count = f'excluded.{count_col}'
+            count_expr = new_count if replace else f'{table}.{count_col} + {new_count}'
+            conflict = (
+                f'ON CONFLICT ({user_col}, {key_col}) DO UPDATE SET '
+                f'{count_col} = {count_expr}, {date_col} = excluded.{date_col}'
             )
+        
+        sql = (
+            f'INSERT INTO {table} ({user_col}, {key_col}, {count_col}, {date_col}, {created_col}) '
+            f'VALUES {values} {conflict}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+    
+    @staticmethod
+    def count_bigram_latencies(records: List[TypingPracticeRecord]) -> Dict[str, Tuple[int, float, float]]:
+        """
+        把一批记录的逐字符用时汇总为 {字母组合: (样本数, 平均间隔, 离差平方和M2)}
+        
+        timing 为差分编码，第i个元素就是从第i-1个字符到第i个字符的按键间隔；长度与单词不一致的记录跳过。
+        均值和M2用Welford在线算法逐个累加，只遍历一次且数值稳定。
+        """
+        stats: Dict[str, Tuple[int, float, float]] = {}
+        for record in records:
+            word = record.word.lower()
+            timing = record.timing
+            if not timing or len(timing) != len(word):
+                continue
+            for i in range(1, len(word)):
+                bigram = word[i - 1:i + 1]
+                count, mean, m2 = stats.get(bigram, (0, 0.0, 0.0))
+                count += 1
+                delta = timing[i] - mean
+                mean += delta / count
+                m2 += delta * (timing[i] - mean)
+                stats[bigram] = (count, mean, m2)
+        return stats
+    
+    def upsert_key_latency_stats(self, user_id: int, bigram_stats: Dict[str, Tuple[int, float, float]]) -> None:
+        """
+        把本批的 (样本数, 均值, M2) 合并进按键间隔统计，整批只执行一条SQL
+        
+        使用并行方差合并公式（Chan et al.）在数据库端合并：
+        n = na + nb，delta = mean_b - mean_a，mean = mean_a + delta * nb / n，
+        M2 = M2a + M2b + delta² * na * nb / n，并发提交不会丢失样本。
+        """
+        if not bigram_stats:
+            return
+        
+        ops = connection.ops
+        table = ops.quote_name(KeyLatencyStats._meta.db_table)
+        user_col = ops.quote_name('user_id')
+        bigram_col = ops.quote_name('bigram')
+        n_col = ops.quote_name('sample_count')
+        mean_col = ops.quote_name('mean_ms')
+        m2_col = ops.quote_name('m2')
+        updated_col = ops.quote_name('updated_at')
+        
+        now = ops.adapt_datetimefield_value(timezone.now())
+        # 按字母组合排序，保证并发事务以相同顺序加锁
+        bigrams = sorted(bigram_stats)
+        params: List[Any] = []
+        for bigram in bigrams:
+            params.extend([user_id, bigram, *bigram_stats[bigram], now])
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(bigrams))
+        
+        if connection.vendor == 'mysql':
+            def new(col):
+                return f'VALUES({col})'
             
-            if not created:
-                key_stat.error_count = count  # 使用最新统计
-                key_stat.save()
+            def old(col):
+                return col
+        else:
+            def new(col):
+                return f'excluded.{col}'
+            
+            def old(col):
+                return f'{table}.{col}'
+        
+        delta = f'({new(mean_col)} - {old(mean_col)})'
+        total = f'({old(n_col)} + {new(n_col)})'
+        # 注意：MySQL 的 UPDATE 从左到右求值，M2 和均值必须排在样本数之前，且 M2 在均值之前，保证基于旧值计算
+        assignments = [
+            f'{m2_col} = {old(m2_col)} + {new(m2_col)} + {delta} * {delta} * {old(n_col)} * {new(n_col)} / {total}',
+            f'{mean_col} = {old(mean_col)} + {delta} * {new(n_col)} / {total}',
+            f'{n_col} = {total}',
+            f'{updated_col} = {new(updated_col)}',
+        ]
+        
+        if connection.vendor == 'mysql':
+            conflict = 'ON DUPLICATE KEY UPDATE ' + ', '.join(assignments)
+        else:
+            conflict = f'ON CONFLICT ({user_col}, {bigram_col}) DO UPDATE SET ' + ', '.join(assignments)
+        
+        sql = (
+            f'INSERT INTO {table} ({user_col}, {bigram_col}, {n_col}, {mean_col}, {m2_col}, {updated_col}) '
+            f'VALUES {values} {conflict}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+    
+    def get_key_latency_stats(self, user_id: int, limit: int = 10, min_samples: int = 5) -> List[Dict[str, Any]]:
+        """获取平均按键间隔最长的字母组合，样本数不足 min_samples 的不参与排名"""
+        stats = KeyLatencyStats.objects.filter(
+            user_id=user_id,
+            sample_count__gte=min_samples
+        ).order_by('-mean_ms')[:limit]
+        
+        return [
+            {
+                'bigram': stat.bigram,
+                'count': stat.sample_count,
+                'mean_ms': round(stat.mean_ms, 2),
+                'std_ms': round(stat.std_ms, 2)
+            }
+            for stat in stats
+        ]
+
+
+class TypingPracticeService:
+    """打字练习提交服务 - 单条提交与整章批量提交共用的写入逻辑"""
+
+    # 单次批量提交允许的最大条数
+    MAX_BATCH_SIZE = 200
+    # 进行中会话指针的缓存时间（秒）
+    OPEN_SESSION_CACHE_TIMEOUT = 60 * 60
+    # 逐字符用时数组的最大长度（与单词字段长度一致）和单次按键间隔上限（毫秒）
+    MAX_TIMING_LENGTH = 100
+    MAX_KEY_INTERVAL_MS = 60 * 1000
+
+    def __init__(self):
+        pass
+
+    def validate_submission(self, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """校验单条提交数据，返回 (清洗后的数据, 错误信息)"""
+        if not isinstance(data, dict):
+            return None, '提交数据格式错误'
+
+        word_id = data.get('word_id')
+        is_correct = data.get('is_correct')
+        typing_speed = data.get('typing_speed', 0)
+        response_time = data.get('response_time', 0)
+
+        if word_id is None:
+            return None, '缺少word_id参数'
+
+        if is_correct is None:
+            return None, '缺少is_correct参数'
+
+        # 验证is_correct必须是布尔值或可转换的字符串
+        if isinstance(is_correct, str):
+            if is_correct.lower() in ['true', '1', 'yes']:
+                is_correct = True
+            elif is_correct.lower() in ['false', '0', 'no']:
+                is_correct = False
+            else:
+                return None, 'is_correct必须是布尔值或有效的字符串'
+        elif not isinstance(is_correct, bool):
+            return None, 'is_correct必须是布尔值'
+
+        # 验证typing_speed必须是数字
+        try:
+            typing_speed = float(typing_speed)
+        except (ValueError, TypeError):
+            return None, 'typing_speed必须是数字'
+        if typing_speed < 0:
+            return None, 'typing_speed不能为负数'
+
+        # 验证response_time必须是数字
+        try:
+            response_time = float(response_time)
+        except (ValueError, TypeError):
+            return None, 'response_time必须是数字'
+        if response_time < 0:
+            return None, 'response_time不能为负数'
+
+        # 逐字符用时（差分编码）：第i个元素为输入第i个字符距上一次按键的毫秒数
+        timing = data.get('timing') or []
+        if not isinstance(timing, list) or len(timing) > self.MAX_TIMING_LENGTH:
+            return None, f'timing必须是长度不超过{self.MAX_TIMING_LENGTH}的整数数组'
+        if not all(
+            isinstance(interval, int) and not isinstance(interval, bool)
+            and 0 <= interval <= self.MAX_KEY_INTERVAL_MS
+            for interval in timing
+        ):
+            return None, f'timing中的按键间隔必须是0到{self.MAX_KEY_INTERVAL_MS}之间的整数毫秒'
+
+        return {
+            'word_id': word_id,
+            'is_correct': is_correct,
+            'typing_speed': typing_speed,
+            'response_time': response_time,
+            'mistakes': data.get('mistakes', {}) or {},
+            'wrong_count': data.get('wrong_count', 0) or 0,
+            'timing': timing,
+        }, None
+
+    def record_results(self, user, items: List[Dict[str, Any]], words: Optional[Dict[Any, TypingWord]] = None,
+                       chapter: int = 1) -> Dict[str, Any]:
+        """
+        在一个事务内写入一批已校验的练习结果
+
+        - 单词通过一次 in_bulk 查询获取
+        - TypingSession / TypingPracticeRecord 使用 bulk_create 批量插入
+        - 用户统计与按键错误统计每批只更新一次
+        - 结果带 recorded_at（写后缓冲的入队时间）时用它作为记录时间和练习日期，否则用当前时间
+        返回 {'practice_session': 会话, 'results': 每条的处理结果, 'sessions': 写入的TypingSession}，
+        只有单条写入时 sessions 中的对象保证带主键
+        """
+        if words is None:
+            word_ids = {item['word_id'] for item in items}
+            words = TypingWord.objects.select_related('dictionary').in_bulk(list(word_ids))
+
+        results = []
+        accepted = []
+        for index, item in enumerate(items):
+            word = words.get(item['word_id'])
+            if word is None:
+                results.append({
+                    'index': index,
+                    'word_id': item['word_id'],
+                    'status': 'error',
+                    'error': '单词不存在'
+                })
+                continue
+            accepted.append((index, item, word))
+
+        if not accepted:
+            return {'practice_session': None, 'results': results, 'sessions': []}
+
+        with transaction.atomic():
+            # 先锁住用户的统计行，同一用户重叠的提交（例如直接提交与写后缓冲落库）在这里串行，
+            # 否则两边读到的“第一次练习的单词”相同，章节完成度会被重复累加
+            self._lock_user_stats(user)
+            first_word = accepted[0][2]
+            # 获取当前练习会话并原子累加会话计数器
+            practice_session = self._attach_to_open_session(
+                user,
+                [item for _, item, _ in accepted],
+                dictionary=first_word.dictionary.name if first_word.dictionary else '',
+                chapter=chapter
+            )
+
+            typing_sessions = []
+            practice_records = []
+            merged_mistakes: Dict[str, List[Any]] = {}
+            now = timezone.now()
+            for _, item, word in accepted:
+                recorded_at = item.get('recorded_at') or now
+                typing_sessions.append(TypingSession(
+                    user=user,
+                    word=word,
+                    is_correct=item['is_correct'],
+                    typing_speed=item['typing_speed'],
+                    response_time=item['response_time'],
+                    session_date=recorded_at.date(),
+                    created_at=recorded_at
+                ))
+                practice_records.append(TypingPracticeRecord(
+                    user=user,
+                    session=practice_session,
+                    word=word.word,
+                    is_correct=item['is_correct'],
+                    typing_speed=item['typing_speed'],
+                    response_time=item['response_time'],
+                    total_time=item['response_time'] * 1000,  # 转换为毫秒
+                    wrong_count=item['wrong_count'],
+                    mistakes=item['mistakes'],
+                    timing=item.get('timing') or [],
+                    session_date=recorded_at.date(),
+                    created_at=recorded_at
+                ))
+                for key, errors in (item['mistakes'] or {}).items():
+                    merged_mistakes.setdefault(key, []).extend(errors if isinstance(errors, list) else [errors])
+
+            # 这批记录之前该用户最后一条记录的时间，用于增量切分练习轮次
+            previous_at = TypingPracticeRecord.objects.filter(user=user).order_by(
+                '-created_at'
+            ).values_list('created_at', flat=True).first()
+
+            # 本批中该用户第一次练习的单词，用于增量维护章节完成度
+            seen_word_ids = set(TypingSession.objects.filter(
+                user=user,
+                word_id__in={word.id for _, _, word in accepted}
+            ).values_list('word_id', flat=True).distinct())
+
+            self._insert(TypingSession, typing_sessions)
+            self._insert(TypingPracticeRecord, practice_records)
+
+            self.update_user_stats(user, typing_sessions)
+            daily_totals = DataAnalysisService.count_daily_totals(practice_records)
+            for day, starts in DataAnalysisService.count_session_starts(
+                practice_records, DataAnalysisService.exercise_gap(), previous_at
+            ).items():
+                daily_totals[day]['session_count'] += starts
+            DataAnalysisService().merge_stored_sketches(user.id, daily_totals)
+            DataAnalysisService().upsert_daily_stats(user.id, daily_totals)
+            self.update_chapter_completion(user, [word for _, _, word in accepted], seen_word_ids)
+
+            if merged_mistakes:
+                DataAnalysisService().update_key_error_stats(user.id, merged_mistakes)
+            DataAnalysisService().upsert_key_latency_stats(
+                user.id, DataAnalysisService.count_bigram_latencies(practice_records)
+            )
+
+        # 事务提交后再修补月历缓存，并使该用户的缓存响应失效
+        for day, totals in daily_totals.items():
+            DataAnalysisService().patch_calendar_day(
+                user.id, day, exercise_delta=totals['session_count'], word_delta=totals['word_count']
+            )
+        bump_user_data_version(user.id)
+
+        # 批量插入在MySQL上拿不到自增主键，逐条结果不返回记录ID；单条提交的记录由 sessions 带回
+        for index, item, word in accepted:
+            results.append({
+                'index': index,
+                'word_id': word.id,
+                'status': 'success'
+            })
+        results.sort(key=lambda r: r['index'])
+
+        return {'practice_session': practice_session, 'results': results, 'sessions': typing_sessions}
+
+    def get_open_session(self, user, dictionary: str = '', chapter: int = 1) -> TypingPracticeSession:
+        """
+        获取用户当前进行中的练习会话，不存在则创建
+
+        会话对象缓存在 typing_open_session_{user_id} 下，连续提交无需查询数据库；
+        complete_session 和空闲会话自动关闭时清除该缓存。数据库层的唯一约束保证
+        每个用户最多一个进行中的会话，并发创建冲突时回退为读取已有会话。
+        """
+        cache_key = TypingPracticeSession.open_session_cache_key(user.id)
+        practice_session = cache.get(cache_key)
+        if practice_session is not None:
+            return practice_session
+
+        practice_session = TypingPracticeSession.objects.filter(
+            user=user,
+            is_completed=False
+        ).order_by('-start_time').first()
+        if practice_session is None:
+            try:
+                with transaction.atomic():
+                    practice_session = TypingPracticeSession.objects.create(
+                        user=user,
+                        dictionary=dictionary,
+                        chapter=chapter,
+                        start_time=timezone.now()
+                    )
+            except IntegrityError:
+                # 并发请求已创建进行中的会话
+                practice_session = TypingPracticeSession.objects.get(user=user, is_completed=False)
+
+        cache.set(cache_key, practice_session, self.OPEN_SESSION_CACHE_TIMEOUT)
+        return practice_session
+
+    def _attach_to_open_session(self, user, items: List[Dict[str, Any]], dictionary: str = '',
+                                chapter: int = 1) -> TypingPracticeSession:
+        """
+        把一批练习结果计入用户的进行中会话，返回该会话
+
+        total_words / correct_words / total_time 用F()表达式原子累加，并刷新 last_activity_at。
+        UPDATE 带 is_completed=False 条件：缓存指针指向的会话已被结算时更新0行，
+        此时丢弃缓存指针，改为计入新的进行中会话。
+        """
+        increments = {
+            'total_words': F('total_words') + len(items),
+            'correct_words': F('correct_words') + sum(1 for item in items if item['is_correct']),
+            'total_time': F('total_time') + sum(item['response_time'] for item in items),
+            'last_activity_at': timezone.now(),
+        }
+        practice_session = self.get_open_session(user, dictionary=dictionary, chapter=chapter)
+        updated = TypingPracticeSession.objects.filter(
+            pk=practice_session.pk, is_completed=False
+        ).update(**increments)
+        if not updated:
+            cache.delete(TypingPracticeSession.open_session_cache_key(user.id))
+            practice_session = self.get_open_session(user, dictionary=dictionary, chapter=chapter)
+            TypingPracticeSession.objects.filter(pk=practice_session.pk).update(**increments)
+        return practice_session
+
+    def start_session(self, user, dictionary: str, chapter: int = 1) -> TypingPracticeSession:
+        """
+        开始新的练习会话：先结算用户仍在进行中的会话，再创建新会话并写入缓存指针
+
+        同一用户并发开始会话时，后创建的一方违反每用户一个进行中会话的唯一约束，改为返回先创建的会话。
+        """
+        self.close_open_sessions(TypingPracticeSession.objects.filter(user=user))
+        try:
+            with transaction.atomic():
+                practice_session = TypingPracticeSession.objects.create(
+                    user=user,
+                    dictionary=dictionary,
+                    chapter=chapter,
+                    start_time=timezone.now()
+                )
+        except IntegrityError:
+            # 并发请求已创建进行中的会话
+            practice_session = TypingPracticeSession.objects.get(user=user, is_completed=False)
+        cache.set(
+            TypingPracticeSession.open_session_cache_key(user.id),
+            practice_session,
+            self.OPEN_SESSION_CACHE_TIMEOUT
+        )
+        return practice_session
+
+    def close_idle_sessions(self, idle_minutes: Optional[int] = None) -> int:
+        """批量关闭空闲超过 idle_minutes 分钟（默认 TYPING_SESSION_IDLE_MINUTES）的进行中会话"""
+        if idle_minutes is None:
+            idle_minutes = getattr(settings, 'TYPING_SESSION_IDLE_MINUTES', 30)
+        cutoff = timezone.now() - timedelta(minutes=idle_minutes)
+        return self.close_open_sessions(TypingPracticeSession.objects.all(), idle_before=cutoff)
+
+    def close_open_sessions(self, sessions, idle_before: Optional[datetime] = None) -> int:
+        """
+        批量结算 sessions 中进行中的会话，返回关闭的会话数
+
+        最终统计直接由会话行上的计数器算出，整批只有一条UPDATE，不扫描练习记录；
+        结束时间取最后活动时间。指定 idle_before 时只关闭最后活动早于该时间的会话，
+        条件写在UPDATE里，与并发提交的计数器更新互斥。
+        """
+        open_sessions = sessions.filter(is_completed=False)
+        if idle_before is not None:
+            open_sessions = open_sessions.filter(
+                Q(last_activity_at__lt=idle_before) |
+                Q(last_activity_at__isnull=True, start_time__lt=idle_before)
+            )
+
+        user_ids = list(open_sessions.values_list('user_id', flat=True))
+        if not user_ids:
+            return 0
+
+        closed = open_sessions.update(
+            **TypingPracticeSession.final_stats_updates(Coalesce('last_activity_at', 'start_time'))
+        )
+        cache.delete_many([TypingPracticeSession.open_session_cache_key(user_id) for user_id in user_ids])
+        return closed
+
+    def _lock_user_stats(self, user) -> None:
+        """在当前事务中对用户的统计行加行锁（SELECT ... FOR UPDATE），统计行不存在时先创建"""
+        if UserTypingStats.objects.select_for_update().filter(user=user).values_list('id', flat=True).first():
+            return
+        try:
+            with transaction.atomic():
+                # 新插入的行在事务结束前同样处于锁定状态
+                UserTypingStats.objects.create(user=user)
+        except IntegrityError:
+            # 并发提交已创建统计行，改为锁住该行
+            list(UserTypingStats.objects.select_for_update().filter(user=user).values_list('id', flat=True))
+
+    def update_user_stats(self, user, typing_sessions: List[TypingSession]) -> None:
+        """
+        增量更新用户打字统计
+
+        只把本批记录的计数、WPM累计值和响应时间累计值用F()表达式加到统计行上，
+        不再对用户的全部历史做 count/Avg/Sum，耗时与练习历史长度无关。
+        """
+        if not typing_sessions:
+            return
+
+        count = len(typing_sessions)
+        correct = sum(1 for s in typing_sessions if s.is_correct)
+        speed_sum = sum(s.typing_speed for s in typing_sessions)
+        time_sum = sum(s.response_time for s in typing_sessions)
+
+        # 注意：MySQL 的单表 UPDATE 从左到右求值，后面的赋值会看到前面已更新的列，
+        # 所以 average_wpm 必须排在累计列之前，保证各数据库都基于旧值计算
+        increments = {
+            'average_wpm': (F('total_typing_speed') + speed_sum) / (F('total_words_practiced') + count),
+            'total_practice_time': F('total_response_time') + time_sum,
+            'total_words_practiced': F('total_words_practiced') + count,
+            'total_correct_words': F('total_correct_words') + correct,
+            'total_typing_speed': F('total_typing_speed') + speed_sum,
+            'total_response_time': F('total_response_time') + time_sum,
+            'last_practice_date': timezone.now().date(),
+            'updated_at': timezone.now(),
+        }
+
+        updated = UserTypingStats.objects.filter(user=user).update(**increments)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    UserTypingStats.objects.create(
+                        user=user,
+                        total_words_practiced=count,
+                        total_correct_words=correct,
+                        average_wpm=speed_sum / count,
+                        total_practice_time=time_sum,
+                        total_typing_speed=speed_sum,
+                        total_response_time=time_sum,
+                        last_practice_date=timezone.now().date()
+                    )
+            except IntegrityError:
+                # 并发提交已创建统计行，退回增量更新
+                UserTypingStats.objects.filter(user=user).update(**increments)
+
+        # 事务提交后再清除缓存：提交前删除的话，并发请求可能把尚未提交的旧统计重新写回缓存
+        stats_key = f'typing_stats_{user.id}'
+        transaction.on_commit(lambda: cache.delete(stats_key))
+
+    def update_chapter_completion(self, user, words: List[TypingWord], seen_word_ids: set) -> None:
+        """
+        按 (词库, 章节) 累加用户第一次练习的单词数，整批只执行一条upsert
+
+        本批涉及的章节都会写入（新单词数可能为0），查询次数与批量大小、新旧单词比例无关。
+        与按键错误统计相同，依赖唯一约束在数据库端累加，并发提交不会丢失增量。
+        """
+        new_counts: Dict[Tuple[int, int], int] = {}
+        for word in {word.id: word for word in words}.values():
+            if word.dictionary_id is None:
+                continue
+            key = (word.dictionary_id, word.chapter)
+            new_counts[key] = new_counts.get(key, 0) + (word.id not in seen_word_ids)
+        if not new_counts:
+            return
+
+        ops = connection.ops
+        table = ops.quote_name(ChapterCompletion._meta.db_table)
+        user_col = ops.quote_name('user_id')
+        dictionary_col = ops.quote_name('dictionary_id')
+        chapter_col = ops.quote_name('chapter')
+        count_col = ops.quote_name('practiced_words')
+        updated_col = ops.quote_name('updated_at')
+
+        now = ops.adapt_datetimefield_value(timezone.now())
+        # 按章节排序，保证并发事务以相同顺序加锁
+        keys = sorted(new_counts)
+        params: List[Any] = []
+        for dictionary_id, chapter in keys:
+            params.extend([user.id, dictionary_id, chapter, new_counts[(dictionary_id, chapter)], now])
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(keys))
+
+        if connection.vendor == 'mysql':
+            conflict = (
+                f'ON DUPLICATE KEY UPDATE {count_col} = {count_col} + VALUES({count_col}), '
+                f'{updated_col} = VALUES({updated_col})'
+            )
+        else:
+            conflict = (
+                f'ON CONFLICT ({user_col}, {dictionary_col}, {chapter_col}) DO UPDATE SET '
+                f'{count_col} = {table}.{count_col} + excluded.{count_col}, {updated_col} = excluded.{updated_col}'
+            )
+
+        sql = (
+            f'INSERT INTO {table} ({user_col}, {dictionary_col}, {chapter_col}, {count_col}, {updated_col}) '
+            f'VALUES {values} {conflict}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def rebuild_chapter_completion(self, user_ids: Optional[List[int]] = None) -> int:
+        """
+        从TypingSession原始记录重建章节完成度（用于修复），返回写入的章节数
+
+        一条分组查询：练习记录关联单词，按 (用户, 词库, 章节) 统计不同单词数。
+        """
+        sessions = TypingSession.objects.filter(word__dictionary__isnull=False)
+        completions = ChapterCompletion.objects.all()
+        if user_ids:
+            sessions = sessions.filter(user_id__in=user_ids)
+            completions = completions.filter(user_id__in=user_ids)
+
+        aggregated = sessions.values('user_id', 'word__dictionary_id', 'word__chapter').annotate(
+            practiced=Count('word_id', distinct=True)
+        ).order_by()
+
+        rows = [
+            ChapterCompletion(
+                user_id=row['user_id'],
+                dictionary_id=row['word__dictionary_id'],
+                chapter=row['word__chapter'],
+                practiced_words=row['practiced']
+            )
+            for row in aggregated.iterator()
+        ]
+        with transaction.atomic():
+            completions.delete()
+            ChapterCompletion.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    def rebuild_user_stats(self, user_ids: Optional[List[int]] = None) -> int:
+        """从TypingSession原始记录重建用户统计累计值（用于修复），返回处理的用户数"""
+        sessions = TypingSession.objects.all()
+        if user_ids:
+            sessions = sessions.filter(user_id__in=user_ids)
+
+        aggregated = sessions.values('user_id').annotate(
+            words=Count('id'),
+            correct=Count('id', filter=Q(is_correct=True)),
+            speed_sum=Sum('typing_speed'),
+            time_sum=Sum('response_time'),
+            last_date=Max('session_date')
+        ).order_by('user_id')
+
+        rebuilt = 0
+        for row in aggregated.iterator():
+            speed_sum = row['speed_sum'] or 0.0
+            time_sum = row['time_sum'] or 0.0
+            UserTypingStats.objects.update_or_create(
+                user_id=row['user_id'],
+                defaults={
+                    'total_words_practiced': row['words'],
+                    'total_correct_words': row['correct'],
+                    'total_typing_speed': speed_sum,
+                    'total_response_time': time_sum,
+                    'average_wpm': speed_sum / row['words'] if row['words'] else 0.0,
+                    'total_practice_time': time_sum,
+                    'last_practice_date': row['last_date'],
+                }
+            )
+            cache.delete(f'typing_stats_{row["user_id"]}')
+            bump_user_data_version(row['user_id'])
+            rebuilt += 1
+
+        return rebuilt
+
+    def _insert(self, model, objs: List[Any]) -> List[Any]:
+        """批量插入；单条时走普通INSERT，保证在MySQL上也能拿到主键"""
+        if len(objs) == 1:
+            objs[0].save(force_insert=True)
+            return objs
+        return model.objects.bulk_create(objs)
+
 
 class PracticeSessionService:
     """练习会话服务类 - 支持暂停/恢复功能"""
@@ -604,3 +1591,316 @@ class PronunciationService:
         """获取缓存的发音信息"""
         # 这里可以实现缓存获取逻辑
         return None
+
+
+class PracticeService:
+    """练习服务类：单词练习题的生成与答题记录"""
+
+    # 释义选择题的干扰项个数
+    MEANING_DISTRACTORS = 3
+
+    @staticmethod
+    def normalize_answer(answer: str) -> str:
+        return ' '.join((answer or '').split()).lower()
+
+    @classmethod
+    def generate_word_spelling_question(cls, word: Word) -> Dict[str, Any]:
+        """单词拼写题：给出释义和音标，要求拼写单词"""
+        hint = f" [{word.phonetic}]" if word.phonetic else ''
+        return {
+            'type': 'word_spelling',
+            'word_id': word.id,
+            'question': f"请拼写单词：{word.definition or word.word}{hint}",
+            'options': [],
+            'correct_answer': word.word,
+            'explanation': word.example or '',
+        }
+
+    @classmethod
+    def generate_word_meaning_question(cls, word: Word, rng=None) -> Dict[str, Any]:
+        """单词释义选择题：干扰项取自同难度的预抽释义池，选项顺序由 rng 决定"""
+        options = word_sampling.choose_distractors(word, cls.MEANING_DISTRACTORS, rng)
+        correct = word.definition or ''
+        options.append(correct)
+        (rng or random).shuffle(options)
+        return {
+            'type': 'word_meaning',
+            'word_id': word.id,
+            'question': f"“{word.word}”的意思是？",
+            'options': options,
+            'correct_answer': correct,
+            'explanation': word.example or '',
+        }
+
+    @classmethod
+    def generate_questions(cls, practice_type: str, count: int, difficulties=(), exclude_ids=(),
+                           seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """随机抽取单词生成一组练习题，传入 seed 时题目和选项顺序都可复现"""
+        rng = random.Random(seed)
+        words = word_sampling.sample_words(count, difficulties, exclude_ids, seed=rng.getrandbits(32))
+        if practice_type == 'word_meaning':
+            return [cls.generate_word_meaning_question(word, rng) for word in words if word.definition]
+        return [cls.generate_word_spelling_question(word) for word in words]
+
+    @classmethod
+    def record_practice(cls, user, practice_type: str, content_id: int, content_type: str, question: str,
+                        user_answer: str, correct_answer: str, time_spent: int) -> PracticeRecord:
+        """记录一次答题（忽略大小写和多余空白判定对错），并重新汇总当天的学习统计"""
+        is_correct = cls.normalize_answer(user_answer) == cls.normalize_answer(correct_answer)
+        record = PracticeRecord.objects.create(
+            user=user,
+            practice_type=practice_type,
+            content_id=content_id,
+            content_type=content_type,
+            question=question,
+            user_answer=user_answer,
+            correct_answer=correct_answer,
+            is_correct=is_correct,
+            score=100 if is_correct else 0,
+            time_spent=time_spent,
+        )
+        LearningStatsService.update_daily_stats(user)
+        return record
+
+
+class LearningStatsService:
+    """学习统计服务类"""
+
+    @classmethod
+    def update_daily_stats(cls, user, day=None) -> LearningStats:
+        """
+        从单词进度和练习记录重新汇总用户某天（默认今天）的学习统计
+
+        两条聚合查询加一次写入，查询数与当天的复习量无关。
+        """
+        day = day or timezone.now().date()
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        words = UserWordProgress.objects.filter(user=user, is_deleted=False).aggregate(
+            learned=Count('id', filter=Q(created_at__gte=start, created_at__lt=end)),
+            reviewed=Count('id', filter=Q(last_review_date__gte=start, last_review_date__lt=end)),
+        )
+        practice = PracticeRecord.objects.filter(user=user, created_at__gte=start, created_at__lt=end).aggregate(
+            total=Count('id'),
+            correct=Count('id', filter=Q(is_correct=True)),
+            seconds=Sum('time_spent'),
+        )
+        accuracy = round(practice['correct'] * 100 / practice['total'], 2) if practice['total'] else 0
+        stats, _ = LearningStats.objects.update_or_create(user=user, date=day, defaults={
+            'words_learned': words['learned'],
+            'words_reviewed': words['reviewed'],
+            'practice_count': practice['total'],
+            'study_time_minutes': (practice['seconds'] or 0) // 60,
+            'accuracy_rate': accuracy,
+        })
+        return stats
+
+
+class LearningPlanService:
+    """学习计划服务类：每日学习批次的批量生成与读取"""
+
+    # 每日批次中新单词至少占的比例，其余名额优先给到期复习
+    MIN_NEW_WORD_SHARE = 0.3
+    # 挑选新单词时每次读取的候选单词数
+    NEW_WORD_CHUNK = 1000
+    DIFFICULTY_ORDER = ['beginner', 'intermediate', 'advanced']
+
+    @classmethod
+    def active_plans(cls, day):
+        return LearningPlan.objects.filter(
+            is_deleted=False, is_active=True, start_date__lte=day
+        ).filter(Q(end_date__isnull=True) | Q(end_date__gte=day))
+
+    @classmethod
+    def build_daily_batches(cls, day=None, plan_ids: Optional[List[int]] = None, rebuild: bool = False) -> int:
+        """
+        为 day（默认今天）所有激活的计划批量生成每日批次，返回生成的批次数
+
+        全部用户共用几条批量查询：一条窗口函数查询取每个用户最早到期的复习，
+        按难度和词频分块扫描单词表、每块一条查询排除用户已学过的单词，一条查询取表达，最后一条upsert写入。
+        默认跳过当天已有批次的计划，定时任务可以反复执行。
+        """
+        day = day or timezone.now().date()
+        plans = cls.active_plans(day)
+        if plan_ids is not None:
+            plans = plans.filter(id__in=plan_ids)
+        if not rebuild:
+            plans = plans.exclude(daily_batches__date=day)
+        plans = list(plans.only('id', 'user_id', 'start_date', 'daily_word_target', 'daily_expression_target'))
+        if not plans:
+            return 0
+
+        # 同一用户有多个计划时按最大的目标取候选
+        targets: Dict[int, int] = {}
+        for plan in plans:
+            targets[plan.user_id] = max(targets.get(plan.user_id, 0), plan.daily_word_target)
+        due_reviews = cls._due_reviews(targets, day)
+        new_word_needs = {
+            user_id: target - cls._review_slots(target, len(due_reviews.get(user_id, [])))
+            for user_id, target in targets.items()
+        }
+        new_words = cls._new_words(new_word_needs)
+        expression_ids = cls._ordered_expression_ids()
+
+        batches = []
+        for plan in plans:
+            target = plan.daily_word_target
+            due = due_reviews.get(plan.user_id, [])
+            fresh = new_words.get(plan.user_id, [])[:target - cls._review_slots(target, len(due))]
+            # 新单词不够时剩余名额继续给复习
+            reviews = due[:target - len(fresh)]
+            batches.append(LearningPlanDailyBatch(
+                plan_id=plan.id,
+                date=day,
+                word_ids=reviews + fresh,
+                review_count=len(reviews),
+                expression_ids=cls._rotate(expression_ids, (day - plan.start_date).days, plan.daily_expression_target),
+            ))
+
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不指定冲突列
+        unique_fields = ['plan', 'date'] if connection.features.supports_update_conflicts_with_target else None
+        LearningPlanDailyBatch.objects.bulk_create(
+            batches, batch_size=500, update_conflicts=True, unique_fields=unique_fields,
+            update_fields=['word_ids', 'review_count', 'expression_ids', 'created_at'],
+        )
+        return len(batches)
+
+    @classmethod
+    def _review_slots(cls, target: int, due_count: int) -> int:
+        """到期复习可占的名额：给新单词留出至少 MIN_NEW_WORD_SHARE 的比例"""
+        return min(due_count, target - math.ceil(target * cls.MIN_NEW_WORD_SHARE))
+
+    @classmethod
+    def _due_reviews(cls, targets: Dict[int, int], day) -> Dict[int, List[int]]:
+        """{用户ID: 当天结束前到期的单词ID（最早到期在前），最多取该用户的目标数}"""
+        day_end = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        rows = UserWordProgress.objects.filter(
+            user_id__in=list(targets), is_deleted=False, word__is_deleted=False, next_review_date__lt=day_end
+        ).annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('user_id')],
+                order_by=[F('next_review_date').asc(), F('id').asc()]
+            )
+        ).filter(position__lte=max(targets.values())).order_by('user_id', 'position').values_list('user_id', 'word_id')
+
+        reviews: Dict[int, List[int]] = {}
+        for user_id, word_id in rows:
+            words = reviews.setdefault(user_id, [])
+            if len(words) < targets[user_id]:
+                words.append(word_id)
+        return reviews
+
+    @classmethod
+    def _new_words(cls, needs: Dict[int, int]) -> Dict[int, List[int]]:
+        """
+        {用户ID: 该用户还没学过的前 n 个单词ID}，单词按难度、词频排名（未排名的在后）排序
+
+        单词表按段、段内按游标分块读取，每块一条查询取出所有待选用户在这块里已有进度的单词，查询数与用户数无关。
+        """
+        picked = {user_id: [] for user_id, need in needs.items() if need > 0}
+        pending = set(picked)
+        for segment in cls._word_segments():
+            cursor = None
+            while pending:
+                words = Word.objects.filter(segment, is_deleted=False)
+                if cursor is not None:
+                    rank, last_id = cursor
+                    words = words.filter(Q(frequency_rank__gt=rank) | Q(frequency_rank=rank, id__gt=last_id))
+                rows = list(
+                    words.order_by('frequency_rank', 'id').values_list('frequency_rank', 'id')[:cls.NEW_WORD_CHUNK]
+                )
+                if rows:
+                    cls._pick_new_words([word_id for _, word_id in rows], needs, picked, pending)
+                if len(rows) < cls.NEW_WORD_CHUNK:
+                    break
+                cursor = rows[-1]
+            if not pending:
+                break
+        return picked
+
+    @classmethod
+    def _word_segments(cls) -> List[Q]:
+        """
+        按难度（DIFFICULTY_ORDER 之外的难度排最后）和是否有词频排名把单词表分段，依次是各难度的已排名、未排名单词
+
+        段内按 (frequency_rank, id) 用游标分页，每块都是 (difficulty_level, frequency_rank, id) 索引上的一次范围扫描，
+        不用 OFFSET 也不按计算出的排序表达式对全表排序。
+        """
+        levels = [Q(difficulty_level=level) for level in cls.DIFFICULTY_ORDER]
+        levels.append(~Q(difficulty_level__in=cls.DIFFICULTY_ORDER))
+        return [level & ranked for level in levels for ranked in (Q(frequency_rank__gt=0), Q(frequency_rank__lte=0))]
+
+    @staticmethod
+    def _pick_new_words(chunk: List[int], needs: Dict[int, int], picked: Dict[int, List[int]], pending: set) -> None:
+        """一条查询取出待选用户在这块单词里已有的进度，其余单词按顺序补给各用户直到够数"""
+        started = set(
+            UserWordProgress.objects.filter(user_id__in=pending, word_id__in=chunk).values_list('user_id', 'word_id')
+        )
+        for user_id in list(pending):
+            chosen = picked[user_id]
+            for word_id in chunk:
+                if (user_id, word_id) not in started:
+                    chosen.append(word_id)
+                    if len(chosen) == needs[user_id]:
+                        pending.discard(user_id)
+                        break
+
+    @classmethod
+    def _ordered_expression_ids(cls) -> List[int]:
+        return list(
+            Expression.objects.filter(is_deleted=False)
+            .annotate(difficulty_order=cls._difficulty_order())
+            .order_by('difficulty_order', 'id')
+            .values_list('id', flat=True)
+        )
+
+    @staticmethod
+    def _rotate(ids: List[int], day_index: int, count: int) -> List[int]:
+        """按计划进行的天数轮换取 count 个，表达用完后从头开始"""
+        if not ids:
+            return []
+        count = min(count, len(ids))
+        start = (max(day_index, 0) * count) % len(ids)
+        return [ids[(start + i) % len(ids)] for i in range(count)]
+
+    @classmethod
+    def _difficulty_order(cls) -> Case:
+        return Case(
+            *[When(difficulty_level=level, then=index) for index, level in enumerate(cls.DIFFICULTY_ORDER)],
+            default=len(cls.DIFFICULTY_ORDER),
+            output_field=IntegerField(),
+        )
+
+    @classmethod
+    def get_daily_batch(cls, plan: LearningPlan, day=None) -> Optional[LearningPlanDailyBatch]:
+        """读取计划当天的批次（按 (计划, 日期) 唯一索引）；定时任务还没生成时当场生成这一个计划的批次"""
+        day = day or timezone.now().date()
+        batch = LearningPlanDailyBatch.objects.filter(plan=plan, date=day).first()
+        if batch is None and cls.build_daily_batches(day, plan_ids=[plan.id]):
+            batch = LearningPlanDailyBatch.objects.filter(plan=plan, date=day).first()
+        return batch
+
+    @classmethod
+    def get_daily_words(cls, user, plan: LearningPlan, day=None) -> List[Word]:
+        """今日学习单词：到期复习在前，新单词在后"""
+        batch = cls.get_daily_batch(plan, day)
+        if batch is None:
+            return []
+        # 批次生成后被删除的单词不再返回
+        words = Word.objects.filter(is_deleted=False).in_bulk(batch.word_ids)
+        return [words[word_id] for word_id in batch.word_ids if word_id in words]
+
+    @classmethod
+    def get_daily_expressions(cls, user, plan: LearningPlan, day=None) -> List[Expression]:
+        """今日学习表达"""
+        batch = cls.get_daily_batch(plan, day)
+        if batch is None:
+            return []
+        expressions = Expression.objects.in_bulk(batch.expression_ids)
+        return [expressions[expression_id] for expression_id in batch.expression_ids if expression_id in expressions]
+
+    @classmethod
+    def invalidate_daily_batches(cls, plan: LearningPlan) -> None:
+        """计划修改后删除当天及以后的批次，下次读取时按新设置重新生成"""
+        LearningPlanDailyBatch.objects.filter(plan=plan, date__gte=timezone.now().date()).delete()
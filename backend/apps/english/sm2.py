@@ -0,0 +1,132 @@
+"""
+SM-2 间隔重复调度
+- 每次复习按评分 quality（0~5）更新重复次数、复习间隔和容易度因子：
+  quality < 3 时重复次数清零、1天后复习；否则第1次1天、第2次6天、之后为上次间隔 × 容易度因子
+- 容易度因子 EF' = EF + 0.1 - (5 - q) × (0.08 + (5 - q) × 0.02)，不低于1.3
+- 一批复习按列（容易度因子、间隔、重复次数、评分各一个列表）计算新状态，
+  再用一次 in_bulk 读单词、一次查询读进度、bulk_create/bulk_update 写回，查询数与批大小无关
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UserWordProgress, Word
+
+
+class SM2Algorithm:
+    """SM-2 调度引擎"""
+
+    MIN_EASE_FACTOR = 1.3
+    PASSING_QUALITY = 3
+    # 掌握度达到该值视为已掌握
+    MASTERED_LEVEL = 0.8
+    UPDATE_FIELDS = [
+        'ease_factor', 'interval_days', 'repetition_count', 'review_count', 'mastery_level',
+        'status', 'last_review_date', 'next_review_date', 'is_deleted', 'deleted_at', 'updated_at',
+    ]
+
+    @classmethod
+    def schedule(cls, ease_factors: List[float], intervals: List[int], repetitions: List[int],
+                 qualities: List[int]) -> Tuple[List[float], List[int], List[int]]:
+        """按列计算一批卡片复习后的 (容易度因子, 间隔天数, 重复次数)；间隔用复习前的容易度因子"""
+        new_ease, new_intervals, new_repetitions = [], [], []
+        for ease, interval, repetition, quality in zip(ease_factors, intervals, repetitions, qualities):
+            if quality < cls.PASSING_QUALITY:
+                repetition, interval = 0, 1
+            else:
+                if repetition == 0:
+                    interval = 1
+                elif repetition == 1:
+                    interval = 6
+                else:
+                    interval = max(1, round(interval * ease))
+                repetition += 1
+            lapse = 5 - quality
+            new_ease.append(max(cls.MIN_EASE_FACTOR, round(ease + 0.1 - lapse * (0.08 + lapse * 0.02), 2)))
+            new_intervals.append(interval)
+            new_repetitions.append(repetition)
+        return new_ease, new_intervals, new_repetitions
+
+    @classmethod
+    def review_batch(cls, user, reviews: List[Tuple[int, int]],
+                     now: Optional[datetime] = None) -> Dict[int, UserWordProgress]:
+        """
+        批量处理 [(word_id, quality)]，返回 {word_id: 更新后的进度}，不存在的单词不在结果中
+
+        同一单词在批内出现多次时按提交顺序依次生效；已软删除的进度复习后恢复。
+        """
+        now = now or timezone.now()
+        words = Word.objects.filter(is_deleted=False).in_bulk({word_id for word_id, _ in reviews})
+        if not words:
+            return {}
+
+        with transaction.atomic():
+            progress = {
+                item.word_id: item
+                for item in UserWordProgress.objects.select_for_update().filter(user=user, word_id__in=list(words))
+            }
+            created = [
+                UserWordProgress(user=user, word_id=word_id) for word_id in words if word_id not in progress
+            ]
+            existing = list(progress.values())
+            progress.update((item.word_id, item) for item in created)
+
+            # 第k轮是每个单词在批内的第k次复习，同一轮内没有重复单词，可以整列计算
+            rounds = defaultdict(list)
+            occurrences = defaultdict(int)
+            for word_id, quality in reviews:
+                if word_id in words:
+                    rounds[occurrences[word_id]].append((progress[word_id], quality))
+                    occurrences[word_id] += 1
+            for index in sorted(rounds):
+                cls._apply(rounds[index], now)
+
+            if created:
+                UserWordProgress.objects.bulk_create(created)
+            if existing:
+                UserWordProgress.objects.bulk_update(existing, cls.UPDATE_FIELDS)
+
+        for word_id, item in progress.items():
+            item.word = words[word_id]
+        return progress
+
+    @classmethod
+    def update_word_progress(cls, user, word: Word, quality: int) -> UserWordProgress:
+        """处理单个单词的一次复习"""
+        progress = cls.review_batch(user, [(word.id, quality)]).get(word.id)
+        if progress is None:
+            raise Word.DoesNotExist(f'单词 {word.id} 不存在')
+        return progress
+
+    @classmethod
+    def _apply(cls, items: List[Tuple[UserWordProgress, int]], now: datetime) -> None:
+        qualities = [quality for _, quality in items]
+        ease_factors, intervals, repetitions = cls.schedule(
+            [float(item.ease_factor) for item, _ in items],
+            [item.interval_days for item, _ in items],
+            [item.repetition_count for item, _ in items],
+            qualities,
+        )
+        for (item, quality), ease, interval, repetition in zip(items, ease_factors, intervals, repetitions):
+            mastery = float(item.mastery_level or 0)
+            if quality < cls.PASSING_QUALITY:
+                mastery = max(0.0, mastery - 0.1)
+            else:
+                mastery = min(1.0, mastery + (quality - 2) * 0.08)
+
+            item.ease_factor = Decimal(f'{ease:.2f}')
+            item.interval_days = interval
+            item.repetition_count = repetition
+            item.review_count = (item.review_count or 0) + 1
+            item.mastery_level = Decimal(f'{mastery:.2f}')
+            item.status = 'mastered' if mastery >= cls.MASTERED_LEVEL else 'learning'
+            item.last_review_date = now
+            item.next_review_date = now + timedelta(days=interval)
+            item.is_deleted = False
+            item.deleted_at = None
+            # bulk_update 不会触发 auto_now
+            item.updated_at = now
@@ -76,3 +76,87 @@ def crawl_english_news(source: str = 'bbc', crawler_type: str = 'traditional', m
         }
 
 
+
+@shared_task
+def drain_typing_buffer(max_envelopes: int | None = None) -> dict:
+    """
+    打字练习写后缓冲落库任务（由Celery beat定时触发）
+    :param max_envelopes: 单次最多处理的信封数量，默认取 TYPING_WRITE_BEHIND_DRAIN_SIZE
+    :return: 处理结果统计
+    """
+    import logging
+    from .ingestion import drain_write_behind_buffer, write_behind_enabled
+
+    # 未开启写后缓冲时不连接队列
+    if not write_behind_enabled():
+        return {'ok': True, 'skipped': True}
+
+    logger = logging.getLogger(__name__)
+    try:
+        summary = drain_write_behind_buffer(max_envelopes)
+        if summary['envelopes']:
+            logger.info(f"写后缓冲落库完成: {summary}")
+        return {'ok': True, **summary}
+    except Exception as e:
+        logger.error(f"写后缓冲落库失败: {str(e)}")
+        return {'ok': False, 'error': str(e)}
+
+
+@shared_task
+def close_idle_typing_sessions(idle_minutes: int | None = None) -> dict:
+    """
+    自动关闭空闲的打字练习会话并批量计算最终统计（由Celery beat定时触发）
+    :param idle_minutes: 空闲分钟数阈值，默认取 TYPING_SESSION_IDLE_MINUTES
+    :return: 处理结果统计
+    """
+    import logging
+    from .services import TypingPracticeService
+
+    logger = logging.getLogger(__name__)
+    try:
+        closed = TypingPracticeService().close_idle_sessions(idle_minutes)
+        if closed:
+            logger.info(f"自动关闭空闲练习会话 {closed} 个")
+        return {'ok': True, 'closed': closed}
+    except Exception as e:
+        logger.error(f"自动关闭空闲练习会话失败: {str(e)}")
+        return {'ok': False, 'error': str(e)}
+
+
+@shared_task
+def build_daily_learning_batches() -> dict:
+    """
+    为所有激活的学习计划生成今天的学习批次（由Celery beat定时触发）
+    已生成的计划会被跳过，每小时执行一次即可保证零点后尽快生成
+    :return: 处理结果统计
+    """
+    import logging
+    from .services import LearningPlanService
+
+    logger = logging.getLogger(__name__)
+    try:
+        built = LearningPlanService.build_daily_batches()
+        if built:
+            logger.info(f"生成学习计划每日批次 {built} 个")
+        return {'ok': True, 'built': built}
+    except Exception as e:
+        logger.error(f"生成学习计划每日批次失败: {str(e)}")
+        return {'ok': False, 'error': str(e)}
+
+
+@shared_task
+def refresh_word_sample_pools() -> dict:
+    """
+    重建练习出题用的单词id数组和干扰项池（由Celery beat定时触发）
+    :return: 处理结果统计
+    """
+    import logging
+    from . import word_sampling
+
+    logger = logging.getLogger(__name__)
+    try:
+        pools = word_sampling.refresh_pools()
+        return {'ok': True, 'pools': pools}
+    except Exception as e:
+        logger.error(f"重建出题单词池失败: {str(e)}")
+        return {'ok': False, 'error': str(e)}
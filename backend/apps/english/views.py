@@ -1,24 +1,30 @@
+import logging
+
 from django.utils import timezone
 from django.db.models import Q
 from django.conf import settings
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, SAFE_METHODS, AllowAny
 
 from .models import (
     Word, UserWordProgress, Expression, News,
     LearningPlan, PracticeRecord, PronunciationRecord, LearningStats,
     TypingWord, TypingSession, UserTypingStats, Dictionary,
-    TypingPracticeRecord, DailyPracticeStats, KeyErrorStats
+    TypingPracticeRecord, DailyPracticeStats, KeyErrorStats, ChapterCompletion
 )
 from .serializers import (
     WordSerializer,
     UserWordProgressSerializer,
+    WordProgressReviewSerializer,
     ExpressionSerializer,
     NewsSerializer,
     LearningPlanSerializer,
     PracticeRecordSerializer,
+    PracticeSubmissionSerializer,
+    PracticeQuestionSerializer,
+    PracticeQuestionQuerySerializer,
     PronunciationRecordSerializer,
     LearningStatsSerializer,
     TypingWordSerializer,
@@ -34,8 +40,18 @@ from .serializers import (
 )
 from .services import (
     DataAnalysisService,
+    LearningPlanService,
+    LearningStatsService,
+    PracticeService,
+    TypingPracticeService,
 )
-from .pagination import StandardResultsSetPagination
+from .sm2 import SM2Algorithm
+from . import review_queue
+from .ingestion import write_behind_enabled, get_write_behind_buffer, merge_pending_typing_stats
+from .word_packs import MAX_WORD_PACK_LIMIT, get_word_pack, project_words, get_chapter_pack_info
+from .response_cache import user_cache_response, conditional_response
+from . import practice_export, word_search
+from .pagination import StandardResultsSetPagination, DueReviewPagination
 from .permissions import EnglishAccessPermission, EnglishWordManagePermission
 CELERY_AVAILABLE = True
 try:
@@ -50,8 +66,9 @@ except Exception:
 
 from django.core.cache import cache
 from django.db.models import Prefetch, Count, Avg, Sum
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
 
 
 class WordViewSet(viewsets.ModelViewSet):
@@ -70,17 +87,22 @@ class WordViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset()
         difficulty = self.request.query_params.get('difficulty_level')
         category = self.request.query_params.get('category')
-        q = self.request.query_params.get('q')
         if difficulty:
             qs = qs.filter(difficulty_level=difficulty)
         if category:
             qs = qs.filter(category_hint=category)
-        if q:
-            qs = qs.filter(Q(word__icontains=q) | Q(definition__icontains=q))
         return qs
 
     def list(self, request, *args, **kwargs):
-        page = self.paginate_queryset(self.get_queryset())
+        qs = self.get_queryset()
+        q = request.query_params.get('q', '').strip()
+        if q:
+            # 检索后端给出排好序的id（单词前缀匹配在前，释义按相关度在后），只取当前页的单词
+            ids = self.paginate_queryset(word_search.get_search_backend().search(qs, q))
+            words = qs.in_bulk(ids)
+            page = [words[word_id] for word_id in ids if word_id in words]
+        else:
+            page = self.paginate_queryset(qs)
         serializer = self.get_serializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
@@ -93,6 +115,7 @@ class WordViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        word_search.invalidate_index()
         return Response({"success": True, "message": "Created", "data": serializer.data}, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
@@ -100,6 +123,7 @@ class WordViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=False)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        word_search.invalidate_index()
         return Response({"success": True, "message": "OK", "data": serializer.data})
 
     def destroy(self, request, *args, **kwargs):
@@ -107,8 +131,25 @@ class WordViewSet(viewsets.ModelViewSet):
         instance.is_deleted = True
         instance.deleted_at = timezone.now()
         instance.save(update_fields=['is_deleted', 'deleted_at'])
+        word_search.invalidate_index()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """单词前缀自动补全"""
+        prefix = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({
+                "success": False,
+                "message": "limit 必须是整数",
+                "data": []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, 50))
+        words = word_search.get_search_backend().autocomplete(prefix, limit) if prefix else []
+        return Response({"success": True, "message": "OK", "data": words})
+
     @action(detail=True, methods=['post'])
     def enrich_definition(self, request, pk=None):
         """通过外部词典API丰富单词释义"""
@@ -143,6 +184,7 @@ class WordViewSet(viewsets.ModelViewSet):
                 word.quality_score = 0.9 if dict_data.get('source') == 'oxford' else 0.7
                 
                 word.save()
+                word_search.invalidate_index()
                 
                 return Response({
                     'success': True,
@@ -231,6 +273,7 @@ class UserWordProgressViewSet(viewsets.ModelViewSet):
     serializer_class = UserWordProgressSerializer
     permission_classes = [IsAuthenticated, EnglishAccessPermission]
     pagination_class = StandardResultsSetPagination
+    BATCH_REVIEW_MAX_ITEMS = 500
 
     def get_queryset(self):
         return super().get_queryset().filter(user=self.request.user)
@@ -247,6 +290,11 @@ class UserWordProgressViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, last_review_date=timezone.now())
+        review_queue.invalidate_review_queue(self.request.user.id)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        review_queue.invalidate_review_queue(self.request.user.id)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -259,14 +307,32 @@ class UserWordProgressViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance, data=request.data, partial=False)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        review_queue.invalidate_review_queue(request.user.id)
         return Response({"success": True, "message": "OK", "data": serializer.data})
 
     @action(detail=False, methods=['get'])
-    def review(self, request):
+    def due(self, request):
+        """到期的待复习卡片，按下次复习时间键集分页（cursor 为上一页返回的 next_cursor）"""
+        paginator = DueReviewPagination()
         qs = self.get_queryset().filter(next_review_date__lte=timezone.now())
-        page = self.paginate_queryset(qs)
+        page = paginator.paginate_queryset(qs, request, view=self)
         ser = self.get_serializer(page, many=True)
-        return self.get_paginated_response(ser.data)
+        return paginator.get_paginated_response(ser.data)
+
+    @action(detail=False, methods=['get'], url_path='next-due')
+    def next_due(self, request):
+        """接下来 limit 张到期卡片（默认10），优先从缓存的复习队列中取，供复习界面预取"""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({
+                "success": False,
+                "message": "limit 必须是整数",
+                "data": []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, review_queue.QUEUE_SIZE))
+        data = review_queue.get_next_due_cards(request.user.id, limit)
+        return Response({"success": True, "message": "OK", "data": data})
 
     @action(detail=True, methods=['post'])
     def review(self, request, pk=None):
@@ -278,65 +344,47 @@ class UserWordProgressViewSet(viewsets.ModelViewSet):
             quality = 3
         quality = max(0, min(5, quality))
 
-        # 更新 mastery 与间隔（简化 SRS 规则）
-        mastery = instance.mastery_level or 0.0
-        if quality <= 2:
-            mastery = max(0.0, mastery - 0.1)
-        else:
-            mastery = min(1.0, mastery + (quality - 2) * 0.08)
-
-        instance.review_count = (instance.review_count or 0) + 1
-        instance.last_review_date = timezone.now()
-
-        if quality <= 2:
-            interval_days = 1
-        else:
-            schedule = [1, 2, 4, 7, 15, 30]
-            idx = min(instance.review_count - 1, len(schedule) - 1)
-            interval_days = schedule[idx]
-
-        instance.next_review_date = instance.last_review_date + timezone.timedelta(days=interval_days)
-        instance.mastery_level = mastery
-
-        if mastery >= 0.8:
-            instance.status = 'mastered'
-        elif quality <= 2:
-            instance.status = 'learning'
-        else:
-            instance.status = instance.status or 'learning'
-
-        instance.save()
+        try:
+            instance = SM2Algorithm.update_word_progress(request.user, instance.word, quality)
+        except Word.DoesNotExist:
+            return Response({"success": False, "message": "单词不存在"}, status=status.HTTP_404_NOT_FOUND)
+        review_queue.refresh_review_queue(request.user.id)
         data = self.get_serializer(instance).data
         return Response({"success": True, "message": "Reviewed", "data": data})
 
     @action(detail=False, methods=['post'])
     def batch_review(self, request):
-        """批量提交复习结果"""
+        """批量提交复习结果，整批按SM-2调度，查询数与提交的单词数无关"""
         serializer = WordProgressReviewSerializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
-        
+        if len(serializer.validated_data) > self.BATCH_REVIEW_MAX_ITEMS:
+            return Response({
+                'success': False,
+                'message': f'单次最多提交 {self.BATCH_REVIEW_MAX_ITEMS} 条复习结果',
+                'data': []
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reviews = [(item['word_id'], item['quality']) for item in serializer.validated_data]
+        progress = SM2Algorithm.review_batch(request.user, reviews)
+
         results = []
-        for item in serializer.validated_data:
-            try:
-                word = Word.objects.get(id=item['word_id'])
-                progress = SM2Algorithm.update_word_progress(
-                    request.user, 
-                    word, 
-                    item['quality']
-                )
+        for word_id, _ in reviews:
+            if word_id in progress:
                 results.append({
-                    'word_id': word.id,
+                    'word_id': word_id,
                     'success': True,
-                    'next_review_date': progress.next_review_date,
-                    'mastery_level': progress.mastery_level
+                    'next_review_date': progress[word_id].next_review_date,
+                    'mastery_level': progress[word_id].mastery_level
                 })
-            except Word.DoesNotExist:
+            else:
                 results.append({
-                    'word_id': item['word_id'],
+                    'word_id': word_id,
                     'success': False,
                     'error': '单词不存在'
                 })
         
+        # 复习后这些卡片的下次复习时间都变了，重建缓存的复习队列
+        review_queue.refresh_review_queue(request.user.id)
         # 更新每日统计
         LearningStatsService.update_daily_stats(request.user)
         
@@ -763,9 +811,13 @@ class LearningPlanViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def perform_update(self, serializer):
+        plan = serializer.save()
+        LearningPlanService.invalidate_daily_batches(plan)
+
     @action(detail=True, methods=['get'])
     def daily_words(self, request, pk=None):
-        """获取今日学习单词"""
+        """获取今日学习单词（读取预先生成的每日批次，到期复习在前）"""
         plan = self.get_object()
         words = LearningPlanService.get_daily_words(request.user, plan)
         serializer = WordSerializer(words, many=True)
@@ -828,27 +880,34 @@ class PracticeRecordViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def generate_questions(self, request):
-        """生成练习题目"""
-        practice_type = request.query_params.get('type', 'word_spelling')
-        count = int(request.query_params.get('count', 5))
-        
-        questions = []
-        if practice_type == 'word_spelling':
-            words = Word.objects.filter(is_deleted=False).order_by('?')[:count]
-            for word in words:
-                question = PracticeService.generate_word_spelling_question(word)
-                questions.append(question)
-        elif practice_type == 'word_meaning':
-            words = Word.objects.filter(is_deleted=False).order_by('?')[:count]
-            for word in words:
-                question = PracticeService.generate_word_meaning_question(word)
-                questions.append(question)
-        
+        """
+        生成练习题目
+
+        单词从缓存的id数组中随机抽取，可按难度（difficulty，逗号分隔）过滤、排除指定单词（exclude）
+        或已学过的单词（exclude_seen）；返回本次使用的 seed，带上同一 seed 再次请求可得到同一组题目。
+        """
+        import random
+
+        params = PracticeQuestionQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        exclude_ids = set(data.get('exclude', []))
+        if data['exclude_seen']:
+            exclude_ids.update(
+                UserWordProgress.objects.filter(user=request.user, is_deleted=False).values_list('word_id', flat=True)
+            )
+        seed = data.get('seed', random.randrange(2 ** 31))
+        questions = PracticeService.generate_questions(
+            data['type'], data['count'], data.get('difficulty', []), exclude_ids, seed=seed
+        )
+
         serializer = PracticeQuestionSerializer(questions, many=True)
         return Response({
             'success': True,
             'message': 'OK',
-            'data': serializer.data
+            'data': serializer.data,
+            'seed': seed,
         })
 
 
@@ -1025,14 +1084,16 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
     serializer_class = TypingWordSerializer
     permission_classes = [IsAuthenticated]
     
+    # daily-progress 单次请求允许的最大天数
+    DAILY_PROGRESS_MAX_DAYS = 366 * 5
+    
     def get_queryset(self):
         """优化查询集"""
         return TypingWord.objects.select_related().prefetch_related()
     
-    @method_decorator(cache_page(60 * 5))  # 缓存5分钟
     @action(detail=False, methods=['get'])
     def words(self, request):
-        """获取练习单词列表 - 优化版本"""
+        """获取练习单词列表（词包缓存，按词库/章节/难度/数量分键，词库版本号失效）"""
         # 兼容不同的请求类型
         if hasattr(request, 'query_params'):
             # 支持两种参数名：dictionary (ID) 和 category (名称)
@@ -1040,13 +1101,23 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
             category = request.query_params.get('category', 'CET4_T')
             chapter = request.query_params.get('chapter')
             difficulty = request.query_params.get('difficulty')
-            limit = int(request.query_params.get('limit', 50))
+            limit = request.query_params.get('limit', 50)
         else:
             dictionary_id = request.GET.get('dictionary')
             category = request.GET.get('category', 'CET4_T')
             chapter = request.GET.get('chapter')
             difficulty = request.GET.get('difficulty')
-            limit = int(request.GET.get('limit', 50))
+            limit = request.GET.get('limit', 50)
+        
+        try:
+            limit = int(limit)
+        except (ValueError, TypeError):
+            return Response(
+                {'error': f'无效的数量: {limit}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # 数量是词包缓存键的一部分，限制范围避免任意取值各占一份缓存
+        limit = max(1, min(limit, MAX_WORD_PACK_LIMIT))
         
         # 验证difficulty参数
         if difficulty and difficulty not in ['beginner', 'intermediate', 'advanced']:
@@ -1055,206 +1126,195 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 使用缓存键（包含章节信息）
-        cache_key = f'typing_words_{category}_{chapter}_{limit}'
-        cached_words = cache.get(cache_key)
+        dictionary = None
         
-        if cached_words is None:
-            # 优化查询：只选择需要的字段
+        # 优先使用dictionary_id参数（如果提供）
+        if dictionary_id:
             try:
-                dictionary = None
-                
-                # 优先使用dictionary_id参数（如果提供）
-                if dictionary_id:
-                    try:
-                        dictionary_id = int(dictionary_id)
-                        dictionary = Dictionary.objects.get(id=dictionary_id)
-                    except (ValueError, Dictionary.DoesNotExist):
-                        return Response(
-                            {'error': f'词库不存在: {dictionary_id}'},
-                            status=status.HTTP_404_NOT_FOUND
-                        )
-                else:
-                    # 兼容前端传入的 category 参数既可能是词库名称(name)，也可能是分类(category)
-                    dict_by_name = Dictionary.objects.filter(name=category)
-                    if dict_by_name.exists():
-                        dictionary = dict_by_name.first()
-                    else:
-                        dict_by_category = Dictionary.objects.filter(category=category)
-                        if dict_by_category.exists():
-                            dictionary = dict_by_category.first()
-
-                    if not dictionary:
-                        return Response(
-                            {'error': f'词库不存在: {category}'},
-                            status=status.HTTP_404_NOT_FOUND
-                        )
-                words_query = TypingWord.objects.filter(dictionary=dictionary)
-                
-                # 如果指定了章节，按章节过滤
-                if chapter:
-                    words_query = words_query.filter(chapter=chapter)
-                
-                # 如果指定了难度，按难度过滤
-                if difficulty:
-                    words_query = words_query.filter(difficulty=difficulty)
-                
-                words = words_query.values('id', 'word', 'translation', 'phonetic', 'difficulty', 'dictionary__name', 'chapter', 'frequency')[:limit]
-            except Dictionary.DoesNotExist:
+                dictionary_id = int(dictionary_id)
+                dictionary = Dictionary.objects.get(id=dictionary_id)
+            except (ValueError, Dictionary.DoesNotExist):
                 return Response(
-                    {'error': f'词库不存在: {category}'}, 
+                    {'error': f'词库不存在: {dictionary_id}'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            # 兼容前端传入的 category 参数既可能是词库名称(name)，也可能是分类(category)
+            dictionary = (
+                Dictionary.objects.filter(name=category).first()
+                or Dictionary.objects.filter(category=category).first()
+            )
+            if not dictionary:
+                return Response(
+                    {'error': f'词库不存在: {category}'},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # 转换为列表并缓存
-            cached_words = list(words)
-            cache.set(cache_key, cached_words, 300)  # 缓存5分钟
-        
-        return Response(cached_words)
-    
-    @action(detail=False, methods=['post'])
-    def submit(self, request):
-        """提交打字练习结果 - 优化版本"""
-        from django.db import transaction
-        
-        word_id = request.data.get('word_id')
-        is_correct = request.data.get('is_correct')
-        typing_speed = request.data.get('typing_speed', 0)
-        response_time = request.data.get('response_time', 0)
-        
-        # 获取按键错误数据 ⭐ 新增
-        mistakes = request.data.get('mistakes', {})
-        wrong_count = request.data.get('wrong_count', 0)
         
-        # 数据类型验证
-        if word_id is None:
+        try:
+            chapter = int(chapter) if chapter else None
+        except ValueError:
             return Response(
-                {'error': '缺少word_id参数'}, 
+                {'error': f'无效的章节: {chapter}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if is_correct is None:
+        # 词包不区分用户，只附加ETag供客户端重新验证
+        return conditional_response(request, get_word_pack(dictionary.id, chapter, difficulty, limit))
+    
+    @action(detail=False, methods=['post'])
+    def submit(self, request):
+        """提交打字练习结果 - 优化版本"""
+        service = TypingPracticeService()
+        item, error = service.validate_submission(request.data)
+        if error:
             return Response(
-                {'error': '缺少is_correct参数'}, 
+                {'error': error}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 验证is_correct必须是布尔值或可转换的字符串
-        if isinstance(is_correct, str):
-            if is_correct.lower() in ['true', '1', 'yes']:
-                is_correct = True
-            elif is_correct.lower() in ['false', '0', 'no']:
-                is_correct = False
-            else:
+        if write_behind_enabled():
+            # 写后缓冲：只校验单词存在并入队，由 drain_typing_buffer 任务批量落库
+            if not TypingWord.objects.filter(id=item['word_id']).exists():
                 return Response(
-                    {'error': 'is_correct必须是布尔值或有效的字符串'}, 
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': '单词不存在'}, 
+                    status=status.HTTP_404_NOT_FOUND
                 )
-        elif not isinstance(is_correct, bool):
+            receipt_id = get_write_behind_buffer().push(request.user.id, [item])
+            return Response({
+                'status': 'accepted',
+                'message': '练习结果已接收',
+                'receipt_id': receipt_id
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        try:
+            word = TypingWord.objects.select_related('dictionary').get(id=item['word_id'])
+        except TypingWord.DoesNotExist:
             return Response(
-                {'error': 'is_correct必须是布尔值'}, 
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': '单词不存在'}, 
+                status=status.HTTP_404_NOT_FOUND
             )
         
-        # 验证typing_speed必须是数字
+        # 使用事务保护整个提交过程
         try:
-            typing_speed = float(typing_speed)
-            if typing_speed < 0:
-                return Response(
-                    {'error': 'typing_speed不能为负数'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except (ValueError, TypeError):
+            outcome = service.record_results(request.user, [item], words={item['word_id']: word})
+            
+            return Response({
+                'status': 'success',
+                'message': '练习结果提交成功',  # 修复：添加message字段
+                'session_id': outcome['sessions'][0].pk,
+                'practice_session_id': outcome['practice_session'].id
+            })
+                
+        except Exception as e:
+            logger.exception("提交练习结果失败: user=%s", request.user.id)
             return Response(
-                {'error': 'typing_speed必须是数字'}, 
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': f'提交失败: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['post'])
+    def submit_batch(self, request):
+        """批量提交一整章的打字练习结果（一次请求、一个事务）"""
+        payload = request.data
+        if isinstance(payload, dict):
+            raw_items = payload.get('items')
+            chapter = payload.get('chapter', 1)
+        else:
+            raw_items = payload
+            chapter = 1
         
-        # 验证response_time必须是数字
-        try:
-            response_time = float(response_time)
-            if response_time < 0:
-                return Response(
-                    {'error': 'response_time不能为负数'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except (ValueError, TypeError):
+        if not isinstance(raw_items, list) or not raw_items:
             return Response(
-                {'error': 'response_time必须是数字'}, 
+                {'error': '缺少items参数'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            word = TypingWord.objects.get(id=word_id)
-        except TypingWord.DoesNotExist:
+        service = TypingPracticeService()
+        if len(raw_items) > service.MAX_BATCH_SIZE:
             return Response(
-                {'error': '单词不存在'}, 
-                status=status.HTTP_404_NOT_FOUND
+                {'error': f'单次最多提交{service.MAX_BATCH_SIZE}条记录'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 使用事务保护整个提交过程
         try:
-            with transaction.atomic():
-                # 获取或创建当前练习会话
-                from .models import TypingPracticeSession
-                
-                # 简化并发处理，不使用select_for_update
-                current_session, created = TypingPracticeSession.objects.get_or_create(
-                    user=request.user,
-                    is_completed=False,
-                    defaults={
-                        'dictionary': word.dictionary.name,  # 使用词库名称而不是分类
-                        'chapter': 1,  # 默认章节，后续可以从请求中获取
-                        'start_time': timezone.now()
-                    }
-                )
-                
-                # 创建练习记录 - 同时保存到两个表
-                session = TypingSession.objects.create(
-                    user=request.user,
-                    word=word,
-                    is_correct=is_correct,
-                    typing_speed=typing_speed,
-                    response_time=response_time
-                )
-                
-                # 同时保存到TypingPracticeRecord表（用于数据分析）
-                TypingPracticeRecord.objects.create(
-                    user=request.user,
-                    session=current_session,  # 关联到当前会话
-                    word=word.word,  # 保存单词字符串
-                    is_correct=is_correct,
-                    typing_speed=typing_speed,
-                    response_time=response_time,
-                    total_time=float(response_time) * 1000,  # 转换为毫秒
-                    wrong_count=wrong_count,  # ⭐ 修复：使用真实的错误次数
-                    mistakes=mistakes,  # ⭐ 修复：使用真实的按键错误数据
-                    timing=[]  # 默认值，后续可以扩展
-                )
-                
-                # 更新用户统计（在事务内同步处理）
-                self._update_user_stats_sync(request.user)
-                
-                # 更新按键错误统计 ⭐ 新增
-                if mistakes:
-                    from .services import DataAnalysisService
-                    service = DataAnalysisService()
-                    service.update_key_error_stats(request.user.id, mistakes)
-                    print(f"按键错误统计已更新: {mistakes}")
-                
-                return Response({
-                    'status': 'success',
-                    'message': '练习结果提交成功',  # 修复：添加message字段
-                    'session_id': session.id,
-                    'practice_session_id': current_session.id
+            chapter = int(chapter)
+        except (ValueError, TypeError):
+            chapter = 1
+        
+        # 逐条校验，无效条目单独返回错误，不影响其余条目
+        valid_items = []
+        valid_indexes = []
+        results = []
+        for index, raw in enumerate(raw_items):
+            item, error = service.validate_submission(raw)
+            if error:
+                results.append({
+                    'index': index,
+                    'word_id': raw.get('word_id') if isinstance(raw, dict) else None,
+                    'status': 'error',
+                    'error': error
                 })
-                
+            else:
+                valid_items.append(item)
+                valid_indexes.append(index)
+        
+        if write_behind_enabled():
+            return self._enqueue_batch(request, valid_items, valid_indexes, results, chapter)
+        
+        try:
+            outcome = service.record_results(request.user, valid_items, chapter=chapter)
         except Exception as e:
-            print(f"提交练习结果失败: {e}")
+            logger.exception("批量提交练习结果失败: user=%s", request.user.id)
             return Response(
                 {'error': f'提交失败: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        
+        # 将服务返回的序号映射回原始请求中的序号
+        for result in outcome['results']:
+            result['index'] = valid_indexes[result['index']]
+            results.append(result)
+        results.sort(key=lambda r: r['index'])
+        
+        succeeded = sum(1 for r in results if r['status'] == 'success')
+        practice_session = outcome['practice_session']
+        return Response({
+            'status': 'success' if succeeded == len(results) else 'partial',
+            'message': f'成功提交 {succeeded}/{len(results)} 条练习结果',
+            'practice_session_id': practice_session.id if practice_session else None,
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+    
+    def _enqueue_batch(self, request, valid_items, valid_indexes, results, chapter):
+        """写后缓冲模式下的批量提交：校验单词存在后整批入队，返回202和回执ID"""
+        existing_ids = set(
+            TypingWord.objects.filter(id__in={item['word_id'] for item in valid_items}).values_list('id', flat=True)
+        )
+        queued_items = []
+        for index, item in zip(valid_indexes, valid_items):
+            if item['word_id'] in existing_ids:
+                queued_items.append(item)
+                results.append({'index': index, 'word_id': item['word_id'], 'status': 'queued'})
+            else:
+                results.append({'index': index, 'word_id': item['word_id'], 'status': 'error', 'error': '单词不存在'})
+        results.sort(key=lambda r: r['index'])
+        
+        receipt_id = None
+        if queued_items:
+            receipt_id = get_write_behind_buffer().push(request.user.id, queued_items, chapter)
+        
+        return Response({
+            'status': 'accepted',
+            'message': f'已接收 {len(queued_items)}/{len(results)} 条练习结果',
+            'receipt_id': receipt_id,
+            'total': len(results),
+            'succeeded': len(queued_items),
+            'failed': len(results) - len(queued_items),
+            'results': results
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['post'])
     def complete_session(self, request):
@@ -1274,27 +1334,15 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                     'error': '没有进行中的练习会话'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # 获取会话中的所有练习记录
-            practice_records = TypingPracticeRecord.objects.filter(
-                session=current_session
-            )
-            
-            # 计算会话统计
-            total_words = practice_records.count()
-            correct_words = practice_records.filter(is_correct=True).count()
-            total_time = practice_records.aggregate(
-                total_time=Sum('response_time')
-            )['total_time'] or 0.0
-            
-            # 完成会话
-            current_session.complete_session(total_words, correct_words, total_time)
+            # 完成会话：统计直接来自提交时增量维护的会话计数器
+            current_session.complete_session()
             
             return Response({
                 'status': 'success',
                 'session_id': current_session.id,
-                'total_words': total_words,
-                'correct_words': correct_words,
-                'total_time': total_time,
+                'total_words': current_session.total_words,
+                'correct_words': current_session.correct_words,
+                'total_time': current_session.total_time,
                 'accuracy_rate': current_session.accuracy_rate,
                 'average_wpm': current_session.average_wpm
             })
@@ -1304,91 +1352,8 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                 'error': f'完成会话失败: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    def _update_user_stats_async(self, user):
-        """异步更新用户统计 - 修复并发问题"""
-        from django.db import transaction
-        
-        try:
-            with transaction.atomic():
-                # 使用select_for_update防止并发问题
-                stats, created = UserTypingStats.objects.select_for_update().get_or_create(
-                    user=user,
-                    defaults={
-                        'total_words_practiced': 0,
-                        'total_correct_words': 0,
-                        'average_wpm': 0.0,
-                        'total_practice_time': 0
-                    }
-                )
-                
-                # 计算最新统计
-                sessions = TypingSession.objects.filter(user=user)
-                total_practiced = sessions.count()
-                total_correct = sessions.filter(is_correct=True).count()
-                # 修复：安全处理聚合查询结果
-                avg_wpm_result = sessions.aggregate(avg_wpm=Avg('typing_speed'))
-                avg_wpm = avg_wpm_result['avg_wpm'] if avg_wpm_result and avg_wpm_result['avg_wpm'] is not None else 0.0
-                
-                total_time_result = sessions.aggregate(total_time=Sum('response_time'))
-                total_time = total_time_result['total_time'] if total_time_result and total_time_result['total_time'] is not None else 0.0
-                
-                # 更新统计
-                stats.total_words_practiced = total_practiced
-                stats.total_correct_words = total_correct
-                stats.average_wpm = round(avg_wpm, 2)
-                stats.total_practice_time = round(total_time, 2)
-                stats.save()
-                
-                # 清除相关缓存
-                cache.delete(f'typing_stats_{user.id}')
-                
-        except Exception as e:
-            print(f"更新用户统计失败: {e}")
-            # 不抛出异常，避免影响主要功能
-    
-    def _update_user_stats_sync(self, user):
-        """同步更新用户统计 - 在事务内调用"""
-        try:
-            # 简化并发处理，不使用select_for_update
-            stats, created = UserTypingStats.objects.get_or_create(
-                user=user,
-                defaults={
-                    'total_words_practiced': 0,
-                    'total_correct_words': 0,
-                    'average_wpm': 0.0,
-                    'total_practice_time': 0
-                }
-            )
-            
-            # 计算最新统计
-            sessions = TypingSession.objects.filter(user=user)
-            total_practiced = sessions.count()
-            total_correct = sessions.filter(is_correct=True).count()
-            
-            # 修复：安全处理聚合查询结果
-            avg_wpm_result = sessions.aggregate(avg_wpm=Avg('typing_speed'))
-            avg_wpm = avg_wpm_result['avg_wpm'] if avg_wpm_result and avg_wpm_result['avg_wpm'] is not None else 0.0
-            
-            total_time_result = sessions.aggregate(total_time=Sum('response_time'))
-            total_time = total_time_result['total_time'] if total_time_result and total_time_result['total_time'] is not None else 0.0
-            
-            # 更新统计
-            stats.total_words_practiced = total_practiced
-            stats.total_correct_words = total_correct
-            stats.average_wpm = round(avg_wpm, 2)
-            stats.total_practice_time = round(total_time, 2)
-            stats.save()
-            
-            # 清除相关缓存
-            cache.delete(f'typing_stats_{user.id}')
-            
-        except Exception as e:
-            print(f"同步更新用户统计失败: {e}")
-            # 在事务内抛出异常，让事务回滚
-            raise
-    
-    @method_decorator(cache_page(60 * 2))  # 缓存2分钟
     @action(detail=False, methods=['get'])
+    @user_cache_response(60 * 2)  # 按用户缓存2分钟，提交后失效
     def statistics(self, request):
         """获取打字统计信息 - 优化版本"""
         user = request.user
@@ -1405,8 +1370,8 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                     'total_words_practiced': stats.total_words_practiced,
                     'total_correct_words': stats.total_correct_words,
                     'average_accuracy': round((stats.total_correct_words / stats.total_words_practiced * 100) if stats.total_words_practiced > 0 else 0, 2),  # 修复：添加average_accuracy字段
-                    'average_speed': stats.average_wpm,  # 修复：添加average_speed字段
-                    'average_wpm': stats.average_wpm,
+                    'average_speed': round(stats.average_wpm, 2),  # 修复：添加average_speed字段
+                    'average_wpm': round(stats.average_wpm, 2),
                     'total_practice_time': stats.total_practice_time,
                     'last_practice_date': stats.last_practice_date.isoformat() if stats.last_practice_date else None
                 }
@@ -1423,6 +1388,11 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                     'last_practice_date': None
                 }
         
+        if write_behind_enabled():
+            # 读己之写：合并写后缓冲中尚未落库的练习结果
+            pending = get_write_behind_buffer().pending_for_user(user.id)
+            cached_stats = merge_pending_typing_stats(cached_stats, pending)
+        
         return Response(cached_stats)
     
     @action(detail=False, methods=['get'])
@@ -1464,21 +1434,21 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
         try:
             dictionary = Dictionary.objects.get(id=dictionary_id)
             
-            # 获取该词库的所有章节
-            chapters = TypingWord.objects.filter(dictionary=dictionary).values_list('chapter', flat=True).distinct().order_by('chapter')
-            total_chapters = len(chapters)
-            
-            # 获取用户完成的章节（简化逻辑：有练习记录就算完成）
-            completed_chapters = []
-            for chapter in chapters:
-                chapter_words = TypingWord.objects.filter(dictionary=dictionary, chapter=chapter)
-                practiced_words = TypingSession.objects.filter(
-                    user=user,
-                    word__in=chapter_words
-                ).values_list('word__id', flat=True).distinct()
-                
-                if practiced_words.count() >= min(5, chapter_words.count()):  # 至少练习5个单词或全部单词
-                    completed_chapters.append(chapter)
+            # 各章节单词数（一条分组查询）
+            chapter_totals = TypingWord.objects.filter(dictionary=dictionary).values('chapter').annotate(
+                word_count=Count('id')
+            ).order_by('chapter')
+            total_chapters = len(chapter_totals)
+
+            # 用户各章节练习过的不同单词数，提交时增量维护
+            practiced = dict(ChapterCompletion.objects.filter(
+                user=user, dictionary=dictionary
+            ).values_list('chapter', 'practiced_words'))
+
+            completed_chapters = [
+                row['chapter'] for row in chapter_totals
+                if ChapterCompletion.is_completed(practiced.get(row['chapter'], 0), row['word_count'])
+            ]
             
             completion_rate = round((len(completed_chapters) / total_chapters * 100) if total_chapters > 0 else 0, 2)
             
@@ -1497,8 +1467,6 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def session(self, request):
         """创建打字练习会话"""
-        from .models import TypingPracticeSession  # 修复：添加必要的导入
-        
         dictionary_id = request.data.get('dictionary')
         chapter = request.data.get('chapter', 1)
         word_count = request.data.get('word_count', 10)
@@ -1512,35 +1480,20 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
         try:
             dictionary = Dictionary.objects.get(id=dictionary_id)
             
-            # 获取指定章节的单词
-            words = TypingWord.objects.filter(
-                dictionary=dictionary,
-                chapter=chapter
-            )[:word_count]
+            # 获取指定章节的单词（与 words / by_dictionary 共用词包缓存）
+            words = get_word_pack(dictionary.id, int(chapter), limit=int(word_count))
             
-            # 创建练习会话
-            session = TypingPracticeSession.objects.create(
-                user=request.user,
-                dictionary=dictionary.name,
-                chapter=chapter,
-                start_time=timezone.now()
-            )
+            # 创建练习会话（每个用户最多一个进行中的会话，旧会话先结算）
+            session = TypingPracticeService().start_session(request.user, dictionary.name, chapter)
             
             # 准备返回的单词数据
-            words_data = []
-            for word in words:
-                words_data.append({
-                    'id': word.id,
-                    'word': word.word,
-                    'translation': word.translation,
-                    'phonetic': word.phonetic,
-                    'difficulty': word.difficulty,
-                    'chapter': word.chapter
-                })
+            words_data = project_words(words, ('id', 'word', 'translation', 'phonetic', 'difficulty', 'chapter'))
             
             return Response({
                 'session_id': session.id,
-                'words': words_data
+                'words': words_data,
+                # 静态章节包地址和内容哈希，客户端可按哈希永久缓存
+                'pack': get_chapter_pack_info(dictionary.id, chapter)
             })
             
         except Dictionary.DoesNotExist:
@@ -1757,77 +1710,46 @@ class TypingPracticeViewSet(viewsets.ModelViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    @method_decorator(cache_page(60 * 10))  # 缓存10分钟
     @action(detail=False, methods=['get'], url_path='daily-progress')
+    @user_cache_response(60 * 10)  # 按用户缓存10分钟，提交后失效
     def daily_progress(self, request):
-        """获取每日学习进度 - 优化版本"""
-        try:
-            days = int(request.query_params.get('days', 7))
-            
-            # 检查用户是否已认证
-            if not request.user.is_authenticated:
-                # 对于匿名用户，返回空数据
-                return Response([])
-            
-            user = request.user
-            
-            # 使用缓存键
-            cache_key = f'daily_progress_{user.id}_{days}'
-            cached_progress = cache.get(cache_key)
-            
-            if cached_progress is None:
-                from django.utils import timezone
-                from datetime import timedelta
-                
-                end_date = timezone.now().date()
-                start_date = end_date - timedelta(days=days-1)
-                
-                # 优化查询：使用聚合查询
-                daily_data = TypingSession.objects.filter(
-                    user=user,
-                    session_date__range=[start_date, end_date]
-                ).values('session_date').annotate(
-                    words_practiced=Count('id'),
-                    correct_words=Count('id', filter=models.Q(is_correct=True)),
-                    avg_wpm=Avg('typing_speed')
-                ).order_by('session_date')
-                
-                # 格式化数据
-                progress_data = []
-                current_date = start_date
-                while current_date <= end_date:
-                    day_data = next(
-                        (item for item in daily_data if item['session_date'] == current_date), 
-                        None
-                    )
-                    
-                    if day_data:
-                        progress_data.append({
-                            'date': current_date.isoformat(),
-                            'words_practiced': day_data['words_practiced'],
-                            'correct_words': day_data['correct_words'],
-                            'accuracy': round((day_data['correct_words'] / day_data['words_practiced']) * 100, 2) if day_data['words_practiced'] > 0 else 0,
-                            'avg_wpm': round(day_data['avg_wpm'], 2) if day_data['avg_wpm'] else 0
-                        })
-                    else:
-                        progress_data.append({
-                            'date': current_date.isoformat(),
-                            'words_practiced': 0,
-                            'correct_words': 0,
-                            'accuracy': 0,
-                            'avg_wpm': 0
-                        })
-                    
-                    current_date += timedelta(days=1)
-                
-                cached_progress = progress_data
-                cache.set(cache_key, cached_progress, 600)  # 缓存10分钟
-            
-            return Response(cached_progress)
-        except Exception as e:
-            print(f"获取每日进度失败: {e}")
-            # 对于任何错误，返回空数组而不是500错误
+        """
+        获取每日学习进度（从每日汇总表读取，耗时与天数成线性关系）
+        
+        参数：days 最近N天（默认7），或 start/end 指定任意日期范围（YYYY-MM-DD）
+        """
+        # 检查用户是否已认证
+        if not request.user.is_authenticated:
+            # 对于匿名用户，返回空数据
             return Response([])
+        
+        from datetime import datetime, timedelta
+        
+        start_str = request.query_params.get('start')
+        end_str = request.query_params.get('end')
+        try:
+            if start_str or end_str:
+                end_date = datetime.strptime(end_str, '%Y-%m-%d') if end_str else datetime.now()
+                start_date = datetime.strptime(start_str, '%Y-%m-%d') if start_str else end_date - timedelta(days=6)
+            else:
+                days = int(request.query_params.get('days', 7))
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=days - 1)
+        except ValueError:
+            return Response(
+                {'error': '无效的日期参数，days 须为整数，start/end 格式为 YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        span = (end_date.date() - start_date.date()).days + 1
+        if span < 1 or span > self.DAILY_PROGRESS_MAX_DAYS:
+            return Response(
+                {'error': f'日期范围须在1到{self.DAILY_PROGRESS_MAX_DAYS}天之间'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # 查询出错时直接返回500：吞掉错误返回的空数组会被按用户缓存10分钟
+        return Response(DataAnalysisService().get_daily_progress(request.user.id, start_date, end_date))
     
     @action(detail=False, methods=['get'])
     def status(self, request):
@@ -2319,8 +2241,6 @@ class TypingWordViewSet(viewsets.ReadOnlyModelViewSet):
         dictionary_id = request.query_params.get('dictionary_id')
         chapter = request.query_params.get('chapter', 1)
         
-        print(f"DEBUG: 请求参数 - dictionary_id: {dictionary_id}, chapter: {chapter}")
-        
         if not dictionary_id:
             return Response(
                 {'error': '缺少dictionary_id参数'}, 
@@ -2328,28 +2248,36 @@ class TypingWordViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            # 严格按照指定词库和章节获取单词
-            words = TypingWord.objects.filter(
-                dictionary_id=dictionary_id,
-                chapter=chapter
-            ).values('id', 'word', 'translation', 'phonetic', 'difficulty', 'frequency')
-            
-            print(f"DEBUG: 查询条件 - dictionary_id: {dictionary_id}, chapter: {chapter}")
-            print(f"DEBUG: 找到的单词数量: {words.count()}")
-            
-            # 限制每个章节最多25个单词
-            word_list = list(words[:25])
-            print(f"DEBUG: 最终返回的单词数量: {len(word_list)}")
-            if word_list:
-                print(f"DEBUG: 第一个单词: {word_list[0]}")
+            # 严格按照指定词库和章节获取单词，每个章节最多25个单词（共用词包缓存）
+            words = get_word_pack(int(dictionary_id), int(chapter), limit=25)
+            word_list = project_words(words, ('id', 'word', 'translation', 'phonetic', 'difficulty', 'frequency'))
             
             return Response(word_list)
         except Exception as e:
-            print(f"DEBUG: 异常: {str(e)}")
             return Response(
                 {'error': '获取单词失败', 'message': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @action(detail=False, methods=['get'])
+    def chapter_pack(self, request):
+        """获取静态章节包的地址和内容哈希（章节包由nginx直接提供，可按哈希永久缓存）"""
+        dictionary_id = request.query_params.get('dictionary_id')
+        chapter = request.query_params.get('chapter', 1)
+        
+        if not dictionary_id:
+            return Response(
+                {'error': '缺少dictionary_id参数'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        pack = get_chapter_pack_info(dictionary_id, chapter)
+        if pack is None:
+            return Response(
+                {'error': '章节包不存在'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(pack)
 
 
 class DataAnalysisViewSet(viewsets.ModelViewSet):
@@ -2448,6 +2376,69 @@ class DataAnalysisViewSet(viewsets.ModelViewSet):
                 "data": []
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def percentiles(self, request):
+        """获取每日及整个日期范围的分位数（metric=wpm|response_time，返回p50/p90/p99）"""
+        metric = request.query_params.get('metric', 'wpm')
+        if metric not in DataAnalysisService.PERCENTILE_METRICS:
+            return Response({
+                "success": False,
+                "message": f"未知的指标: {metric}，可选 {', '.join(DataAnalysisService.PERCENTILE_METRICS)}",
+                "data": {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # 获取查询参数
+            start_date_str = request.query_params.get('start_date')
+            end_date_str = request.query_params.get('end_date')
+            
+            # 解析日期
+            from datetime import datetime, timedelta
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else datetime.now() - timedelta(days=365)
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else datetime.now()
+            
+            # 获取数据
+            service = DataAnalysisService()
+            data = service.get_percentile_trend(request.user.id, start_date, end_date, metric)
+            
+            return Response({
+                "success": True,
+                "message": "获取分位数数据成功",
+                "data": data
+            })
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": f"获取分位数数据失败: {str(e)}",
+                "data": {}
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'], url_path='session-percentiles')
+    def session_percentiles(self, request):
+        """获取单个练习会话的WPM和反应时间分位数"""
+        try:
+            session_id = int(request.query_params.get('session_id', ''))
+        except ValueError:
+            return Response({
+                "success": False,
+                "message": "缺少或无效的 session_id",
+                "data": {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = DataAnalysisService().get_session_percentiles(request.user.id, session_id)
+        if data is None:
+            return Response({
+                "success": False,
+                "message": "练习会话不存在或没有练习记录",
+                "data": {}
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            "success": True,
+            "message": "获取会话分位数成功",
+            "data": data
+        })
+    
     @action(detail=False, methods=['get'], url_path='monthly-calendar')
     def monthly_calendar(self, request):
         """获取指定月份的日历热力图数据（Windows风格）"""
@@ -2488,6 +2479,38 @@ class DataAnalysisViewSet(viewsets.ModelViewSet):
                 "data": {}
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'], url_path='yearly-calendar')
+    def yearly_calendar(self, request):
+        """获取指定年份12个月的日历热力图数据（年视图）"""
+        try:
+            # 获取查询参数
+            from datetime import datetime
+            year = int(request.query_params.get('year', datetime.now().year))
+            
+            # 验证参数
+            if year < 1900 or year > 2100:
+                return Response({
+                    "success": False,
+                    "message": "年份参数无效",
+                    "data": {}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # 获取数据
+            service = DataAnalysisService()
+            data = service.get_yearly_calendar_data(request.user.id, year)
+            
+            return Response({
+                "success": True,
+                "message": f"获取{year}年日历数据成功",
+                "data": data
+            })
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": f"获取年历数据失败: {str(e)}",
+                "data": {}
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     @action(detail=False, methods=['get'])
     def accuracy_trend(self, request):
         """获取正确率趋势数据"""
@@ -2537,6 +2560,80 @@ class DataAnalysisViewSet(viewsets.ModelViewSet):
                 "data": []
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'], url_path='key-latency')
+    def key_latency(self, request):
+        """获取平均按键间隔最长的字母组合（limit 返回条数，min_samples 最少样本数）"""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+            min_samples = int(request.query_params.get('min_samples', 5))
+        except ValueError:
+            return Response({
+                "success": False,
+                "message": "limit 和 min_samples 必须是整数",
+                "data": []
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            service = DataAnalysisService()
+            data = service.get_key_latency_stats(request.user.id, max(1, min(limit, 100)), max(1, min_samples))
+            
+            return Response({
+                "success": True,
+                "message": "获取按键间隔统计成功",
+                "data": data
+            })
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": f"获取按键间隔统计失败: {str(e)}",
+                "data": []
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        管理员流式导出练习数据（table 表名，month 可选 YYYY-MM 只导出一个月份分区，
+        file_format 为 arrow 或 csv，默认有pyarrow时为arrow）
+
+        逐页从数据库读取并编码输出，不在内存中拼出整个文件。
+        """
+        from datetime import datetime
+        table = request.query_params.get('table')
+        file_format = request.query_params.get('file_format', practice_export.default_stream_format())
+        month_str = request.query_params.get('month')
+        if table not in practice_export.EXPORT_TABLES or file_format not in practice_export.STREAM_FORMATS:
+            return Response({
+                "success": False,
+                "message": f"table 必须是 {', '.join(practice_export.EXPORT_TABLES)} 之一，"
+                           f"file_format 必须是 {' 或 '.join(practice_export.STREAM_FORMATS)}",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if file_format == 'arrow' and not practice_export.PYARROW_AVAILABLE:
+            return Response({
+                "success": False,
+                "message": "导出Arrow需要安装 pyarrow，请改用 csv 格式",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            month = datetime.strptime(month_str, '%Y-%m') if month_str else None
+        except ValueError:
+            return Response({
+                "success": False,
+                "message": "month 格式应为 YYYY-MM",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if file_format == 'arrow':
+            content_type, extension = 'application/vnd.apache.arrow.stream', 'arrows'
+        else:
+            content_type, extension = 'text/csv; charset=utf-8', 'csv'
+        filename = f"{table}-{month_str}.{extension}" if month_str else f"{table}.{extension}"
+        response = StreamingHttpResponse(
+            practice_export.stream_table(table, file_format, month=month), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     @action(detail=False, methods=['get'])
     def overview(self, request):
         """获取数据概览"""
@@ -2566,6 +2663,67 @@ class DataAnalysisViewSet(viewsets.ModelViewSet):
                 "data": {}
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """
+        一次返回数据分析页的全部面板
+        
+        参数：start_date/end_date（同各面板接口）、year/month（月历）、
+        panels（逗号分隔的面板名，默认全部）。响应带ETag，内容未变化时返回304。
+        """
+        try:
+            # 获取查询参数
+            start_date_str = request.query_params.get('start_date')
+            end_date_str = request.query_params.get('end_date')
+            year = request.query_params.get('year')
+            month = request.query_params.get('month')
+            panels_str = request.query_params.get('panels')
+            
+            panels = [p.strip() for p in panels_str.split(',') if p.strip()] if panels_str else None
+            unknown = [p for p in panels or [] if p not in DataAnalysisService.DASHBOARD_PANELS]
+            if unknown:
+                return Response({
+                    "success": False,
+                    "message": f"未知的面板: {', '.join(unknown)}",
+                    "data": {}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # 解析日期；默认值取整到天，保证同一天内的ETag稳定
+            from datetime import datetime, timedelta
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else today - timedelta(days=365)
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else today
+            year = int(year) if year else None
+            month = int(month) if month else None
+            if month is not None and not 1 <= month <= 12:
+                return Response({
+                    "success": False,
+                    "message": "月份参数无效",
+                    "data": {}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # 获取数据
+            service = DataAnalysisService()
+            data = service.get_dashboard(request.user.id, start_date, end_date, panels, year, month)
+        except ValueError as e:
+            return Response({
+                "success": False,
+                "message": f"参数格式错误: {str(e)}",
+                "data": {}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                "success": False,
+                "message": f"获取数据分析看板失败: {str(e)}",
+                "data": {}
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return conditional_response(request, {
+            "success": True,
+            "message": "获取数据分析看板成功",
+            "data": data
+        })
+    
     @action(detail=False, methods=['post'])
     def submit(self, request):
         """提交练习数据"""
@@ -0,0 +1,266 @@
+"""
+打字练习词包
+- 缓存词包：按 (词库, 章节, 难度, 数量) 缓存单词列表，词库内容变化时递增版本号使旧词包失效
+- 静态章节包：每个 (词库, 章节) 预编译为带内容哈希文件名的JSON（附 .gz/.br），由nginx直接提供
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Dictionary, TypingWord
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只生成 .gz
+    brotli = None
+
+
+# 词包包含的字段，各接口从中挑选自己需要的字段返回
+WORD_PACK_FIELDS = ('id', 'word', 'translation', 'phonetic', 'difficulty', 'dictionary__name', 'chapter', 'frequency')
+
+GLOBAL_VERSION_KEY = 'typing_word_pack_version'
+DICTIONARY_VERSION_KEY = 'typing_word_pack_version_{dictionary_id}'
+WORD_PACK_KEY = 'typing_word_pack_{global_version}_{dictionary_id}_{version}_{chapter}_{difficulty}_{limit}'
+# 单个词包的单词数上限：数量是缓存键的一部分且词包不设过期时间，不限制的话任意 limit 都会各自占一份缓存
+MAX_WORD_PACK_LIMIT = 500
+
+
+def _new_version() -> int:
+    # 用纳秒时间戳作为版本号：版本键被淘汰后重新生成的版本也不会与旧词包撞键
+    return time.time_ns()
+
+
+def get_word_pack_versions(dictionary_id: int) -> tuple:
+    """返回 (全局版本, 词库版本)，缺失时初始化（不设过期时间）"""
+    dictionary_key = DICTIONARY_VERSION_KEY.format(dictionary_id=dictionary_id)
+    versions = cache.get_many([GLOBAL_VERSION_KEY, dictionary_key])
+    for key in (GLOBAL_VERSION_KEY, dictionary_key):
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return versions[GLOBAL_VERSION_KEY], versions[dictionary_key]
+
+
+def bump_word_pack_version(*dictionary_ids: Optional[int]) -> None:
+    """
+    递增词库版本号，使这些词库的所有词包失效
+
+    不传参数时递增全局版本号，使所有词库的词包失效（用于按单词而非词库导入的场景）。
+    """
+    version = _new_version()
+    if not dictionary_ids:
+        cache.set(GLOBAL_VERSION_KEY, version, None)
+        return
+    cache.set_many({
+        DICTIONARY_VERSION_KEY.format(dictionary_id=dictionary_id): version
+        for dictionary_id in set(dictionary_ids) if dictionary_id is not None
+    }, None)
+
+
+def get_word_pack(dictionary_id: int, chapter: Optional[int] = None, difficulty: Optional[str] = None,
+                  limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    获取词包（WORD_PACK_FIELDS 字段的字典列表，按ID排序）
+
+    词包不设过期时间：导入命令和后台编辑单词时递增版本号，旧词包因键变化不再被读取，
+    随缓存淘汰自然回收。limit 限制在 1 到 MAX_WORD_PACK_LIMIT 之间。
+    """
+    limit = max(1, min(int(limit), MAX_WORD_PACK_LIMIT))
+    global_version, version = get_word_pack_versions(dictionary_id)
+    cache_key = WORD_PACK_KEY.format(
+        global_version=global_version,
+        dictionary_id=dictionary_id,
+        version=version,
+        chapter=chapter if chapter is not None else 'all',
+        difficulty=difficulty or 'all',
+        limit=limit
+    )
+    words = cache.get(cache_key)
+    if words is None:
+        queryset = TypingWord.objects.filter(dictionary_id=dictionary_id)
+        if chapter is not None:
+            queryset = queryset.filter(chapter=chapter)
+        if difficulty:
+            queryset = queryset.filter(difficulty=difficulty)
+        words = list(queryset.order_by('id').values(*WORD_PACK_FIELDS)[:limit])
+        cache.set(cache_key, words, None)
+    return words
+
+
+def project_words(words: List[Dict[str, Any]], fields: tuple) -> List[Dict[str, Any]]:
+    """从词包中挑选接口需要的字段"""
+    return [{field: word[field] for field in fields} for word in words]
+
+
+# ---------------------------------------------------------------------------
+# 静态章节包
+# ---------------------------------------------------------------------------
+
+# 章节包中每个单词包含的字段
+CHAPTER_PACK_FIELDS = ('id', 'word', 'translation', 'phonetic', 'difficulty', 'chapter', 'frequency')
+MANIFEST_NAME = 'manifest.json'
+# 不再被清单引用的旧章节包默认保留的秒数，拿着旧清单的客户端在此期间仍能下载
+DEFAULT_CHAPTER_PACK_RETENTION = 24 * 3600
+
+_manifest_cache: Dict[str, Any] = {'key': None, 'data': None}
+
+
+def chapter_pack_root() -> str:
+    return getattr(settings, 'TYPING_CHAPTER_PACK_ROOT', os.path.join(settings.MEDIA_ROOT, 'typing_packs'))
+
+
+def chapter_pack_url() -> str:
+    return getattr(settings, 'TYPING_CHAPTER_PACK_URL', f'{settings.MEDIA_URL}typing_packs/')
+
+
+def chapter_pack_retention() -> int:
+    return getattr(settings, 'TYPING_CHAPTER_PACK_RETENTION', DEFAULT_CHAPTER_PACK_RETENTION)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _sweep_retired_packs(root: str, name: str, keep: set, retired: Dict[str, float], now: float) -> None:
+    """
+    处理目录 name 中不在 keep 里的章节包：第一次发现时记入 retired（相对路径 -> 退役时间），
+    退役超过保留期后连同 .gz/.br 一起删除；目录删空后一并删除
+    """
+    directory = os.path.join(root, name)
+    retention = chapter_pack_retention()
+    for filename in os.listdir(directory):
+        base = filename.split('.json')[0] + '.json'
+        relative = f'{name}/{base}'
+        if base in keep:
+            # 内容改回旧版本时文件重新被引用
+            retired.pop(relative, None)
+            continue
+        retired_at = retired.setdefault(relative, now)
+        if now - retired_at >= retention:
+            os.remove(os.path.join(directory, filename))
+    for relative in [relative for relative in retired if relative.startswith(f'{name}/')]:
+        if not os.path.exists(os.path.join(root, relative)):
+            retired.pop(relative)
+    if not keep and not os.listdir(directory):
+        os.rmdir(directory)
+
+
+def load_chapter_pack_manifest() -> Dict[str, Any]:
+    """读取章节包清单（按文件inode和修改时间做进程内缓存），不存在时返回空清单"""
+    path = os.path.join(chapter_pack_root(), MANIFEST_NAME)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {'dictionaries': {}}
+    # 清单通过 os.replace 原子替换，每次构建都会换新的inode
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if _manifest_cache['key'] != key:
+        with open(path, 'r', encoding='utf-8') as f:
+            _manifest_cache['data'] = json.load(f)
+        _manifest_cache['key'] = key
+    return _manifest_cache['data']
+
+
+def get_chapter_pack_info(dictionary_id: int, chapter: int) -> Optional[Dict[str, Any]]:
+    """返回章节包的 {'url', 'hash', 'words'}，尚未构建时返回None"""
+    dictionary = load_chapter_pack_manifest()['dictionaries'].get(str(dictionary_id))
+    if not dictionary:
+        return None
+    entry = dictionary['chapters'].get(str(chapter))
+    if not entry:
+        return None
+    return {
+        'url': f"{chapter_pack_url()}{entry['path']}",
+        'hash': entry['hash'],
+        'words': entry['words'],
+    }
+
+
+def build_chapter_packs(dictionary_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """
+    把词库的每个章节写成一个紧凑JSON文件，返回 {'dictionaries': 词库数, 'chapters': 章节数}
+
+    文件名带内容哈希（{词库ID}/{章节}.{哈希前12位}.json），内容不变时文件名不变，
+    客户端和nginx可以按 immutable 缓存；同时写出 .gz 和 .br（需安装brotli）预压缩版本，
+    内容未变但预压缩文件缺失（例如之后才安装brotli）时补写。
+    清单 manifest.json 记录每个章节包的路径、sha256和单词数，以及已退役章节包的退役时间。
+    不再被引用的旧章节包保留 TYPING_CHAPTER_PACK_RETENTION 秒后才删除，避免拿着旧清单的客户端404。
+    不指定词库时重建全部词库，已不存在词库的章节包同样在保留期后删除。
+    """
+    root = chapter_pack_root()
+    os.makedirs(root, exist_ok=True)
+    now = time.time()
+
+    manifest = load_chapter_pack_manifest()
+    entries = dict(manifest.get('dictionaries', {}))
+    retired = dict(manifest.get('retired', {}))
+    dictionaries = Dictionary.objects.all()
+    if dictionary_ids is not None:
+        dictionaries = dictionaries.filter(id__in=list(dictionary_ids))
+    else:
+        entries = {}
+
+    dictionary_count = 0
+    chapter_count = 0
+    for dictionary in dictionaries.order_by('id'):
+        dictionary_count += 1
+        chapters: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        words = TypingWord.objects.filter(dictionary=dictionary).order_by('chapter', 'id').values(*CHAPTER_PACK_FIELDS)
+        for word in words.iterator(chunk_size=2000):
+            chapters.setdefault(str(word['chapter']), []).append(word)
+
+        directory = os.path.join(root, str(dictionary.id))
+        os.makedirs(directory, exist_ok=True)
+        chapter_entries = {}
+        for chapter, chapter_words in chapters.items():
+            payload = json.dumps({
+                'dictionary': dictionary.id,
+                'name': dictionary.name,
+                'chapter': int(chapter),
+                'words': chapter_words,
+            }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            digest = hashlib.sha256(payload).hexdigest()
+            filename = f'{chapter}.{digest[:12]}.json'
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path):
+                _write_atomic(path, payload)
+            if not os.path.exists(f'{path}.gz'):
+                # mtime=0 保证相同内容生成相同的gz文件
+                _write_atomic(f'{path}.gz', gzip.compress(payload, compresslevel=9, mtime=0))
+            if brotli is not None and not os.path.exists(f'{path}.br'):
+                _write_atomic(f'{path}.br', brotli.compress(payload))
+            chapter_entries[chapter] = {
+                'path': f'{dictionary.id}/{filename}',
+                'hash': digest,
+                'words': len(chapter_words),
+            }
+            chapter_count += 1
+
+        # 该词库中不再引用的旧章节包先退役，保留期后删除
+        keep = {os.path.basename(entry['path']) for entry in chapter_entries.values()}
+        _sweep_retired_packs(root, str(dictionary.id), keep, retired, now)
+
+        entries[str(dictionary.id)] = {'name': dictionary.name, 'chapters': chapter_entries}
+
+    if dictionary_ids is None:
+        for name in os.listdir(root):
+            if os.path.isdir(os.path.join(root, name)) and name not in entries:
+                _sweep_retired_packs(root, name, set(), retired, now)
+
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps({
+        'generated_at': timezone.now().isoformat(),
+        'dictionaries': entries,
+        'retired': retired,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    return {'dictionaries': dictionary_count, 'chapters': chapter_count}
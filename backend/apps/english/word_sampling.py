@@ -0,0 +1,136 @@
+"""
+练习出题的随机单词抽样（代替 ORDER BY RAND()）
+- 每个难度缓存一份有序的单词id数组，由定时任务周期性重建，缓存过期后在首次使用时重建
+- 从id数组里按下标随机抽取（排除项很多时先过滤再抽），再用一次 in_bulk 取单词，不对整表排序
+- 传入 seed 时抽样结果可复现（同一题库状态下同一 seed 得到同样的题目）
+- 释义选择题的干扰项来自按难度预先抽好的释义池，出题时不再查询数据库
+"""
+import random
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+
+from .models import Word
+
+POOL_TIMEOUT = 2 * 3600
+# 每个难度预先抽取的干扰项释义数
+DISTRACTOR_POOL_SIZE = 100
+# 可用单词数不到需要数量的该倍数时，先过滤排除项再抽样，否则按下标随机抽取并跳过排除项
+REJECTION_FACTOR = 2
+
+
+def _pool_key(difficulty: Optional[str]) -> str:
+    return f'word_sample_ids_{difficulty or "all"}'
+
+
+def _distractor_key(difficulty: Optional[str]) -> str:
+    return f'word_distractors_{difficulty or "all"}'
+
+
+def _words(difficulty: Optional[str] = None):
+    words = Word.objects.filter(is_deleted=False)
+    if difficulty:
+        words = words.filter(difficulty_level=difficulty)
+    return words
+
+
+def refresh_id_pool(difficulty: Optional[str] = None) -> array:
+    """从数据库重建某个难度（None 为全部单词）的有序id数组并写入缓存"""
+    pool = array('q', _words(difficulty).order_by('id').values_list('id', flat=True))
+    cache.set(_pool_key(difficulty), pool, POOL_TIMEOUT)
+    return pool
+
+
+def get_id_pool(difficulty: Optional[str] = None) -> array:
+    pool = cache.get(_pool_key(difficulty))
+    return pool if pool is not None else refresh_id_pool(difficulty)
+
+
+def refresh_distractor_pool(difficulty: Optional[str] = None) -> List[Tuple[int, str]]:
+    """从该难度的id数组中随机抽取一批有释义的单词作为干扰项池，每次重建都会换一批"""
+    pool = get_id_pool(difficulty)
+    ids = random.sample(pool, min(len(pool), DISTRACTOR_POOL_SIZE))
+    definitions = list(
+        Word.objects.filter(id__in=ids, is_deleted=False)
+        .exclude(definition__isnull=True).exclude(definition='')
+        .order_by('id').values_list('id', 'definition')
+    )
+    cache.set(_distractor_key(difficulty), definitions, POOL_TIMEOUT)
+    return definitions
+
+
+def get_distractor_pool(difficulty: Optional[str] = None) -> List[Tuple[int, str]]:
+    definitions = cache.get(_distractor_key(difficulty))
+    return definitions if definitions is not None else refresh_distractor_pool(difficulty)
+
+
+def refresh_pools() -> int:
+    """重建全部单词和每个难度的id数组及干扰项池（由Celery beat定时触发），返回重建的难度数"""
+    difficulties = [None] + sorted(
+        _words().order_by().values_list('difficulty_level', flat=True).distinct()
+    )
+    for difficulty in difficulties:
+        refresh_id_pool(difficulty)
+        refresh_distractor_pool(difficulty)
+    return len(difficulties)
+
+
+def _merged_pool(difficulties: Sequence[str]) -> Sequence[int]:
+    if not difficulties:
+        return get_id_pool()
+    if len(difficulties) == 1:
+        return get_id_pool(difficulties[0])
+    return sorted(word_id for difficulty in set(difficulties) for word_id in get_id_pool(difficulty))
+
+
+def _draw(pool: Sequence[int], count: int, exclude: set, rng: random.Random) -> List[int]:
+    if len(pool) - len(exclude) < count * REJECTION_FACTOR:
+        candidates = [word_id for word_id in pool if word_id not in exclude]
+        return rng.sample(candidates, min(count, len(candidates)))
+
+    # 排除项最多占去一半的可用单词，随机下标期望不到两次就能命中一个可用id
+    drawn, taken = [], set(exclude)
+    while len(drawn) < count:
+        word_id = pool[rng.randrange(len(pool))]
+        if word_id not in taken:
+            taken.add(word_id)
+            drawn.append(word_id)
+    return drawn
+
+
+def sample_words(count: int, difficulties: Sequence[str] = (), exclude_ids: Iterable[int] = (),
+                 seed: Optional[int] = None) -> List[Word]:
+    """
+    随机抽取最多 count 个未删除的单词，按抽中的顺序返回
+
+    :param difficulties: 只从这些难度中抽取，为空时不限难度
+    :param exclude_ids: 不抽取的单词id（例如用户已经见过的单词）
+    :param seed: 随机种子，传入时结果可复现
+    """
+    rng = random.Random(seed)
+    exclude = set(exclude_ids)
+    drawn = _draw(_merged_pool(difficulties), count, exclude, rng)
+    words = Word.objects.filter(is_deleted=False).in_bulk(drawn)
+
+    if len(words) < len(drawn):
+        # 缓存的id数组里有已删除的单词：重建后补抽缺少的数量
+        for difficulty in difficulties or [None]:
+            refresh_id_pool(difficulty)
+        refill = _draw(_merged_pool(difficulties), len(drawn) - len(words), exclude | set(drawn), rng)
+        words.update(Word.objects.filter(is_deleted=False).in_bulk(refill))
+        drawn += refill
+    return [words[word_id] for word_id in drawn if word_id in words]
+
+
+def choose_distractors(word: Word, count: int, rng: Optional[random.Random] = None) -> List[str]:
+    """从与该单词同难度的干扰项池中选出 count 个与正确释义不同的释义，同难度不够时用全部单词的池补足"""
+    rng = rng or random.Random()
+    candidates: Dict[str, None] = {}
+    for difficulty in (word.difficulty_level, None):
+        for word_id, definition in get_distractor_pool(difficulty):
+            if word_id != word.id and definition != word.definition:
+                candidates.setdefault(definition)
+        if len(candidates) >= count:
+            break
+    return rng.sample(list(candidates), min(count, len(candidates)))
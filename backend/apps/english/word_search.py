@@ -0,0 +1,196 @@
+"""
+单词检索（代替 word/definition 的 icontains 全表扫描）
+- 排序：单词完全匹配、前缀匹配在前（istartswith 走 word 列的B-tree索引，按长度排序所以完全匹配排第一），
+  其后是按相关度排序的释义匹配，最多返回 MAX_RESULTS 个
+- 释义检索可替换后端（WORD_SEARCH_BACKEND）：
+  mysql  —— definition 列上的 FULLTEXT ngram 索引（迁移 0023），按 MATCH ... AGAINST 相关度排序
+  memory —— 进程内倒排索引 + BM25，用于SQLite开发环境和测试；单词增删改后通过缓存中的版本号让各进程重建
+  auto   —— 按数据库类型自动选择（默认）
+- 自动补全只做单词前缀匹配：mysql 走索引上的范围扫描，memory 在进程内二分查找，不查数据库
+"""
+import math
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+from .models import Word
+
+MAX_RESULTS = 500
+AUTOCOMPLETE_FIELDS = ('id', 'word', 'phonetic', 'part_of_speech')
+INDEX_VERSION_KEY = 'word_search_index_version'
+
+# 英文按单词切分；中文按二元组切分，与 MySQL ngram 解析器（ngram_token_size=2）一致
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for run in _TOKEN_RE.findall((text or '').lower()):
+        if run[0] >= '\u4e00' and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class WordSearchBackend(ABC):
+    """检索后端基类：单词的完全/前缀匹配由数据库索引完成，子类只负责释义的相关度排序"""
+
+    def search(self, queryset, query: str, limit: int = MAX_RESULTS) -> List[int]:
+        """在 queryset（已带难度等过滤条件）中检索，返回按排名排列的单词id"""
+        query = query.strip()
+        ids = list(
+            queryset.filter(word__istartswith=query)
+            .order_by(Length('word'), 'word')
+            .values_list('id', flat=True)[:limit]
+        )
+        if len(ids) < limit:
+            matched = set(ids)
+            ranked = self.rank_definitions(queryset, query, limit)
+            ids += [word_id for word_id in ranked if word_id not in matched][:limit - len(ids)]
+        return ids
+
+    @abstractmethod
+    def rank_definitions(self, queryset, query: str, limit: int) -> List[int]:
+        """在 queryset 中按释义相关度返回最多 limit 个单词id"""
+
+    def autocomplete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        return list(
+            Word.objects.filter(is_deleted=False, word__istartswith=prefix)
+            .order_by('word')
+            .values(*AUTOCOMPLETE_FIELDS)[:limit]
+        )
+
+
+class MySQLFullTextBackend(WordSearchBackend):
+    """MySQL FULLTEXT（ngram）释义检索"""
+
+    MATCH_SQL = 'MATCH (`definition`) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+
+    def rank_definitions(self, queryset, query: str, limit: int) -> List[int]:
+        return list(
+            queryset.filter(RawSQL(self.MATCH_SQL, (query,), output_field=BooleanField()))
+            .annotate(relevance=RawSQL(self.MATCH_SQL, (query,), output_field=FloatField()))
+            .order_by('-relevance', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+
+class _InvertedIndex:
+    """释义的倒排索引（词项 -> {单词id: 词频}）和按小写单词排序的前缀表"""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.entries = []
+        for word_id, word, phonetic, part_of_speech, definition in rows:
+            tokens = tokenize(definition)
+            self.lengths[word_id] = len(tokens)
+            for token, count in Counter(tokens).items():
+                self.postings[token][word_id] = count
+            self.entries.append((word.lower(), word_id, word, phonetic, part_of_speech))
+        self.entries.sort()
+        self.keys = [entry[0] for entry in self.entries]
+        self.average_length = sum(self.lengths.values()) / len(self.lengths) if self.lengths else 0
+
+    def bm25(self, tokens: List[str]) -> Dict[int, float]:
+        scores = defaultdict(float)
+        total = len(self.lengths)
+        for token in set(tokens):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for word_id, freq in docs.items():
+                norm = 1 - self.B + self.B * self.lengths[word_id] / self.average_length
+                scores[word_id] += idf * freq * (self.K1 + 1) / (freq + self.K1 * norm)
+        return scores
+
+    def prefix(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = prefix.lower()
+        matches = []
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and len(matches) < limit and self.keys[index].startswith(prefix):
+            matches.append(dict(zip(AUTOCOMPLETE_FIELDS, self.entries[index][1:])))
+            index += 1
+        return matches
+
+
+class InvertedIndexBackend(WordSearchBackend):
+    """进程内倒排索引 + BM25 释义检索"""
+
+    # 批量导入等不经过接口的写入不会更新版本号，索引最多这么久后也会重建
+    MAX_AGE = 600
+    # 按相关度过滤 queryset 条件时每次查询的id数（SQLite单条语句最多999个参数）
+    FILTER_CHUNK = 500
+
+    def __init__(self):
+        self._index: Optional[_InvertedIndex] = None
+        self._version = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get_index(self) -> _InvertedIndex:
+        version = cache.get(INDEX_VERSION_KEY)
+        with self._lock:
+            if self._index is None or version != self._version or time.monotonic() - self._built_at > self.MAX_AGE:
+                rows = Word.objects.filter(is_deleted=False).values_list(
+                    'id', 'word', 'phonetic', 'part_of_speech', 'definition'
+                ).iterator(chunk_size=2000)
+                self._index = _InvertedIndex(rows)
+                self._version = version
+                self._built_at = time.monotonic()
+            return self._index
+
+    def rank_definitions(self, queryset, query: str, limit: int) -> List[int]:
+        scores = self._get_index().bm25(tokenize(query))
+        ranked = sorted(scores, key=lambda word_id: (-scores[word_id], word_id))
+        ids = []
+        for start in range(0, len(ranked), self.FILTER_CHUNK):
+            chunk = ranked[start:start + self.FILTER_CHUNK]
+            allowed = set(queryset.filter(id__in=chunk).values_list('id', flat=True))
+            ids += [word_id for word_id in chunk if word_id in allowed]
+            if len(ids) >= limit:
+                break
+        return ids[:limit]
+
+    def autocomplete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        return self._get_index().prefix(prefix, limit)
+
+
+_BACKENDS = {
+    'mysql': MySQLFullTextBackend,
+    'memory': InvertedIndexBackend,
+}
+_instances: Dict[str, WordSearchBackend] = {}
+
+
+def get_search_backend(name: Optional[str] = None) -> WordSearchBackend:
+    name = name or getattr(settings, 'WORD_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = 'mysql' if connection.vendor == 'mysql' else 'memory'
+    if name not in _BACKENDS:
+        raise ImproperlyConfigured(f'未知的单词检索后端: {name}')
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def invalidate_index() -> None:
+    """单词增删改后调用，进程内索引在下次检索时重建"""
+    cache.set(INDEX_VERSION_KEY, time.time_ns(), None)
@@ -47,6 +47,16 @@ describe('englishAPI', () => {
       expect(result).toEqual(mockResponse)
     })
 
+    it('应该自动补全单词', async () => {
+      const mockResponse = { data: [{ id: 1, word: 'hello' }] }
+      mockRequest.get.mockResolvedValue(mockResponse)
+
+      const result = await englishAPI.autocompleteWords('hel', 5)
+
+      expect(mockRequest.get).toHaveBeenCalledWith('/english/words/autocomplete/', { params: { q: 'hel', limit: 5 } })
+      expect(result).toEqual(mockResponse)
+    })
+
     it('应该创建单词', async () => {
       const wordData = { word: 'hello', translation: '你好' }
       const mockResponse = { id: 1, ...wordData }
@@ -98,9 +108,9 @@ describe('englishAPI', () => {
       ]
       mockRequest.get.mockResolvedValue(mockResponse)
 
-      const result = await englishAPI.getDueReviews({ limit: 10 })
+      const result = await englishAPI.getDueReviews({ page_size: 10 })
       
-      expect(mockRequest.get).toHaveBeenCalledWith('/english/progress/review/', { params: { limit: 10 } })
+      expect(mockRequest.get).toHaveBeenCalledWith('/english/progress/due/', { params: { page_size: 10 } })
       expect(result).toEqual(mockResponse)
     })
 
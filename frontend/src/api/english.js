@@ -9,6 +9,10 @@ export const englishAPI = {
   getWord(id) {
     return request.get(`/english/words/${id}/`)
   },
+  // 单词前缀自动补全
+  autocompleteWords(q, limit = 10) {
+    return request.get('/english/words/autocomplete/', { params: { q, limit } })
+  },
   createWord(data) {
     return request.post('/english/words/', data)
   },
@@ -23,9 +27,13 @@ export const englishAPI = {
   getProgress(params = {}) {
     return request.get('/english/progress/', { params })
   },
-  // 复习列表（到期）
+  // 复习列表（到期），params: { page_size, cursor }，下一页传上一页返回的 pagination.next_cursor
   getDueReviews(params = {}) {
-    return request.get('/english/progress/review/', { params })
+    return request.get('/english/progress/due/', { params })
+  },
+  // 接下来 limit 张到期卡片（服务端缓存的复习队列），供复习界面预取
+  getNextDueCards(limit = 10) {
+    return request.get('/english/progress/next-due/', { params: { limit } })
   },
   // 复习打卡（detail 动作）
   reviewProgress(id, payload) {
@@ -120,6 +128,15 @@ export const englishAPI = {
       } 
     })
   },
+  // 静态章节包地址和内容哈希（包文件由nginx提供，可按哈希永久缓存）
+  getTypingChapterPack(params = {}) {
+    return request.get('/english/typing-words/chapter_pack/', {
+      params: {
+        dictionary_id: params.dictionary_id,
+        chapter: params.chapter
+      }
+    })
+  },
   // 打字练习相关API
   getTypingWords(params = {}) {
     return request.get('/english/typing-practice/words/', { params })
@@ -139,6 +156,9 @@ export const englishAPI = {
   submitTypingResult(data) {
     return request.post('/english/typing-practice/submit/', data)
   },
+  submitTypingBatch(data) {
+    return request.post('/english/typing-practice/submit_batch/', data)
+  },
   getTypingStatistics() {
     return request.get('/english/typing-practice/statistics/')
   },
@@ -187,9 +207,28 @@ export const dataAnalysisAPI = {
   getKeyErrorStats() {
     return request.get('/english/data-analysis/key_error_stats/')
   },
+  // 每日及日期范围的p50/p90/p99，params: { metric: 'wpm' | 'response_time', start_date, end_date }
+  getPercentiles(params = {}) {
+    return request.get('/english/data-analysis/percentiles/', { params })
+  },
+  getSessionPercentiles(sessionId) {
+    return request.get('/english/data-analysis/session-percentiles/', { params: { session_id: sessionId } })
+  },
+  // 平均按键间隔最长的字母组合，params: { limit, min_samples }
+  getKeyLatency(params = {}) {
+    return request.get('/english/data-analysis/key-latency/', { params })
+  },
   // 新增：获取月历热力图数据
   getMonthlyCalendar(params = {}) {
     return request.get('/english/data-analysis/monthly-calendar/', { params })
+  },
+  // 获取全年12个月的月历数据
+  getYearlyCalendar(params = {}) {
+    return request.get('/english/data-analysis/yearly-calendar/', { params })
+  },
+  // 一次获取全部面板，params.panels 为逗号分隔的面板名
+  getDashboard(params = {}) {
+    return request.get('/english/data-analysis/dashboard/', { params })
   }
 }
 
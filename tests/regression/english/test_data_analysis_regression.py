@@ -171,6 +171,10 @@ class TestDataAnalysisService(TestCase):
                 timing=[100, 200, 300],
                 session_date=date
             )
+        
+        # 直接创建的原始记录不经过提交接口，需要重建每日统计
+        from apps.english.services import DataAnalysisService
+        DataAnalysisService().rebuild_daily_stats([self.user.id])
     
     def test_exercise_heatmap_data_generation(self):
         """测试练习次数热力图数据生成"""
@@ -533,6 +537,10 @@ class TestDataAnalysisService(TestCase):
                 timing=[100, 200, 300],
                 session_date=date
             )
+        
+        # 直接创建的原始记录不经过提交接口，需要重建每日统计
+        from apps.english.services import DataAnalysisService
+        DataAnalysisService().rebuild_daily_stats([self.user.id])
     
     def test_exercise_heatmap_data_generation(self):
         """测试练习次数热力图数据生成"""
@@ -0,0 +1,89 @@
+"""
+每日练习统计测试
+验证提交时按 (用户, 日期) 增量upsert、分块重建与增量结果一致，以及热力图/趋势图只读汇总行
+"""
+
+import os
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.english.models import DailyPracticeStats, Dictionary, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+class DailyPracticeStatsTest(TestCase):
+    """每日练习统计测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='dailyuser',
+            email='daily@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(name='每日词库', category='测试')
+        self.word = TypingWord.objects.create(word='daily', translation='每日', dictionary=self.dictionary, chapter=1)
+        self.service = DataAnalysisService()
+
+    def _submit(self, *items):
+        TypingPracticeService().record_results(self.user, [
+            {'word_id': self.word.id, 'is_correct': correct, 'typing_speed': speed,
+             'response_time': 2.0, 'mistakes': {}, 'wrong_count': wrong}
+            for correct, speed, wrong in items
+        ])
+
+    def _stats(self):
+        return DailyPracticeStats.objects.get(user=self.user, date=timezone.now().date())
+
+    def _fields(self, stats):
+        return {field: getattr(stats, field) for field in (*DataAnalysisService.DAILY_COUNTER_FIELDS,
+                                                           'avg_wpm', 'accuracy_rate')}
+
+    def test_submits_accumulate_counters(self):
+        """测试多次提交累加到同一天的统计行"""
+        self._submit((True, 60.0, 0), (False, 40.0, 2))
+        self._submit((True, 0.0, 1))
+
+        stats = self._stats()
+        self.assertEqual(
+            (stats.word_count, stats.correct_count, stats.wpm_count, stats.wrong_count),
+            (3, 2, 2, 3)
+        )
+        self.assertEqual(stats.wpm_sum, 100.0)
+        self.assertEqual(stats.total_time, 6000.0)
+        self.assertEqual(stats.avg_wpm, 50.0)
+        self.assertAlmostEqual(stats.accuracy_rate, 200 / 3)
+
+    def test_rebuild_matches_incremental(self):
+        """测试分块重建的结果与增量维护一致"""
+        self._submit((True, 60.0, 0), (False, 40.0, 2))
+        self._submit((True, 0.0, 1))
+        incremental = self._fields(self._stats())
+        DailyPracticeStats.objects.filter(user=self.user).update(word_count=0, wpm_sum=0)
+
+        call_command('rebuild_daily_practice_stats', '--chunk-size', '1', stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(self._fields(self._stats()), incremental)
+
+    def test_trends_read_rollups(self):
+        """测试热力图和趋势图每个接口只查询一次汇总表"""
+        self._submit((True, 60.0, 0), (False, 40.0, 2))
+        start_date = timezone.now() - timedelta(days=365)
+        end_date = timezone.now()
+        today = timezone.now().date().strftime('%Y-%m-%d')
+
+        with self.assertNumQueries(4):
+            exercise = self.service.get_exercise_heatmap(self.user.id, start_date, end_date)
+            words = self.service.get_word_heatmap(self.user.id, start_date, end_date)
+            wpm = self.service.get_wpm_trend(self.user.id, start_date, end_date)
+            accuracy = self.service.get_accuracy_trend(self.user.id, start_date, end_date)
+
+        self.assertEqual(exercise, [{'date': today, 'count': 2, 'level': 1}])
+        self.assertEqual(words, [{'date': today, 'count': 2, 'level': 1}])
+        self.assertEqual(wpm, [[today, 50.0]])
+        self.assertEqual(accuracy, [[today, 50.0]])
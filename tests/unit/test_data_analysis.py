@@ -94,6 +94,9 @@ class DataAnalysisServiceTest(TestCase):
             key='c',
             error_count=5
         )
+        
+        # 直接创建的原始记录不经过提交接口，需要重建每日统计
+        DataAnalysisService().rebuild_daily_stats([self.user.id])
     
     def test_get_exercise_heatmap(self):
         """测试获取练习次数热力图数据"""
@@ -204,7 +207,26 @@ class DataAnalysisServiceTest(TestCase):
         self.assertIsInstance(data['avg_wpm'], float)
         self.assertIsInstance(data['avg_accuracy'], float)
         self.assertIsInstance(data['date_range'], list)
-    
+
+    def test_data_overview_aggregated_in_database(self):
+        """测试概览从每日汇总计算，结果与逐条计算一致，练习次数为按间隔切分的练习轮数"""
+        start_date = timezone.now() - timedelta(days=2)
+        end_date = timezone.now()
+
+        with self.assertNumQueries(1):
+            data = self.service.get_data_overview(self.user.id, start_date, end_date)
+
+        records = TypingPracticeRecord.objects.filter(
+            user=self.user, session_date__gte=start_date.date()
+        )
+        total_letters = sum(len(r.word) for r in records)
+        correct_letters = sum(len(r.word) - r.wrong_count for r in records)
+        self.assertEqual(data['total_exercises'], 1)  # 所有记录连续写入，只有一轮
+        self.assertEqual(data['total_words'], records.count())
+        self.assertEqual(data['total_letters'], total_letters)
+        self.assertEqual(data['correct_letters'], correct_letters)
+        self.assertEqual(data['avg_accuracy'], round(correct_letters / total_letters * 100, 2))
+
     def test_get_heatmap_level(self):
         """测试热力图等级计算"""
         # 测试不同数量的等级
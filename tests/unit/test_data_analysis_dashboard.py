@@ -0,0 +1,77 @@
+"""
+数据分析看板接口测试
+验证一次请求返回的各面板与单独接口一致、panels 选择、ETag 条件请求，以及查询次数
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english.models import Dictionary, KeyErrorStats, TypingWord
+from apps.english.services import TypingPracticeService
+
+User = get_user_model()
+
+
+class DataAnalysisDashboardTest(TestCase):
+    """数据分析看板接口测试"""
+
+    url = '/api/v1/english/data-analysis/dashboard/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='dashboarduser',
+            email='dashboard@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        dictionary = Dictionary.objects.create(name='看板词库', category='测试')
+        word = TypingWord.objects.create(word='panel', translation='面板', dictionary=dictionary, chapter=1)
+        TypingPracticeService().record_results(self.user, [
+            {'word_id': word.id, 'is_correct': correct, 'typing_speed': speed,
+             'response_time': 2.0, 'mistakes': {}, 'wrong_count': wrong}
+            for correct, speed, wrong in [(True, 60.0, 0), (False, 40.0, 2), (True, 50.0, 1)]
+        ])
+        KeyErrorStats.objects.create(user=self.user, key='a', error_count=3)
+
+    def test_panels_match_individual_endpoints(self):
+        """测试看板各面板与单独接口返回一致"""
+        today = timezone.now().date()
+        params = {'start_date': '2000-01-01', 'end_date': today.strftime('%Y-%m-%d')}
+
+        dashboard = self.client.get(self.url, params).data['data']
+
+        for panel in ('exercise_heatmap', 'word_heatmap', 'wpm_trend', 'accuracy_trend', 'key_error_stats', 'overview'):
+            single = self.client.get(f'/api/v1/english/data-analysis/{panel}/', params).data['data']
+            self.assertEqual(dashboard[panel], single, panel)
+        calendar = self.client.get('/api/v1/english/data-analysis/monthly-calendar/').data['data']
+        self.assertEqual(dashboard['monthly_calendar'], calendar)
+        self.assertEqual(dashboard['overview']['total_words'], 3)
+
+    def test_panels_selector(self):
+        """测试只返回请求的面板，未知面板返回400"""
+        response = self.client.get(self.url, {'panels': 'wpm_trend,overview'})
+        invalid = self.client.get(self.url, {'panels': 'wpm_trend,unknown'})
+
+        self.assertEqual(set(response.data['data']), {'wpm_trend', 'overview'})
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_daily_rows_fetched_once(self):
+        """测试热力图、趋势图和概览共用一次每日统计查询"""
+        panels = 'exercise_heatmap,word_heatmap,wpm_trend,accuracy_trend,overview'
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'panels': panels})
+
+    def test_etag_not_modified(self):
+        """测试内容未变化时返回304"""
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second['ETag'], first['ETag'])
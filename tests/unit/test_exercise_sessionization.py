@@ -0,0 +1,111 @@
+"""
+练习轮次切分测试
+验证按时间间隔切分练习轮次：提交时增量计数、窗口函数重建与增量一致、跨零点和可配置间隔
+"""
+
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.english.models import DailyPracticeStats, Dictionary, TypingPracticeRecord, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+class ExerciseSessionizationTest(TestCase):
+    """练习轮次切分测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sessionuser',
+            email='session@example.com',
+            password='testpass123'
+        )
+        dictionary = Dictionary.objects.create(name='轮次词库', category='测试')
+        self.word = TypingWord.objects.create(word='gap', translation='间隔', dictionary=dictionary, chapter=1)
+        self.service = DataAnalysisService()
+
+    def _submit(self, count=1):
+        TypingPracticeService().record_results(self.user, [
+            {'word_id': self.word.id, 'is_correct': True, 'typing_speed': 60.0,
+             'response_time': 1.0, 'mistakes': {}, 'wrong_count': 0}
+        ] * count)
+
+    def _record(self, created_at):
+        record = TypingPracticeRecord.objects.create(
+            user=self.user, word='gap', is_correct=True, typing_speed=60.0,
+            response_time=1.0, total_time=1000, wrong_count=0
+        )
+        TypingPracticeRecord.objects.filter(id=record.id).update(
+            created_at=created_at, session_date=created_at.date()
+        )
+
+    def _session_counts(self):
+        return dict(DailyPracticeStats.objects.filter(user=self.user).values_list('date', 'session_count'))
+
+    def test_count_session_starts(self):
+        """测试间隔不小于阈值时开始新的一轮，一轮计入第一条记录的日期"""
+        base = datetime(2024, 3, 1, 23, 0)
+        records = [
+            TypingPracticeRecord(created_at=base + timedelta(minutes=m), session_date=(base + timedelta(minutes=m)).date())
+            for m in (0, 10, 50, 75, 120)
+        ]
+
+        starts = DataAnalysisService.count_session_starts(records, timedelta(minutes=30), base - timedelta(hours=1))
+
+        # 23:00 / 23:50 / 01:00（次日）各开始一轮，00:15 与 23:50 间隔25分钟属于同一轮
+        self.assertEqual(starts, {date(2024, 3, 1): 2, date(2024, 3, 2): 1})
+
+    def test_submit_counts_new_session_after_gap(self):
+        """测试连续提交属于同一轮，间隔超过阈值后的提交开始新的一轮"""
+        self._submit(2)
+        self._submit(1)
+        TypingPracticeRecord.objects.filter(user=self.user).update(
+            created_at=datetime.now() - timedelta(minutes=45)
+        )
+        self._submit(1)
+
+        today = datetime.now().date()
+        overview = self.service.get_data_overview(
+            self.user.id, datetime.now() - timedelta(days=1), datetime.now()
+        )
+        self.assertEqual(self._session_counts(), {today: 2})
+        self.assertEqual(overview['total_exercises'], 2)
+
+    def test_rebuild_matches_incremental(self):
+        """测试窗口函数重建的练习轮数与逐条切分结果一致，跨零点的一轮只计一次"""
+        base = datetime(2024, 3, 1, 23, 0)
+        for minutes in (0, 10, 50, 75, 120, 600):
+            self._record(base + timedelta(minutes=minutes))
+        records = list(TypingPracticeRecord.objects.filter(user=self.user).order_by('created_at', 'id'))
+
+        self.service.rebuild_daily_stats([self.user.id])
+        expected = DataAnalysisService.count_session_starts(records, timedelta(minutes=30))
+
+        self.assertEqual(self._session_counts(), {date(2024, 3, 1): 2, date(2024, 3, 2): 2})
+        self.assertEqual({day: n for day, n in self._session_counts().items() if n}, expected)
+
+    def test_rebuild_single_date_sees_previous_day(self):
+        """测试只重建某一天时，从前一天延续过来的一轮不会被算成新的一轮"""
+        base = datetime(2024, 3, 1, 23, 50)
+        self._record(base)
+        self._record(base + timedelta(minutes=20))
+
+        self.service.rebuild_daily_stats([self.user.id], dates=[date(2024, 3, 2)])
+
+        self.assertEqual(self._session_counts(), {date(2024, 3, 2): 0})
+
+    def test_configurable_gap(self):
+        """测试重建时可以指定切分间隔"""
+        base = datetime(2024, 3, 1, 9, 0)
+        self._record(base)
+        self._record(base + timedelta(minutes=45))
+
+        self.service.rebuild_daily_stats([self.user.id])
+        default_gap = self._session_counts()[date(2024, 3, 1)]
+        self.service.rebuild_daily_stats([self.user.id], gap_minutes=60)
+
+        self.assertEqual(default_gap, 2)
+        self.assertEqual(self._session_counts()[date(2024, 3, 1)], 1)
@@ -0,0 +1,99 @@
+"""
+按键错误统计批量upsert测试
+验证一次提交只执行一条SQL、数据库端累加，以及从原始记录流式重建
+"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.english.models import KeyErrorStats, TypingPracticeRecord
+from apps.english.services import DataAnalysisService
+
+User = get_user_model()
+
+
+class KeyErrorStatsUpsertTest(TestCase):
+    """按键错误统计批量upsert测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='keyuser',
+            email='key@example.com',
+            password='testpass123'
+        )
+        self.service = DataAnalysisService()
+
+    def _counts(self):
+        return dict(KeyErrorStats.objects.filter(user=self.user).values_list('key', 'error_count'))
+
+    def test_single_statement(self):
+        """测试多个按键只执行一条SQL"""
+        mistakes = {'a': ['s', 'd'], 'b': ['v'], 'c': ['x'], 'e': ['r', 'w', 'q']}
+
+        with self.assertNumQueries(1):
+            self.service.update_key_error_stats(self.user.id, mistakes)
+
+        self.assertEqual(self._counts(), {'A': 2, 'B': 1, 'C': 1, 'E': 3})
+
+    def test_increments_existing_rows(self):
+        """测试已有按键在数据库端累加"""
+        self.service.update_key_error_stats(self.user.id, {'a': ['s'], 'b': ['v']})
+        self.service.update_key_error_stats(self.user.id, {'a': ['s', 'q'], 'z': ['x']})
+
+        self.assertEqual(self._counts(), {'A': 3, 'B': 1, 'Z': 1})
+
+    def test_merges_case_and_skips_empty(self):
+        """测试大小写合并、空错误跳过"""
+        with self.assertNumQueries(0):
+            self.service.update_key_error_stats(self.user.id, {'a': []})
+
+        self.service.update_key_error_stats(self.user.id, {'a': ['s'], 'A': ['d'], 'b': []})
+
+        self.assertEqual(self._counts(), {'A': 2})
+
+    def test_rebuild_from_records_replaces_counts(self):
+        """测试从练习记录重建时覆盖旧值"""
+        KeyErrorStats.objects.create(user=self.user, key='A', error_count=99)
+        for mistakes in [{'a': ['s', 'd']}, {'a': ['q'], 'k': 1}]:
+            TypingPracticeRecord.objects.create(
+                user=self.user, word='ak', is_correct=False, typing_speed=30,
+                response_time=2.0, total_time=2000, wrong_count=1, mistakes=mistakes
+            )
+
+        self.service.update_key_error_stats_from_records(self.user.id)
+
+        self.assertEqual(self._counts(), {'A': 3, 'K': 1})
+
+    def _record(self, user, mistakes):
+        TypingPracticeRecord.objects.create(
+            user=user, word='ak', is_correct=False, typing_speed=30,
+            response_time=2.0, total_time=2000, wrong_count=1, mistakes=mistakes
+        )
+
+    def test_rebuild_removes_stale_keys(self):
+        """测试重建时删除原始记录中已不存在的按键，分批读取结果不变"""
+        KeyErrorStats.objects.create(user=self.user, key='Z', error_count=5)
+        for _ in range(5):
+            self._record(self.user, {'a': ['s']})
+
+        written = self.service.update_key_error_stats_from_records(self.user.id, chunk_size=2)
+
+        self.assertEqual(written, 1)
+        self.assertEqual(self._counts(), {'A': 5})
+
+    def test_rebuild_command(self):
+        """测试重建命令处理有记录和只有残留统计的用户，并汇报进度"""
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self._record(self.user, {'a': ['s', 'd']})
+        KeyErrorStats.objects.create(user=other, key='Q', error_count=7)
+        out = StringIO()
+
+        call_command('rebuild_key_error_stats', '--batch-size', '1', stdout=out)
+
+        self.assertEqual(self._counts(), {'A': 2})
+        self.assertFalse(KeyErrorStats.objects.filter(user=other).exists())
+        self.assertIn('已处理 1/2 个用户', out.getvalue())
+        self.assertIn('已处理 2/2 个用户', out.getvalue())
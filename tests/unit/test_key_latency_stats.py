@@ -0,0 +1,89 @@
+"""
+按键间隔统计测试
+验证逐字符用时的校验、按字母组合的在线合并（均值和方差与全量计算一致），以及最慢字母组合接口
+"""
+
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english.models import Dictionary, KeyLatencyStats, TypingPracticeRecord, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+class KeyLatencyStatsTest(TestCase):
+    """按键间隔统计测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='latencyuser',
+            email='latency@example.com',
+            password='testpass123'
+        )
+        dictionary = Dictionary.objects.create(name='间隔词库', category='测试')
+        self.word = TypingWord.objects.create(word='Then', translation='然后', dictionary=dictionary, chapter=1)
+        self.service = DataAnalysisService()
+
+    def _item(self, timing):
+        item, error = TypingPracticeService().validate_submission({
+            'word_id': self.word.id, 'is_correct': True, 'typing_speed': 60, 'response_time': 1.0, 'timing': timing
+        })
+        self.assertIsNone(error)
+        return item
+
+    def test_count_bigram_latencies(self):
+        """测试差分编码的用时按字母组合汇总，长度不一致的记录跳过"""
+        records = [
+            TypingPracticeRecord(word='abab', timing=[0, 100, 300, 200]),
+            TypingPracticeRecord(word='ab', timing=[0]),
+        ]
+
+        stats = DataAnalysisService.count_bigram_latencies(records)
+
+        self.assertEqual(set(stats), {'ab', 'ba'})
+        self.assertEqual(stats['ab'], (2, 150.0, 5000.0))
+        self.assertEqual(stats['ba'], (1, 300.0, 0.0))
+
+    def test_online_merge_matches_full_computation(self):
+        """测试多次提交在数据库端合并的均值和方差与全部样本直接计算一致，每批一条SQL"""
+        batches = [[[0, 120, 80, 95]], [[0, 200, 60, 110], [0, 90, 75, 130]], [[0, 150, 85, 100]]]
+        for batch in batches:
+            TypingPracticeService().record_results(self.user, [self._item(timing) for timing in batch])
+
+        samples = [timing[1] for batch in batches for timing in batch]  # 't' -> 'h'
+        stat = KeyLatencyStats.objects.get(user=self.user, bigram='th')
+        self.assertEqual(stat.sample_count, 4)
+        self.assertAlmostEqual(stat.mean_ms, statistics.mean(samples))
+        self.assertAlmostEqual(stat.std_ms, statistics.stdev(samples))
+
+        with self.assertNumQueries(1):
+            self.service.upsert_key_latency_stats(self.user.id, {'th': (1, 100.0, 0.0), 'he': (1, 70.0, 0.0)})
+
+    def test_validate_timing(self):
+        """测试拒绝非整数、负数、超长和超出上限的用时"""
+        service = TypingPracticeService()
+        base = {'word_id': self.word.id, 'is_correct': True}
+        for timing in ('0,100', [0, -1], [0, 1.5], [True], [0] * 101, [0, 60 * 1000 + 1]):
+            item, error = service.validate_submission({**base, 'timing': timing})
+            self.assertIsNone(item, timing)
+            self.assertIn('timing', error)
+
+    def test_key_latency_endpoint(self):
+        """测试接口按平均间隔降序返回样本数足够的字母组合"""
+        TypingPracticeService().record_results(self.user, [self._item([0, 300, 100, 200])] * 5)
+        TypingPracticeService().record_results(self.user, [self._item([0, 300, 100, 900])])
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.get('/api/v1/english/data-analysis/key-latency/', {'limit': 2})
+        invalid = client.get('/api/v1/english/data-analysis/key-latency/', {'limit': 'x'})
+
+        self.assertEqual([row['bigram'] for row in response.data['data']], ['en', 'th'])
+        self.assertEqual(response.data['data'][0]['count'], 6)
+        self.assertEqual(response.data['data'][0]['mean_ms'], 316.67)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,114 @@
+"""
+学习计划每日批次测试
+验证批量生成时复习与新单词的配比、新单词的排序与排除、表达轮换、幂等性，以及读取接口
+"""
+
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.english.models import Expression, LearningPlan, LearningPlanDailyBatch, UserWordProgress, Word
+from apps.english.services import LearningPlanService
+
+User = get_user_model()
+
+
+class LearningPlanBatchTest(TestCase):
+    """学习计划每日批次测试"""
+
+    def setUp(self):
+        self.today = date.today()
+        self.alice = User.objects.create_user(username='planalice', email='alice@example.com', password='testpass123')
+        self.bob = User.objects.create_user(username='planbob', email='bob@example.com', password='testpass123')
+        # 难度从高到低、词频从低到高创建，验证排序不依赖插入顺序；词频为0的视为未排名
+        self.words = Word.objects.bulk_create(
+            [Word(word=f'adv{i}', difficulty_level='advanced', frequency_rank=i + 1) for i in range(5)]
+            + [Word(word=f'beg{i}', difficulty_level='beginner', frequency_rank=20 - i) for i in range(20)]
+            + [Word(word='unranked', difficulty_level='beginner', frequency_rank=0)]
+        )
+        self.beginner = sorted(self.words[5:25], key=lambda word: word.frequency_rank)
+        self.expressions = Expression.objects.bulk_create([Expression(expression=f'expr{i}') for i in range(5)])
+        self.alice_plan = LearningPlan.objects.create(
+            user=self.alice, name='A', daily_word_target=10, daily_expression_target=2, start_date=self.today
+        )
+        self.bob_plan = LearningPlan.objects.create(
+            user=self.bob, name='B', daily_word_target=5, daily_expression_target=2,
+            start_date=self.today - timedelta(days=1)
+        )
+        LearningPlan.objects.create(
+            user=self.bob, name='ended', start_date=self.today - timedelta(days=9),
+            end_date=self.today - timedelta(days=1)
+        )
+        # alice 有8个今天到期的复习，以及1个未到期的单词（不能再作为新单词）
+        now = datetime.now()
+        self.due = [
+            UserWordProgress.objects.create(user=self.alice, word=word, next_review_date=now - timedelta(hours=8 - i))
+            for i, word in enumerate(self.beginner[:8])
+        ]
+        UserWordProgress.objects.create(user=self.alice, word=self.beginner[8], next_review_date=now + timedelta(days=3))
+
+    def test_build_daily_batches(self):
+        """测试复习最多占70%名额、新单词按难度和词频排序并排除已学单词，表达按计划天数轮换"""
+        # 计划、到期复习、一块候选单词及其已学记录、表达、写入，与用户数无关
+        with self.assertNumQueries(6):
+            built = LearningPlanService.build_daily_batches(self.today)
+
+        alice = LearningPlanDailyBatch.objects.get(plan=self.alice_plan, date=self.today)
+        bob = LearningPlanDailyBatch.objects.get(plan=self.bob_plan, date=self.today)
+        self.assertEqual(built, 2)
+        self.assertEqual(alice.review_count, 7)
+        self.assertEqual(alice.word_ids, [p.word_id for p in self.due[:7]] + [w.id for w in self.beginner[9:12]])
+        self.assertEqual((bob.review_count, bob.word_ids), (0, [w.id for w in self.beginner[:5]]))
+        self.assertEqual(alice.expression_ids, [e.id for e in self.expressions[:2]])
+        self.assertEqual(bob.expression_ids, [e.id for e in self.expressions[2:4]])
+
+        self.assertEqual(LearningPlanService.build_daily_batches(self.today), 0)
+        self.assertEqual(LearningPlanService.build_daily_batches(self.today, rebuild=True), 2)
+        self.assertEqual(LearningPlanDailyBatch.objects.count(), 2)
+
+    def test_new_words_across_chunks(self):
+        """测试按游标分块读取时跨块、跨难度段的顺序与一次读完相同，未排名单词排在同难度的已排名单词之后"""
+        Word.objects.filter(id__in=[w.id for w in self.beginner[10:]]).update(is_deleted=True)
+
+        with patch.object(LearningPlanService, 'NEW_WORD_CHUNK', 3):
+            picked = LearningPlanService._new_words({self.alice.id: 4, self.bob.id: 12})
+
+        adv = [w.id for w in self.words[:5]]
+        self.assertEqual(picked[self.alice.id], [self.beginner[9].id, self.words[25].id] + adv[:2])
+        self.assertEqual(picked[self.bob.id], [w.id for w in self.beginner[:10]] + [self.words[25].id] + adv[:1])
+
+    def test_new_words_fill_when_reviews_short(self):
+        """测试新单词不够时剩余名额给复习"""
+        Word.objects.exclude(id__in=[p.word_id for p in self.due]).update(is_deleted=True)
+
+        LearningPlanService.build_daily_batches(self.today, plan_ids=[self.alice_plan.id])
+
+        batch = LearningPlanDailyBatch.objects.get(plan=self.alice_plan)
+        self.assertEqual(batch.word_ids, [p.word_id for p in self.due])
+
+    def test_daily_endpoints_read_batch(self):
+        """测试接口读取批次（不存在时当场生成），修改计划后按新目标重新生成"""
+        client = APIClient()
+        client.force_authenticate(user=self.bob)
+        url = f'/api/v1/english/plans/{self.bob_plan.id}/'
+
+        words = client.get(f'{url}daily_words/')
+        expressions = client.get(f'{url}daily_expressions/')
+        client.patch(url, {'daily_word_target': 2}, format='json')
+        updated = client.get(f'{url}daily_words/')
+
+        self.assertEqual([w['word'] for w in words.data['data']], [w.word for w in self.beginner[:5]])
+        self.assertEqual(len(expressions.data['data']), 2)
+        self.assertEqual([w['word'] for w in updated.data['data']], [w.word for w in self.beginner[:2]])
+
+    def test_daily_words_skip_deleted(self):
+        """测试批次生成后被删除的单词不再返回"""
+        LearningPlanService.build_daily_batches(self.today, plan_ids=[self.bob_plan.id])
+        Word.objects.filter(id=self.beginner[1].id).update(is_deleted=True)
+
+        words = LearningPlanService.get_daily_words(self.bob, self.bob_plan)
+
+        self.assertEqual([w.id for w in words], [w.id for w in self.beginner[:5] if w != self.beginner[1]])
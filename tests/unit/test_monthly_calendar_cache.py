@@ -0,0 +1,95 @@
+"""
+月历缓存测试
+验证月历按 (用户, 年, 月) 缓存、当前月份在提交时增量修补、补写历史数据后失效，以及年视图
+"""
+
+from datetime import date, datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.english.models import DailyPracticeStats, Dictionary, TypingPracticeRecord, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class MonthlyCalendarCacheTest(TestCase):
+    """月历缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='calendaruser',
+            email='calendar@example.com',
+            password='testpass123'
+        )
+        dictionary = Dictionary.objects.create(name='月历词库', category='测试')
+        self.word = TypingWord.objects.create(word='month', translation='月', dictionary=dictionary, chapter=1)
+        self.service = DataAnalysisService()
+        self.today = datetime.now().date()
+
+    def _submit(self, count=1):
+        return TypingPracticeService().record_results(self.user, [
+            {'word_id': self.word.id, 'is_correct': True, 'typing_speed': 60.0,
+             'response_time': 1.0, 'mistakes': {}, 'wrong_count': 0}
+        ] * count)['practice_session']
+
+    def _fresh(self, year, month):
+        return self.service._build_monthly_calendar(self.user.id, year, month)
+
+    def test_past_month_cached_forever(self):
+        """测试已结束的月份缓存后不再查询，且不设过期时间"""
+        DailyPracticeStats.objects.create(user=self.user, date=date(2020, 3, 9), word_count=6)
+        first = self.service.get_monthly_calendar_data(self.user.id, 2020, 3)
+
+        with self.assertNumQueries(0):
+            second = self.service.get_monthly_calendar_data(self.user.id, 2020, 3)
+
+        self.assertEqual(first, second)
+        self.assertEqual(second['month_stats']['total_words'], 6)
+        self.assertIsNone(self.service._calendar_timeout(2020, 3))
+
+    def test_current_month_patched_on_submit(self):
+        """测试当前月份在提交时增量修补，结算会话不改变练习轮数，结果与重新计算一致"""
+        self._submit(2)
+        self.service.get_monthly_calendar_data(self.user.id, self.today.year, self.today.month)
+
+        practice_session = self._submit(3)
+        practice_session.complete_session()
+
+        with self.assertNumQueries(0):
+            patched = self.service.get_monthly_calendar_data(self.user.id, self.today.year, self.today.month)
+        self.assertEqual(patched['month_stats']['total_words'], 5)
+        self.assertEqual(patched['month_stats']['total_exercises'], 1)
+        self.assertEqual(patched, self._fresh(self.today.year, self.today.month))
+
+    def test_backdated_rebuild_invalidates(self):
+        """测试补写历史数据并重建后，已缓存的历史月份失效"""
+        self.service.get_monthly_calendar_data(self.user.id, 2020, 3)
+        record = TypingPracticeRecord.objects.create(
+            user=self.user, word='month', is_correct=True, typing_speed=60.0,
+            response_time=1.0, total_time=1000, wrong_count=0
+        )
+        TypingPracticeRecord.objects.filter(id=record.id).update(session_date=date(2020, 3, 9))
+
+        self.service.rebuild_daily_stats([self.user.id])
+
+        data = self.service.get_monthly_calendar_data(self.user.id, 2020, 3)
+        self.assertEqual(data['month_stats']['total_words'], 1)
+
+    def test_yearly_calendar(self):
+        """测试年视图一次返回12个月，未缓存的月份共用一条查询"""
+        DailyPracticeStats.objects.create(user=self.user, date=date(2020, 3, 9), word_count=6)
+        DailyPracticeStats.objects.create(user=self.user, date=date(2020, 11, 2), word_count=4)
+        self.service.get_monthly_calendar_data(self.user.id, 2020, 3)
+
+        with self.assertNumQueries(1):
+            data = self.service.get_yearly_calendar_data(self.user.id, 2020)
+
+        self.assertEqual([m['month'] for m in data['months']], list(range(1, 13)))
+        self.assertEqual(data['months'][10], self._fresh(2020, 11))
+        with self.assertNumQueries(0):
+            self.service.get_yearly_calendar_data(self.user.id, 2020)
@@ -0,0 +1,121 @@
+"""
+分位数分布测试
+验证分位数草图的误差与可合并性、提交时增量合并与重建一致，以及每日/会话分位数接口
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english import quantile_sketch
+from apps.english.models import DailyPracticeStats, Dictionary, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+class QuantileSketchTest(TestCase):
+    """分位数草图测试"""
+
+    def test_relative_error_and_merge(self):
+        """测试分位数相对误差不超过上限，分批合并与整体构建结果相同"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(4, 0.6) for _ in range(5000)] + [0.0] * 10
+        whole = quantile_sketch.add_values({}, values)
+        parts = [quantile_sketch.add_values({}, values[i::3]) for i in range(3)]
+
+        merged = quantile_sketch.merge(*parts)
+        estimates = quantile_sketch.quantiles(merged, [0.0, 0.5, 0.9, 0.99])
+
+        self.assertEqual(merged, whole)
+        ordered = sorted(values)
+        self.assertEqual(estimates[0.0], 0.0)
+        for q in (0.5, 0.9, 0.99):
+            exact = ordered[math.floor(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(estimates[q] - exact) / exact, quantile_sketch.RELATIVE_ACCURACY)
+
+    def test_empty(self):
+        """测试空草图返回None"""
+        self.assertEqual(quantile_sketch.quantiles({}, [0.5]), {0.5: None})
+
+
+class PercentileDistributionTest(TestCase):
+    """每日及会话分位数测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='percentileuser',
+            email='percentile@example.com',
+            password='testpass123'
+        )
+        dictionary = Dictionary.objects.create(name='分位词库', category='测试')
+        self.word = TypingWord.objects.create(word='tail', translation='尾部', dictionary=dictionary, chapter=1)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.service = DataAnalysisService()
+
+    def _submit(self, speeds):
+        return TypingPracticeService().record_results(self.user, [
+            {'word_id': self.word.id, 'is_correct': True, 'typing_speed': speed,
+             'response_time': 60 / speed if speed else 30.0, 'mistakes': {}, 'wrong_count': 0}
+            for speed in speeds
+        ])['practice_session']
+
+    def _assert_close(self, estimate, exact):
+        """草图误差上限加上保留两位小数的舍入误差"""
+        self.assertLessEqual(abs(estimate - exact), exact * quantile_sketch.RELATIVE_ACCURACY + 0.01)
+
+    def _sketches(self):
+        stats = DailyPracticeStats.objects.get(user=self.user)
+        return stats.wpm_sketch, stats.response_time_sketch
+
+    def test_incremental_matches_rebuild(self):
+        """测试多次提交增量合并的草图与从原始记录重建的一致，WPM为0的记录不计入WPM分布"""
+        self._submit([40, 50, 60])
+        self._submit([0, 55, 200])
+        incremental = self._sketches()
+
+        self.service.rebuild_daily_stats([self.user.id])
+
+        self.assertEqual(self._sketches(), incremental)
+        self.assertEqual(quantile_sketch.total_count(incremental[0]), 5)
+        self.assertEqual(quantile_sketch.total_count(incremental[1]), 6)
+
+    def test_percentiles_endpoint(self):
+        """测试p99暴露出被平均值掩盖的慢速单词，整个范围只查询一次汇总表"""
+        self._submit([60] * 98 + [5, 5])
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        with self.assertNumQueries(1):
+            data = self.service.get_percentile_trend(
+                self.user.id, datetime.now() - timedelta(days=365), datetime.now(), 'response_time'
+            )
+        response = self.client.get('/api/v1/english/data-analysis/percentiles/', {'metric': 'wpm'})
+        invalid = self.client.get('/api/v1/english/data-analysis/percentiles/', {'metric': 'avg'})
+
+        self.assertEqual(data['daily'][0]['date'], today)
+        self._assert_close(data['overall']['p50'], 1.0)
+        self._assert_close(data['overall']['p99'], 12.0)
+        wpm = response.data['data']['overall']
+        self.assertEqual(wpm['count'], 100)
+        self._assert_close(wpm['p50'], 60)
+        self._assert_close(wpm['p99'], 60)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_session_percentiles(self):
+        """测试会话分位数精确计算，不存在的会话返回404"""
+        practice_session = self._submit([10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 110])
+        url = '/api/v1/english/data-analysis/session-percentiles/'
+
+        response = self.client.get(url, {'session_id': practice_session.id})
+        missing = self.client.get(url, {'session_id': practice_session.id + 1})
+        invalid = self.client.get(url)
+
+        self.assertEqual(response.data['data']['wpm'], {'count': 11, 'p50': 60, 'p90': 100, 'p99': 100})
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
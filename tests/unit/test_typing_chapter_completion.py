@@ -0,0 +1,94 @@
+"""
+章节完成度测试
+验证提交时增量维护练习过的不同单词数、分组查询重建，以及进度接口只读完成度表
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.english.models import ChapterCompletion, Dictionary, TypingWord, UserTypingStats
+from apps.english.services import TypingPracticeService
+
+User = get_user_model()
+
+
+class ChapterCompletionTest(TestCase):
+    """章节完成度测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='chapteruser',
+            email='chapter@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(name='章节词库', category='测试')
+        # 第1章6个单词，第2章2个单词
+        self.chapter1 = [
+            TypingWord.objects.create(word=f'first{i}', translation='一', dictionary=self.dictionary, chapter=1)
+            for i in range(6)
+        ]
+        self.chapter2 = [
+            TypingWord.objects.create(word=f'second{i}', translation='二', dictionary=self.dictionary, chapter=2)
+            for i in range(2)
+        ]
+        self.service = TypingPracticeService()
+
+    def _submit(self, words):
+        self.service.record_results(self.user, [
+            {'word_id': word.id, 'is_correct': True, 'typing_speed': 60.0,
+             'response_time': 1.0, 'mistakes': {}, 'wrong_count': 0}
+            for word in words
+        ])
+
+    def _practiced(self, chapter):
+        return ChapterCompletion.objects.get(user=self.user, dictionary=self.dictionary, chapter=chapter).practiced_words
+
+    def test_counts_distinct_words_incrementally(self):
+        """测试重复练习同一单词不重复计数"""
+        self._submit(self.chapter1[:3] + [self.chapter1[0]])
+        self._submit(self.chapter1[1:4] + self.chapter2[:1])
+
+        self.assertEqual(self._practiced(1), 4)
+        self.assertEqual(self._practiced(2), 1)
+
+    def test_user_stats_locked_before_reading_seen_words(self):
+        """测试先锁住（必要时先创建）用户统计行，再读取已练习过的单词，重叠的提交不会重复累加"""
+        with CaptureQueriesContext(connection) as queries:
+            self._submit(self.chapter1[:2])
+
+        sqls = [query['sql'] for query in queries]
+        lock = next(i for i, sql in enumerate(sqls) if 'english_user_typing_stats' in sql)
+        seen = next(i for i, sql in enumerate(sqls) if 'DISTINCT' in sql and 'english_typing_session' in sql)
+        self.assertLess(lock, seen)
+        self.assertEqual(UserTypingStats.objects.get(user=self.user).total_words_practiced, 2)
+        self.assertEqual(self._practiced(1), 2)
+
+    def test_rebuild_matches_incremental(self):
+        """测试分组查询重建的结果与增量维护一致"""
+        self._submit(self.chapter1[:5])
+        self._submit(self.chapter1[2:] + self.chapter2)
+        ChapterCompletion.objects.filter(user=self.user).update(practiced_words=0)
+
+        rebuilt = self.service.rebuild_chapter_completion([self.user.id])
+
+        self.assertEqual(rebuilt, 2)
+        self.assertEqual((self._practiced(1), self._practiced(2)), (6, 2))
+
+    def test_progress_endpoint(self):
+        """测试进度接口：5个不同单词或整章单词即算完成"""
+        self._submit(self.chapter1[:4] + self.chapter2)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        url = f'/api/v1/english/typing-practice/progress/?dictionary={self.dictionary.id}'
+
+        before = client.get(url)
+        self._submit(self.chapter1[4:5])
+        with self.assertNumQueries(4):  # 用户 + 词库 + 章节单词数 + 完成度
+            after = client.get(url)
+
+        self.assertEqual(before.data, {'completed_chapters': [2], 'total_chapters': 2, 'completion_rate': 50.0})
+        self.assertEqual(after.data, {'completed_chapters': [1, 2], 'total_chapters': 2, 'completion_rate': 100.0})
@@ -0,0 +1,144 @@
+"""
+打字练习静态章节包测试
+验证build_chapter_packs生成带哈希文件名的章节包、预压缩文件与清单，以及接口返回包地址
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.english.models import Dictionary, TypingWord
+from apps.english import word_packs
+from apps.english.word_packs import get_chapter_pack_info
+
+
+class ChapterPackBuildTest(TestCase):
+    """章节包构建测试"""
+
+    def setUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            TYPING_CHAPTER_PACK_ROOT=self.output_dir.name,
+            TYPING_CHAPTER_PACK_URL='/media/typing_packs/',
+        )
+        self.settings_override.enable()
+
+        self.dictionary = Dictionary.objects.create(name='CET-4', category='中国考试')
+        self.words = [
+            TypingWord.objects.create(word=f'word{i}', translation=f'单词{i}', dictionary=self.dictionary,
+                                      chapter=1 if i < 3 else 2)
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.output_dir.cleanup()
+
+    def _build(self, *args):
+        call_command('build_chapter_packs', *args, stdout=open(os.devnull, 'w'))
+
+    def _pack_path(self, chapter):
+        pack = get_chapter_pack_info(self.dictionary.id, chapter)
+        return os.path.join(self.output_dir.name, pack['url'][len('/media/typing_packs/'):])
+
+    def test_builds_pack_per_chapter_with_manifest(self):
+        """测试每个章节一个文件，清单哈希与内容一致"""
+        self._build()
+
+        pack = get_chapter_pack_info(self.dictionary.id, 1)
+        path = self._pack_path(1)
+        with open(path, 'rb') as f:
+            payload = f.read()
+
+        self.assertEqual(pack['words'], 3)
+        self.assertEqual(pack['hash'], hashlib.sha256(payload).hexdigest())
+        self.assertIn(pack['hash'][:12], pack['url'])
+        self.assertEqual([w['word'] for w in json.loads(payload)['words']], ['word0', 'word1', 'word2'])
+        self.assertEqual(get_chapter_pack_info(self.dictionary.id, 2)['words'], 2)
+        self.assertIsNone(get_chapter_pack_info(self.dictionary.id, 3))
+
+    def test_writes_gzip_variant(self):
+        """测试预压缩文件与原文件内容一致"""
+        self._build()
+
+        path = self._pack_path(1)
+        with open(path, 'rb') as f, gzip.open(f'{path}.gz', 'rb') as gz:
+            self.assertEqual(gz.read(), f.read())
+
+    def test_rebuild_replaces_changed_chapter_only(self):
+        """测试内容变化的章节换新文件名，旧文件保留到保留期后才删除，未变化的章节保持不变"""
+        self._build('--dictionary', str(self.dictionary.id))
+        old_chapter1 = self._pack_path(1)
+        old_chapter2 = self._pack_path(2)
+
+        TypingWord.objects.filter(pk=self.words[0].pk).update(translation='新翻译')
+        self._build('--dictionary', str(self.dictionary.id))
+
+        self.assertNotEqual(self._pack_path(1), old_chapter1)
+        self.assertTrue(os.path.exists(old_chapter1))
+        self.assertEqual(self._pack_path(2), old_chapter2)
+
+        with override_settings(TYPING_CHAPTER_PACK_RETENTION=3600):
+            with patch('apps.english.word_packs.time.time', return_value=word_packs.time.time() + 3599):
+                self._build('--dictionary', str(self.dictionary.id))
+            self.assertTrue(os.path.exists(f'{old_chapter1}.gz'))
+            with patch('apps.english.word_packs.time.time', return_value=word_packs.time.time() + 3601):
+                self._build('--dictionary', str(self.dictionary.id))
+
+        self.assertFalse(os.path.exists(old_chapter1))
+        self.assertFalse(os.path.exists(f'{old_chapter1}.gz'))
+        self.assertTrue(os.path.exists(self._pack_path(1)))
+        self.assertEqual(word_packs.load_chapter_pack_manifest()['retired'], {})
+
+    def test_removed_dictionary_packs_kept_for_retention(self):
+        """测试词库删除后其章节包同样保留到保留期后才删除"""
+        self._build()
+        path = self._pack_path(1)
+        directory = os.path.dirname(path)
+        self.dictionary.delete()
+
+        with override_settings(TYPING_CHAPTER_PACK_RETENTION=60):
+            self._build()
+            self.assertTrue(os.path.exists(path))
+            with patch('apps.english.word_packs.time.time', return_value=word_packs.time.time() + 61):
+                self._build()
+
+        self.assertFalse(os.path.exists(directory))
+
+    def test_missing_compressed_variant_regenerated(self):
+        """测试内容未变但预压缩文件缺失时重新生成（例如构建后才安装brotli）"""
+        self._build()
+        path = self._pack_path(1)
+        os.remove(f'{path}.gz')
+        if os.path.exists(f'{path}.br'):
+            os.remove(f'{path}.br')
+
+        with patch.object(word_packs, 'brotli', None):
+            self._build()
+        self.assertTrue(os.path.exists(f'{path}.gz'))
+
+        fake_brotli = type('FakeBrotli', (), {'compress': staticmethod(lambda data: b'br:' + data)})
+        with patch.object(word_packs, 'brotli', fake_brotli):
+            self._build()
+        with open(path, 'rb') as f, open(f'{path}.br', 'rb') as br:
+            self.assertEqual(br.read(), b'br:' + f.read())
+
+    def test_chapter_pack_endpoint(self):
+        """测试接口返回章节包地址和哈希，未构建时返回404"""
+        client = APIClient()
+        url = '/api/v1/english/typing-words/chapter_pack/'
+
+        missing = client.get(url, {'dictionary_id': self.dictionary.id, 'chapter': 1})
+        self._build()
+        response = client.get(url, {'dictionary_id': self.dictionary.id, 'chapter': 1})
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, get_chapter_pack_info(self.dictionary.id, 1))
@@ -0,0 +1,74 @@
+"""
+每日学习进度接口测试
+验证按天补0、任意日期范围、单条查询，以及参数校验
+"""
+
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english.models import DailyPracticeStats
+from apps.english.services import DataAnalysisService
+
+User = get_user_model()
+
+
+class DailyProgressTest(TestCase):
+    """每日学习进度接口测试"""
+
+    url = '/api/v1/english/typing-practice/daily-progress/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='progressuser',
+            email='progress@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        DailyPracticeStats.objects.create(
+            user=self.user, date=date(2024, 2, 28), word_count=4, correct_count=3, wpm_sum=100.0, wpm_count=2
+        )
+        DailyPracticeStats.objects.create(
+            user=self.user, date=date(2024, 3, 1), word_count=2, correct_count=2, wpm_sum=0, wpm_count=0
+        )
+
+    def test_range_zero_filled(self):
+        """测试 start/end 范围内每天一条，没有练习的日期补0"""
+        response = self.client.get(self.url, {'start': '2024-02-27', 'end': '2024-03-01'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([d['date'] for d in response.data], ['2024-02-27', '2024-02-28', '2024-02-29', '2024-03-01'])
+        self.assertEqual(response.data[0]['words_practiced'], 0)
+        self.assertEqual(response.data[1], {
+            'date': '2024-02-28', 'words_practiced': 4, 'correct_words': 3, 'accuracy': 75.0, 'avg_wpm': 50.0
+        })
+        self.assertEqual(response.data[3]['avg_wpm'], 0)
+
+    def test_days_default(self):
+        """测试默认返回最近7天，以今天结束"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(response.data[-1]['date'], datetime.now().date().isoformat())
+
+    def test_year_range_single_query(self):
+        """测试一年范围只查询一次每日汇总表"""
+        service = DataAnalysisService()
+        end = datetime(2024, 12, 31)
+
+        with self.assertNumQueries(1):
+            data = service.get_daily_progress(self.user.id, end - timedelta(days=365), end)
+
+        self.assertEqual(len(data), 366)
+        self.assertEqual(sum(d['words_practiced'] for d in data), 6)
+
+    def test_invalid_params(self):
+        """测试无效日期、倒序范围和超长范围返回400"""
+        for params in ({'days': 'abc'}, {'start': '2024-13-01'},
+                       {'start': '2024-03-02', 'end': '2024-03-01'}, {'days': 100000}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
@@ -0,0 +1,136 @@
+"""
+进行中练习会话测试
+验证缓存指针免查询、每用户唯一的进行中会话约束、会话计数器增量维护，以及空闲会话批量自动关闭
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.english.models import Dictionary, TypingWord, TypingPracticeSession
+from apps.english.services import TypingPracticeService
+from apps.english.tasks import close_idle_typing_sessions
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OpenPracticeSessionTest(TestCase):
+    """进行中练习会话测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='openuser',
+            email='open@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(name='会话词库', category='测试')
+        self.word = TypingWord.objects.create(word='session', translation='会话', dictionary=self.dictionary, chapter=1)
+        self.service = TypingPracticeService()
+
+    def _item(self, correct=True):
+        return {
+            'word_id': self.word.id, 'is_correct': correct, 'typing_speed': 60.0,
+            'response_time': 2.0, 'mistakes': {}, 'wrong_count': 0
+        }
+
+    def test_open_session_served_from_cache(self):
+        """测试第二次获取进行中会话不查询数据库"""
+        first = self.service.get_open_session(self.user, dictionary='会话词库')
+
+        with self.assertNumQueries(0):
+            second = self.service.get_open_session(self.user)
+
+        self.assertEqual(first.id, second.id)
+
+    def test_complete_session_invalidates_pointer(self):
+        """测试完成会话后下次提交创建新会话"""
+        first = self.service.record_results(self.user, [self._item()])['practice_session']
+        first.complete_session(1, 1, 2.0)
+
+        second = self.service.record_results(self.user, [self._item()])['practice_session']
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(TypingPracticeSession.objects.filter(user=self.user, is_completed=False).count(), 1)
+
+    def test_counters_maintained_on_submit(self):
+        """测试提交时累加会话计数器，完成会话只执行一条UPDATE"""
+        self.service.record_results(self.user, [self._item(), self._item(correct=False)])
+        practice_session = self.service.record_results(self.user, [self._item()])['practice_session']
+
+        with self.assertNumQueries(2):  # UPDATE + 刷新返回值
+            practice_session.complete_session()
+
+        self.assertTrue(practice_session.is_completed)
+        self.assertEqual(
+            (practice_session.total_words, practice_session.correct_words, practice_session.total_time),
+            (3, 2, 6.0)
+        )
+        self.assertEqual(practice_session.accuracy_rate, 66.67)
+        self.assertEqual(practice_session.average_wpm, 150.0)
+
+    def test_closed_pointer_moves_to_new_session(self):
+        """测试缓存指针指向的会话已被结算时，提交计入新的会话"""
+        first = self.service.record_results(self.user, [self._item()])['practice_session']
+        TypingPracticeSession.objects.filter(id=first.id).update(is_completed=True)
+
+        second = self.service.record_results(self.user, [self._item()])['practice_session']
+
+        self.assertNotEqual(first.id, second.id)
+        second.refresh_from_db()
+        self.assertEqual(second.total_words, 1)
+
+    def test_single_open_session_enforced(self):
+        """测试数据库拒绝同一用户的第二个进行中会话"""
+        TypingPracticeSession.objects.create(user=self.user, dictionary='会话词库')
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                TypingPracticeSession.objects.create(user=self.user, dictionary='会话词库')
+
+    def test_start_session_closes_previous(self):
+        """测试开始新会话时结算旧会话"""
+        old = self.service.record_results(self.user, [self._item(), self._item(correct=False)])['practice_session']
+
+        new = self.service.start_session(self.user, '会话词库', chapter=2)
+
+        old.refresh_from_db()
+        self.assertTrue(old.is_completed)
+        self.assertEqual((old.total_words, old.correct_words), (2, 1))
+        self.assertEqual(self.service.get_open_session(self.user).id, new.id)
+
+    def test_concurrent_start_session_returns_winner(self):
+        """测试并发开始会话时（对方在结算之后先创建了会话）返回对方创建的会话而不是报错"""
+        winner = TypingPracticeSession.objects.create(user=self.user, dictionary='会话词库')
+
+        with patch.object(TypingPracticeService, 'close_open_sessions', return_value=0):
+            started = self.service.start_session(self.user, '会话词库')
+
+        self.assertEqual(started.id, winner.id)
+        self.assertEqual(cache.get(TypingPracticeSession.open_session_cache_key(self.user.id)).id, winner.id)
+
+    def test_close_idle_sessions(self):
+        """测试只关闭空闲超时的会话并批量计算统计"""
+        idle_user = User.objects.create_user(username='idleuser', email='idle@example.com', password='testpass123')
+        idle = self.service.record_results(idle_user, [self._item(), self._item(correct=False)])['practice_session']
+        active = self.service.record_results(self.user, [self._item()])['practice_session']
+        last_activity = timezone.now() - timedelta(hours=2)
+        TypingPracticeSession.objects.filter(id=idle.id).update(last_activity_at=last_activity)
+
+        result = close_idle_typing_sessions(idle_minutes=30)
+
+        self.assertEqual(result, {'ok': True, 'closed': 1})
+        idle.refresh_from_db()
+        active.refresh_from_db()
+        self.assertTrue(idle.is_completed)
+        self.assertFalse(active.is_completed)
+        self.assertEqual((idle.total_words, idle.correct_words, idle.total_time), (2, 1, 4.0))
+        self.assertEqual(idle.accuracy_rate, 50.0)
+        self.assertEqual(idle.end_time, last_activity)
+        self.assertIsNone(cache.get(TypingPracticeSession.open_session_cache_key(idle_user.id)))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+打字练习批量提交(submit_batch) API测试用例
+
+测试范围：
+1. 整章结果一次提交、一个事务内写入
+2. 每条记录单独返回处理状态
+3. 无效条目不影响其他条目
+4. 查询次数不随条目数线性增长
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.english.models import (
+    TypingWord, Dictionary, TypingSession,
+    TypingPracticeRecord, UserTypingStats, KeyErrorStats
+)
+
+User = get_user_model()
+
+
+class TypingPracticeBatchSubmitAPITest(APITestCase):
+    """打字练习批量提交API测试"""
+
+    def setUp(self):
+        """测试数据准备"""
+        self.user = User.objects.create_user(
+            username='batchuser',
+            email='batch@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(
+            name='批量测试词库',
+            category='测试',
+            description='用于批量提交测试的词库',
+            language='en',
+            total_words=25,
+            chapter_count=1
+        )
+        self.words = [
+            TypingWord.objects.create(
+                word=f'batch{i}',
+                translation=f'批量{i}',
+                dictionary=self.dictionary,
+                chapter=1,
+                frequency=100 - i
+            )
+            for i in range(25)
+        ]
+
+        self.access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.batch_url = '/api/v1/english/typing-practice/submit_batch/'
+
+    def _items(self, words):
+        return [
+            {
+                'word_id': word.id,
+                'is_correct': i % 5 != 0,
+                'typing_speed': 40 + i,
+                'response_time': 2.0,
+                'wrong_count': 1 if i % 5 == 0 else 0,
+                'mistakes': {'a': ['s']} if i % 5 == 0 else {}
+            }
+            for i, word in enumerate(words)
+        ]
+
+    def test_submit_whole_chapter(self):
+        """测试一次提交整章结果"""
+        response = self.client.post(self.batch_url, {'items': self._items(self.words)}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'success')
+        self.assertEqual(response.data['succeeded'], 25)
+        self.assertEqual(len(response.data['results']), 25)
+        # 批量插入在MySQL上拿不到主键，逐条结果不带记录ID
+        self.assertNotIn('session_id', response.data['results'][0])
+        self.assertEqual(TypingSession.objects.filter(user=self.user).count(), 25)
+        self.assertEqual(TypingPracticeRecord.objects.filter(user=self.user).count(), 25)
+
+        # 所有记录都挂在同一个练习会话下
+        session_ids = set(TypingPracticeRecord.objects.filter(user=self.user).values_list('session_id', flat=True))
+        self.assertEqual(session_ids, {response.data['practice_session_id']})
+
+        stats = UserTypingStats.objects.get(user=self.user)
+        self.assertEqual(stats.total_words_practiced, 25)
+        self.assertEqual(stats.total_correct_words, 20)
+        self.assertEqual(KeyErrorStats.objects.get(user=self.user, key='A').error_count, 5)
+
+    def test_accepts_bare_list(self):
+        """测试直接提交数组"""
+        response = self.client.post(self.batch_url, self._items(self.words[:3]), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], 3)
+
+    def test_per_item_status(self):
+        """测试无效条目单独报错，其余条目正常写入"""
+        items = self._items(self.words[:3])
+        items.insert(1, {'word_id': 999999, 'is_correct': True})
+        items.append({'word_id': self.words[0].id, 'is_correct': 'maybe'})
+
+        response = self.client.post(self.batch_url, {'items': items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'partial')
+        self.assertEqual(response.data['succeeded'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        results = response.data['results']
+        self.assertEqual([r['index'] for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual(results[1]['error'], '单词不存在')
+        self.assertEqual(results[4]['error'], 'is_correct必须是布尔值或有效的字符串')
+        self.assertEqual(TypingSession.objects.filter(user=self.user).count(), 3)
+
+    def test_empty_batch(self):
+        """测试空批次"""
+        response = self.client.post(self.batch_url, {'items': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_too_large(self):
+        """测试超出批量上限"""
+        items = [{'word_id': self.words[0].id, 'is_correct': True}] * 201
+        response = self.client.post(self.batch_url, {'items': items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_independent_of_batch_size(self):
+        """测试查询次数与批量大小无关"""
+        # 预热：先创建练习会话和按键统计行
+        self.client.post(self.batch_url, {'items': self._items(self.words[:5])}, format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.batch_url, {'items': self._items(self.words[:5])}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.batch_url, {'items': self._items(self.words)}, format='json')
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_failure_logged_with_traceback(self):
+        """测试写入失败时返回500并记录带堆栈的错误日志"""
+        with patch('apps.english.views.TypingPracticeService.record_results', side_effect=RuntimeError('db down')):
+            with self.assertLogs('apps.english.views', level='ERROR') as logs:
+                response = self.client.post(self.batch_url, {'items': self._items(self.words[:2])}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('RuntimeError: db down', logs.output[0])
+
+    def test_requires_authentication(self):
+        """测试未认证用户"""
+        self.client.credentials()
+        response = self.client.post(self.batch_url, {'items': self._items(self.words[:1])}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
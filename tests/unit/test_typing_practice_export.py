@@ -0,0 +1,141 @@
+"""
+练习数据列式导出测试
+验证按月分区写文件、增量水位、进行中会话不被导出，以及管理员流式导出接口
+"""
+
+import csv
+import glob
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english import practice_export
+from apps.english.models import TypingPracticeRecord, TypingPracticeSession
+
+User = get_user_model()
+
+
+class PracticeExportTest(TestCase):
+    """练习数据导出测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='exportuser',
+            email='export@example.com',
+            password='testpass123'
+        )
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.output_dir = temp_dir.name
+
+    def _record(self, word, session_date):
+        record = TypingPracticeRecord.objects.create(
+            user=self.user, word=word, is_correct=True, typing_speed=50, response_time=1.2,
+            total_time=1200, mistakes={'a': ['s']}, timing=[0, 120]
+        )
+        TypingPracticeRecord.objects.filter(pk=record.pk).update(session_date=session_date)
+        return record
+
+    def _export(self, **options):
+        call_command(
+            'export_practice_parquet', output=self.output_dir, tables=['typing_practice_records'],
+            file_format='csv', stdout=io.StringIO(), **options
+        )
+
+    def _read_partitions(self, table):
+        """返回 {月份: [每个文件的行列表]}"""
+        partitions = {}
+        for path in sorted(glob.glob(os.path.join(self.output_dir, table, 'month=*', 'part-*.csv.gz'))):
+            month = os.path.basename(os.path.dirname(path))[len('month='):]
+            with gzip.open(path, 'rt', encoding='utf-8', newline='') as f:
+                partitions.setdefault(month, []).append(list(csv.DictReader(f)))
+        return partitions
+
+    def test_monthly_partitions_and_incremental_watermark(self):
+        """测试按月分区导出，增量模式只追加水位之后的行，全量模式覆盖已有分区"""
+        first = self._record('alpha', date(2026, 9, 3))
+        self._record('beta', date(2026, 9, 30))
+        last = self._record('gamma', date(2026, 10, 1))
+
+        self._export(chunk_size=2)
+        partitions = self._read_partitions('typing_practice_records')
+
+        self.assertEqual(sorted(partitions), ['2026-09', '2026-10'])
+        self.assertEqual([row['word'] for row in partitions['2026-09'][0]], ['alpha', 'beta'])
+        self.assertEqual(partitions['2026-09'][0][0]['mistakes'], '{"a":["s"]}')
+        self.assertEqual(partitions['2026-09'][0][0]['id'], str(first.id))
+        watermark = practice_export.load_watermarks(self.output_dir)['typing_practice_records']
+        self.assertEqual(watermark['last_id'], last.id)
+
+        newer = self._record('delta', date(2026, 10, 2))
+        self._export(incremental=True)
+        self._export(incremental=True)
+        partitions = self._read_partitions('typing_practice_records')
+
+        self.assertEqual([len(rows) for rows in partitions['2026-10']], [1, 1])
+        self.assertEqual(partitions['2026-10'][1][0]['word'], 'delta')
+        self.assertEqual(practice_export.load_watermarks(self.output_dir)['typing_practice_records']['last_id'], newer.id)
+
+        self._export()
+        self.assertEqual([len(rows) for rows in self._read_partitions('typing_practice_records')['2026-10']], [2])
+
+    def test_open_sessions_hold_back_watermark(self):
+        """测试进行中的会话不导出，水位停在它之前，会话结束后的增量导出补上"""
+        done = TypingPracticeSession.objects.create(user=self.user, dictionary='CET4', is_completed=True)
+        other = User.objects.create_user(username='exportother', password='testpass123')
+        still_open = TypingPracticeSession.objects.create(user=other, dictionary='CET4')
+        later = TypingPracticeSession.objects.create(user=self.user, dictionary='CET6', is_completed=True)
+
+        result = practice_export.export_table(self.output_dir, 'typing_practice_sessions', 'csv')
+        self.assertEqual((result['rows'], result['last_id']), (1, done.id))
+
+        TypingPracticeSession.objects.filter(pk=still_open.pk).update(is_completed=True)
+        result = practice_export.export_table(self.output_dir, 'typing_practice_sessions', 'csv', incremental=True)
+        self.assertEqual((result['rows'], result['last_id']), (2, later.id))
+
+    @unittest.skipUnless(practice_export.PYARROW_AVAILABLE, 'pyarrow 未安装')
+    def test_parquet_and_arrow_stream_round_trip(self):
+        """测试Parquet文件和Arrow流保留列类型"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        record = self._record('alpha', date(2026, 9, 3))
+
+        result = practice_export.export_table(self.output_dir, 'typing_practice_records', 'parquet')
+        table = pq.read_table(result['files'][0])
+        streamed = pa.ipc.open_stream(b''.join(practice_export.stream_table('typing_practice_records', 'arrow'))).read_all()
+
+        self.assertEqual(table.column('id').to_pylist(), [record.id])
+        self.assertEqual(table.column('session_date').to_pylist(), [date(2026, 9, 3)])
+        self.assertEqual(table.schema.field('typing_speed').type, 'double')
+        self.assertEqual(streamed.to_pylist(), table.to_pylist())
+
+    def test_export_endpoint(self):
+        """测试流式导出接口仅限管理员，按月份过滤，参数错误返回400"""
+        self._record('alpha', date(2026, 9, 3))
+        self._record('beta', date(2026, 10, 1))
+        url = '/api/v1/english/data-analysis/export/'
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        forbidden = client.get(url, {'table': 'typing_practice_records', 'file_format': 'csv'})
+
+        admin = User.objects.create_user(username='exportadmin', password='testpass123', is_staff=True)
+        client.force_authenticate(user=admin)
+        response = client.get(url, {'table': 'typing_practice_records', 'file_format': 'csv', 'month': '2026-10'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        bad_table = client.get(url, {'table': 'auth_user', 'file_format': 'csv'})
+        bad_month = client.get(url, {'table': 'typing_practice_records', 'file_format': 'csv', 'month': '2026/10'})
+
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="typing_practice_records-2026-10.csv"')
+        self.assertEqual([row['word'] for row in rows], ['beta'])
+        self.assertEqual(bad_table.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(bad_month.status_code, status.HTTP_400_BAD_REQUEST)
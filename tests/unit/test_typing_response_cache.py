@@ -0,0 +1,107 @@
+"""
+按用户缓存的接口响应测试
+验证缓存按用户隔离、提交后失效、命中时不查询数据库，以及ETag条件请求
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english.models import Dictionary, TypingPracticeRecord, TypingWord
+from apps.english.services import DataAnalysisService, TypingPracticeService
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class UserResponseCacheTest(TestCase):
+    """按用户缓存的接口响应测试"""
+
+    statistics_url = '/api/v1/english/typing-practice/statistics/'
+    progress_url = '/api/v1/english/typing-practice/daily-progress/'
+
+    def setUp(self):
+        cache.clear()
+        dictionary = Dictionary.objects.create(name='缓存词库', category='测试')
+        self.word = TypingWord.objects.create(word='cache', translation='缓存', dictionary=dictionary, chapter=1)
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='testpass123')
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def _submit(self, user, count):
+        TypingPracticeService().record_results(user, [
+            {'word_id': self.word.id, 'is_correct': True, 'typing_speed': 60.0,
+             'response_time': 1.0, 'mistakes': {}, 'wrong_count': 0}
+        ] * count)
+
+    def test_responses_isolated_per_user(self):
+        """测试同一URL不会把一个用户的统计返回给另一个用户"""
+        self._submit(self.alice, 3)
+
+        alice = self._client(self.alice).get(self.statistics_url)
+        bob = self._client(self.bob).get(self.statistics_url)
+
+        self.assertEqual(alice.data['total_words_practiced'], 3)
+        self.assertEqual(bob.data['total_words_practiced'], 0)
+
+    def test_submit_invalidates_cached_response(self):
+        """测试提交后立即返回新统计，命中缓存时不查询数据库"""
+        client = self._client(self.alice)
+        client.get(self.progress_url)
+        with self.assertNumQueries(0):
+            cached = client.get(self.progress_url)
+
+        self._submit(self.alice, 2)
+        statistics = client.get(self.statistics_url)
+        progress = client.get(self.progress_url)
+
+        self.assertEqual(cached.data[-1]['words_practiced'], 0)
+        self.assertEqual(statistics.data['total_words_practiced'], 2)
+        self.assertEqual(progress.data[-1]['words_practiced'], 2)
+
+    def test_rebuild_invalidates_cached_response(self):
+        """测试重建每日统计后不再返回缓存的旧响应"""
+        client = self._client(self.alice)
+        client.get(self.progress_url)
+        TypingPracticeRecord.objects.create(
+            user=self.alice, word='cache', is_correct=True, typing_speed=60.0, response_time=1.0, total_time=1000
+        )
+
+        DataAnalysisService().rebuild_daily_stats([self.alice.id])
+        progress = client.get(self.progress_url)
+
+        self.assertEqual(progress.data[-1]['words_practiced'], 1)
+
+    def test_progress_error_not_cached(self):
+        """测试查询出错时返回500且不缓存，恢复后返回真实数据而不是空数组"""
+        self._submit(self.alice, 2)
+        client = self._client(self.alice)
+        client.raise_request_exception = False
+
+        with patch.object(DataAnalysisService, 'get_daily_progress', side_effect=DatabaseError('gone away')):
+            failed = client.get(self.progress_url)
+        recovered = client.get(self.progress_url)
+
+        self.assertEqual(failed.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(recovered.data[-1]['words_practiced'], 2)
+
+    def test_etag_not_modified(self):
+        """测试内容未变化时返回304，提交后ETag变化"""
+        client = self._client(self.alice)
+        first = client.get(self.statistics_url)
+        second = client.get(self.statistics_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self._submit(self.alice, 1)
+        third = client.get(self.statistics_url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third['ETag'], first['ETag'])
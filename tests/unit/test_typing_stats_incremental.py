@@ -0,0 +1,90 @@
+"""
+用户打字统计增量维护测试
+验证提交时只做增量更新，以及 recompute_typing_stats 命令的修复能力
+"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from apps.english.models import Dictionary, TypingWord, TypingSession, UserTypingStats
+from apps.english.services import TypingPracticeService
+
+User = get_user_model()
+
+
+class UserTypingStatsIncrementalTest(TestCase):
+    """用户打字统计增量更新测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='statsuser',
+            email='stats@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(name='统计词库', category='测试')
+        self.word = TypingWord.objects.create(
+            word='stats', translation='统计', dictionary=self.dictionary, chapter=1
+        )
+        self.service = TypingPracticeService()
+
+    def _submit(self, speeds, correct=True):
+        items = [
+            {'word_id': self.word.id, 'is_correct': correct, 'typing_speed': speed,
+             'response_time': 2.0, 'mistakes': {}, 'wrong_count': 0}
+            for speed in speeds
+        ]
+        self.service.record_results(self.user, items)
+
+    def test_counters_accumulate(self):
+        """测试累计值随提交累加"""
+        self._submit([60])
+        self._submit([40, 50], correct=False)
+
+        stats = UserTypingStats.objects.get(user=self.user)
+        self.assertEqual(stats.total_words_practiced, 3)
+        self.assertEqual(stats.total_correct_words, 1)
+        self.assertAlmostEqual(stats.total_typing_speed, 150.0)
+        self.assertAlmostEqual(stats.average_wpm, 50.0)
+        self.assertAlmostEqual(stats.total_response_time, 6.0)
+        self.assertIsNotNone(stats.last_practice_date)
+
+    def test_update_does_not_scan_history(self):
+        """测试统计更新不查询TypingSession历史"""
+        self._submit([50] * 20)
+        latest = list(TypingSession.objects.filter(user=self.user)[:1])
+
+        with self.assertNumQueries(1):
+            self.service.update_user_stats(self.user, latest)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_stats_cache_cleared_after_commit(self):
+        """测试统计缓存在事务提交后才清除，避免提交前被并发请求用旧值重新写回"""
+        cache.set(f'typing_stats_{self.user.id}', {'total_words_practiced': 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self._submit([50])
+                self.assertIsNotNone(cache.get(f'typing_stats_{self.user.id}'))
+
+        self.assertIsNone(cache.get(f'typing_stats_{self.user.id}'))
+
+    def test_recompute_command_repairs_counters(self):
+        """测试重建命令从原始记录修复统计"""
+        self._submit([60, 40])
+        UserTypingStats.objects.filter(user=self.user).update(
+            total_words_practiced=0, total_typing_speed=0, average_wpm=0
+        )
+
+        out = StringIO()
+        call_command('recompute_typing_stats', stdout=out)
+
+        stats = UserTypingStats.objects.get(user=self.user)
+        self.assertEqual(stats.total_words_practiced, 2)
+        self.assertAlmostEqual(stats.total_typing_speed, 100.0)
+        self.assertAlmostEqual(stats.average_wpm, 50.0)
+        self.assertIn('1', out.getvalue())
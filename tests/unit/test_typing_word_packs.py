@@ -0,0 +1,106 @@
+"""
+打字练习词包缓存测试
+验证词包按词库/章节/难度分键、命中缓存免查询，以及版本号递增后失效
+"""
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.english.admin import TypingWordAdmin
+from apps.english.models import Dictionary, TypingWord
+from apps.english.word_packs import MAX_WORD_PACK_LIMIT, get_word_pack, bump_word_pack_version
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TypingWordPackTest(TestCase):
+    """词包缓存测试"""
+
+    def setUp(self):
+        cache.clear()
+        self.cet4 = Dictionary.objects.create(name='CET-4', category='中国考试')
+        self.cet6 = Dictionary.objects.create(name='CET-6', category='中国考试')
+        self.easy = TypingWord.objects.create(word='apple', translation='苹果', dictionary=self.cet4,
+                                              chapter=1, difficulty='beginner')
+        self.hard = TypingWord.objects.create(word='abandon', translation='放弃', dictionary=self.cet4,
+                                              chapter=1, difficulty='advanced')
+        TypingWord.objects.create(word='ability', translation='能力', dictionary=self.cet6, chapter=1)
+
+    def _words(self, pack):
+        return [w['word'] for w in pack]
+
+    def test_pack_keyed_by_dictionary_and_difficulty(self):
+        """测试不同词库、不同难度的词包互不串用"""
+        self.assertEqual(self._words(get_word_pack(self.cet4.id, 1)), ['apple', 'abandon'])
+        self.assertEqual(self._words(get_word_pack(self.cet4.id, 1, 'advanced')), ['abandon'])
+        self.assertEqual(self._words(get_word_pack(self.cet6.id, 1)), ['ability'])
+
+    def test_cached_pack_needs_no_query(self):
+        """测试命中缓存时不查询数据库"""
+        get_word_pack(self.cet4.id, 1)
+
+        with self.assertNumQueries(0):
+            pack = get_word_pack(self.cet4.id, 1)
+
+        self.assertEqual(self._words(pack), ['apple', 'abandon'])
+
+    def test_bump_invalidates_only_that_dictionary(self):
+        """测试递增版本号只使该词库的词包失效"""
+        get_word_pack(self.cet4.id, 1)
+        get_word_pack(self.cet6.id, 1)
+        TypingWord.objects.filter(pk=self.easy.pk).update(word='apricot')
+
+        bump_word_pack_version(self.cet4.id)
+
+        self.assertEqual(self._words(get_word_pack(self.cet4.id, 1)), ['apricot', 'abandon'])
+        with self.assertNumQueries(0):
+            get_word_pack(self.cet6.id, 1)
+
+    def test_limit_clamped_to_shared_keys(self):
+        """测试超出上限的数量共用上限的词包缓存，不会各占一份"""
+        get_word_pack(self.cet4.id, 1, limit=MAX_WORD_PACK_LIMIT)
+
+        with self.assertNumQueries(0):
+            pack = get_word_pack(self.cet4.id, 1, limit=10 ** 9)
+
+        self.assertEqual(self._words(pack), ['apple', 'abandon'])
+        self.assertEqual(self._words(get_word_pack(self.cet4.id, 1, limit=0)), ['apple'])
+
+    def test_admin_edit_bumps_version(self):
+        """测试后台编辑单词后词包立即更新"""
+        get_word_pack(self.cet4.id, 1)
+        self.easy.translation = '苹果（水果）'
+
+        TypingWordAdmin(TypingWord, admin.site).save_model(None, self.easy, None, True)
+
+        self.assertEqual(get_word_pack(self.cet4.id, 1)[0]['translation'], '苹果（水果）')
+
+    def test_words_endpoint_respects_dictionary_and_difficulty(self):
+        """测试words接口按词库ID和难度返回，不会串用缓存"""
+        user = User.objects.create_user(username='packuser', email='pack@example.com', password='testpass123')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        url = '/api/v1/english/typing-practice/words/'
+
+        first = client.get(url, {'dictionary': self.cet4.id, 'chapter': 1})
+        second = client.get(url, {'dictionary': self.cet4.id, 'chapter': 1, 'difficulty': 'advanced'})
+        third = client.get(url, {'dictionary': self.cet6.id, 'chapter': 1})
+
+        self.assertEqual(self._words(first.data), ['apple', 'abandon'])
+        self.assertEqual(self._words(second.data), ['abandon'])
+        self.assertEqual(self._words(third.data), ['ability'])
+
+    def test_words_endpoint_rejects_invalid_limit(self):
+        """测试words接口的数量不是整数时返回400"""
+        user = User.objects.create_user(username='limituser', email='limit@example.com', password='testpass123')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = client.get('/api/v1/english/typing-practice/words/', {'dictionary': self.cet4.id, 'limit': 'all'})
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,178 @@
+"""
+打字练习写后缓冲（write-behind）测试
+验证提交只入队返回202、统计接口读己之写，以及Celery任务批量落库
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.english.ingestion import SQLiteWriteBehindBuffer, get_write_behind_buffer
+from apps.english.models import Dictionary, TypingWord, TypingSession, TypingPracticeRecord, UserTypingStats
+from apps.english.services import TypingPracticeService
+from apps.english.tasks import drain_typing_buffer
+
+User = get_user_model()
+
+
+class TypingWriteBehindTest(APITestCase):
+    """写后缓冲提交测试（使用SQLite文件队列）"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            TYPING_WRITE_BEHIND_ENABLED=True,
+            TYPING_WRITE_BEHIND_BACKEND='sqlite',
+            TYPING_WRITE_BEHIND_SPOOL_PATH=os.path.join(self.spool_dir.name, 'spool.sqlite3'),
+        )
+        self.settings_override.enable()
+
+        self.user = User.objects.create_user(
+            username='wbuser',
+            email='wb@example.com',
+            password='testpass123'
+        )
+        self.dictionary = Dictionary.objects.create(name='缓冲词库', category='测试')
+        self.words = [
+            TypingWord.objects.create(word=f'buffer{i}', translation=f'缓冲{i}', dictionary=self.dictionary, chapter=1)
+            for i in range(3)
+        ]
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.spool_dir.cleanup()
+
+    def _item(self, word, speed=60, correct=True):
+        return {'word_id': word.id, 'is_correct': correct, 'typing_speed': speed, 'response_time': 2.0, 'mistakes': {}}
+
+    def test_submit_returns_receipt_without_writing(self):
+        """测试单条提交入队后返回202和回执ID"""
+        response = self.client.post(
+            '/api/v1/english/typing-practice/submit/', self._item(self.words[0]), format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'accepted')
+        self.assertTrue(response.data['receipt_id'])
+        self.assertFalse(TypingSession.objects.filter(user=self.user).exists())
+
+    def test_submit_unknown_word(self):
+        """测试入队前仍校验单词存在"""
+        item = self._item(self.words[0])
+        item['word_id'] = 999999
+        response = self.client.post('/api/v1/english/typing-practice/submit/', item, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(get_write_behind_buffer().pending_for_user(self.user.id), [])
+
+    def test_batch_statistics_and_drain(self):
+        """测试批量入队后统计立即可见，任务落库后队列清空"""
+        items = [self._item(self.words[0], 60), self._item(self.words[1], 40, correct=False), {'word_id': 999999, 'is_correct': True}]
+        response = self.client.post(
+            '/api/v1/english/typing-practice/submit_batch/', {'items': items, 'chapter': 1}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual([r['status'] for r in response.data['results']], ['queued', 'queued', 'error'])
+
+        stats = self.client.get('/api/v1/english/typing-practice/statistics/').data
+        self.assertEqual(stats['total_words_practiced'], 2)
+        self.assertEqual(stats['total_correct_words'], 1)
+        self.assertEqual(stats['average_wpm'], 50.0)
+
+        summary = drain_typing_buffer()
+
+        self.assertTrue(summary['ok'])
+        self.assertEqual(summary['records'], 2)
+        self.assertEqual(TypingPracticeRecord.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(UserTypingStats.objects.get(user=self.user).total_words_practiced, 2)
+        self.assertEqual(get_write_behind_buffer().pending_for_user(self.user.id), [])
+
+        # 落库后统计不重复计算
+        stats = self.client.get('/api/v1/english/typing-practice/statistics/').data
+        self.assertEqual(stats['total_words_practiced'], 2)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_statistics_read_between_commit_and_ack_not_cached(self):
+        """测试落库提交后、ack之前的统计请求（会重复计算）不会在ack后继续被缓存返回"""
+        self.client.post(
+            '/api/v1/english/typing-practice/submit_batch/',
+            {'items': [self._item(self.words[0]), self._item(self.words[1])]}, format='json'
+        )
+        url = '/api/v1/english/typing-practice/statistics/'
+        original_ack = SQLiteWriteBehindBuffer.ack
+        during = {}
+
+        def ack(buffer, envelopes):
+            during['stats'] = self.client.get(url).data
+            original_ack(buffer, envelopes)
+
+        with mock.patch.object(SQLiteWriteBehindBuffer, 'ack', ack):
+            drain_typing_buffer()
+
+        self.assertEqual(during['stats']['total_words_practiced'], 4)
+        self.assertEqual(self.client.get(url).data['total_words_practiced'], 2)
+
+    def test_drain_empty_buffer(self):
+        """测试空队列"""
+        summary = drain_typing_buffer()
+
+        self.assertTrue(summary['ok'])
+        self.assertEqual(summary['envelopes'], 0)
+
+    def test_drain_keeps_submit_time(self):
+        """测试零点前入队、零点后落库的结果仍记在提交时间和提交当天"""
+        queued_at = datetime(2026, 10, 16, 23, 59, 30)
+        with mock.patch('apps.english.ingestion.timezone.now', return_value=queued_at):
+            get_write_behind_buffer().push(self.user.id, [{**self._item(self.words[0]), 'wrong_count': 0}])
+
+        drain_typing_buffer()
+
+        record = TypingPracticeRecord.objects.get(user=self.user)
+        self.assertEqual((record.created_at, record.session_date), (queued_at, queued_at.date()))
+        self.assertEqual(TypingSession.objects.get(user=self.user).session_date, queued_at.date())
+
+    @override_settings(TYPING_WRITE_BEHIND_MAX_ATTEMPTS=2)
+    def test_failing_envelope_parked_after_max_attempts(self):
+        """测试一直失败的信封不影响同一用户的其他信封，达到重试上限后移入死信队列"""
+        buffer = get_write_behind_buffer()
+        buffer.push(self.user.id, [{**self._item(self.words[0]), 'wrong_count': 0}])
+        buffer.push(self.user.id, [{**self._item(self.words[1], speed=-1), 'wrong_count': 0}])
+        record_results = TypingPracticeService.record_results
+
+        def fail_on_negative_speed(service, user, items, **kwargs):
+            if any(item['typing_speed'] < 0 for item in items):
+                raise ValueError('bad item')
+            return record_results(service, user, items, **kwargs)
+
+        with mock.patch.object(TypingPracticeService, 'record_results', fail_on_negative_speed):
+            first = drain_typing_buffer()
+            second = drain_typing_buffer()
+
+        self.assertEqual((first['records'], first['failed'], first['parked']), (1, 1, 0))
+        self.assertEqual((second['envelopes'], second['parked']), (1, 1))
+        self.assertEqual(drain_typing_buffer()['envelopes'], 0)
+        self.assertEqual(buffer.pending_for_user(self.user.id), [])
+        with sqlite3.connect(buffer.path) as conn:
+            self.assertEqual(conn.execute('SELECT error FROM dead_letter').fetchall(), [('bad item',)])
+
+    def test_drain_skipped_when_disabled(self):
+        """测试未开启写后缓冲时任务直接返回，不连接队列"""
+        with override_settings(TYPING_WRITE_BEHIND_ENABLED=False), \
+                mock.patch('apps.english.ingestion.get_write_behind_buffer') as get_buffer:
+            summary = drain_typing_buffer()
+
+        self.assertEqual(summary, {'ok': True, 'skipped': True})
+        get_buffer.assert_not_called()
@@ -0,0 +1,90 @@
+"""
+待复习队列测试
+验证到期卡片的键集分页（无COUNT/OFFSET、相同到期时间不重不漏）和缓存的复习队列
+"""
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english import review_queue
+from apps.english.models import UserWordProgress, Word
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DueReviewQueueTest(TestCase):
+    """待复习队列测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='queueuser',
+            email='queue@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        words = Word.objects.bulk_create([Word(word=f'due{i}') for i in range(50)])
+        now = datetime.now()
+        # 45张已到期（每5张到期时间相同），5张明天到期
+        UserWordProgress.objects.bulk_create([
+            UserWordProgress(
+                user=self.user, word=word,
+                next_review_date=now + timedelta(days=1) if i >= 45 else now - timedelta(hours=i // 5)
+            )
+            for i, word in enumerate(words)
+        ])
+        self.due_ids = list(
+            UserWordProgress.objects.filter(next_review_date__lte=now)
+            .order_by('next_review_date', 'id').values_list('id', flat=True)
+        )
+        self.words = words
+
+    def test_keyset_pages(self):
+        """测试按游标翻页依次取到全部到期卡片，查询中没有COUNT和OFFSET，无效游标返回404"""
+        url = '/api/v1/english/progress/due/'
+        seen, cursor = [], None
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                params = {'page_size': 20, **({'cursor': cursor} if cursor else {})}
+                response = self.client.get(url, params)
+                seen += [card['id'] for card in response.data['data']]
+                cursor = response.data['pagination']['next_cursor']
+                if cursor is None:
+                    break
+        invalid = self.client.get(url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(seen, self.due_ids)
+        sql = ' '.join(query['sql'].upper() for query in queries.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(invalid.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_next_due_served_from_queue(self):
+        """测试批量复习后重建队列，预取接口不查数据库且不再返回刚复习的卡片"""
+        reviewed = self.words[:10]
+        reviewed_ids = set(UserWordProgress.objects.filter(word__in=reviewed).values_list('id', flat=True))
+        self.client.post('/api/v1/english/progress/batch_review/', [
+            {'word_id': word.id, 'quality': 4} for word in reviewed
+        ], format='json')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/english/progress/next-due/', {'limit': 5})
+
+        expected = [card_id for card_id in self.due_ids if card_id not in reviewed_ids][:5]
+        self.assertEqual([card['id'] for card in response.data['data']], expected)
+
+    def test_truncated_queue_falls_back_to_database(self):
+        """测试队列被截断且到期卡片不够时回退到数据库查询"""
+        with mock.patch.object(review_queue, 'QUEUE_SIZE', 3):
+            review_queue.refresh_review_queue(self.user.id)
+            cards = review_queue.get_next_due_cards(self.user.id, 8)
+
+        self.assertEqual([card['id'] for card in cards], self.due_ids[:8])
@@ -0,0 +1,80 @@
+"""
+SM-2 复习调度测试
+验证间隔和容易度因子的计算、批量复习的查询数与批大小无关，以及复习接口
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english.models import LearningStats, UserWordProgress, Word
+from apps.english.sm2 import SM2Algorithm
+
+User = get_user_model()
+
+
+class SM2AlgorithmTest(TestCase):
+    """SM-2 调度测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sm2user',
+            email='sm2@example.com',
+            password='testpass123'
+        )
+        self.words = Word.objects.bulk_create([Word(word=f'card{i}') for i in range(200)])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_schedule(self):
+        """测试连续答对时间隔为1、6、上次间隔×EF，答错时重复次数清零，EF不低于1.3"""
+        ease, intervals, repetitions = [2.5], [1], [0]
+        history = []
+        for quality in (5, 5, 5, 1):
+            ease, intervals, repetitions = SM2Algorithm.schedule(ease, intervals, repetitions, [quality])
+            history.append((ease[0], intervals[0], repetitions[0]))
+
+        self.assertEqual(history, [(2.6, 1, 1), (2.7, 6, 2), (2.8, 16, 3), (2.26, 1, 0)])
+        self.assertEqual(SM2Algorithm.schedule([1.3], [5], [3], [0])[0], [1.3])
+
+    def test_batch_review_constant_queries(self):
+        """测试200个单词的批量复习只用固定条数的查询，批内重复的单词依次生效"""
+        UserWordProgress.objects.bulk_create([
+            UserWordProgress(user=self.user, word=word, repetition_count=2, interval_days=10, ease_factor=2)
+            for word in self.words[:100]
+        ])
+        reviews = [(word.id, 4) for word in self.words] + [(self.words[150].id, 4)]
+
+        # 读单词、读进度各1条，插入和更新各2条（SQLite单条语句最多999个参数，按参数数分批），外加保存点2条
+        with self.assertNumQueries(8):
+            progress = SM2Algorithm.review_batch(self.user, reviews)
+
+        reviewed = UserWordProgress.objects.get(user=self.user, word=self.words[50])
+        self.assertEqual((reviewed.interval_days, reviewed.repetition_count), (20, 3))
+        self.assertEqual(reviewed.ease_factor, Decimal('2.00'))
+        repeated = UserWordProgress.objects.get(user=self.user, word=self.words[150])
+        self.assertEqual((repeated.interval_days, repeated.repetition_count, repeated.review_count), (6, 2, 2))
+        self.assertEqual(progress[self.words[150].id].next_review_date, repeated.next_review_date)
+
+    def test_review_endpoints(self):
+        """测试单个复习按SM-2调度，批量复习报告不存在的单词并更新当日统计"""
+        progress = UserWordProgress.objects.create(
+            user=self.user, word=self.words[0], repetition_count=2, interval_days=10, ease_factor=2
+        )
+
+        single = self.client.post(f'/api/v1/english/progress/{progress.id}/review/', {'quality': 4}, format='json')
+        batch = self.client.post('/api/v1/english/progress/batch_review/', [
+            {'word_id': self.words[1].id, 'quality': 5},
+            {'word_id': 999999, 'quality': 3},
+        ], format='json')
+        invalid = self.client.post('/api/v1/english/progress/batch_review/', [
+            {'word_id': self.words[1].id, 'quality': 6},
+        ], format='json')
+
+        self.assertEqual(single.data['data']['interval_days'], 20)
+        self.assertEqual([item['success'] for item in batch.data['data']], [True, False])
+        self.assertEqual(LearningStats.objects.get(user=self.user).words_reviewed, 2)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
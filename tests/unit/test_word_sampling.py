@@ -0,0 +1,89 @@
+"""
+练习出题随机抽样测试
+验证从缓存id数组抽样（不用ORDER BY RAND()）、排除项与难度过滤、seed可复现，以及释义选择题的干扰项
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.english import word_sampling
+from apps.english.models import PracticeRecord, UserWordProgress, Word
+from apps.english.services import PracticeService
+
+User = get_user_model()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class WordSamplingTest(TestCase):
+    """随机抽样测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sampleuser', email='sample@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.words = Word.objects.bulk_create(
+            [Word(word=f'easy{i}', difficulty_level='beginner', definition=f'easy meaning {i}') for i in range(30)]
+            + [Word(word=f'hard{i}', difficulty_level='advanced', definition=f'hard meaning {i}') for i in range(10)]
+        )
+        self.url = '/api/v1/english/practice/generate_questions/'
+
+    def test_sample_with_filters_and_seed(self):
+        """测试按难度过滤、跳过排除项，同一seed结果相同，缓存预热后只有一次in_bulk查询"""
+        excluded = [word.id for word in self.words[:25]]
+        word_sampling.refresh_pools()
+
+        with CaptureQueriesContext(connection) as queries:
+            first = word_sampling.sample_words(5, ['beginner'], excluded, seed=7)
+        again = word_sampling.sample_words(5, ['beginner'], excluded, seed=7)
+        mixed = word_sampling.sample_words(12, ['beginner', 'advanced'], seed=3)
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('RAND', queries[0]['sql'].upper())
+        self.assertEqual(sorted(word.id for word in first), [word.id for word in self.words[25:30]])
+        self.assertEqual(first, again)
+        self.assertEqual(len({word.id for word in mixed}), 12)
+
+    def test_deleted_words_in_stale_pool_are_refilled(self):
+        """测试缓存的id数组中有已删除单词时重建后补足数量"""
+        word_sampling.refresh_id_pool('advanced')
+        Word.objects.filter(id__in=[word.id for word in self.words[30:35]]).update(is_deleted=True)
+
+        words = word_sampling.sample_words(5, ['advanced'], seed=1)
+
+        self.assertEqual(sorted(word.id for word in words), [word.id for word in self.words[35:]])
+
+    def test_meaning_question_distractors(self):
+        """测试释义选择题的干扰项来自同难度的释义池，且不包含正确释义"""
+        word = self.words[30]
+        question = PracticeService.generate_word_meaning_question(word)
+
+        self.assertEqual(len(question['options']), 4)
+        self.assertEqual(question['options'].count(word.definition), 1)
+        self.assertTrue(all(option.startswith('hard meaning') for option in question['options']))
+
+    def test_generate_questions_endpoint(self):
+        """测试出题接口可复现、排除已学单词，参数错误返回400"""
+        UserWordProgress.objects.bulk_create([UserWordProgress(user=self.user, word=word) for word in self.words[:35]])
+        params = {'type': 'word_meaning', 'count': 5, 'exclude_seen': 'true'}
+
+        first = self.client.get(self.url, params)
+        again = self.client.get(self.url, {**params, 'seed': first.data['seed']})
+        invalid = self.client.get(self.url, {'count': 500})
+
+        self.assertEqual(first.data['data'], again.data['data'])
+        self.assertEqual(sorted(q['word_id'] for q in first.data['data']), [word.id for word in self.words[35:]])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_submit_practice(self):
+        """测试提交答案时忽略大小写和多余空白判定对错"""
+        response = self.client.post('/api/v1/english/practice/submit_practice/', {
+            'practice_type': 'word_spelling', 'content_id': self.words[0].id, 'content_type': 'word',
+            'question': '请拼写单词', 'user_answer': ' Easy0 ', 'correct_answer': 'easy0', 'time_spent': 4,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(PracticeRecord.objects.get(user=self.user).is_correct)
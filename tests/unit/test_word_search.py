@@ -0,0 +1,83 @@
+"""
+单词检索测试
+验证前缀匹配排在释义匹配之前、释义按BM25排序、过滤条件生效、索引随单词修改重建，以及自动补全
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.english import word_search
+from apps.english.models import Word
+
+User = get_user_model()
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    WORD_SEARCH_BACKEND='memory',
+)
+class WordSearchTest(TestCase):
+    """单词检索测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='searchuser', email='search@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.words = {
+            word.word: word for word in Word.objects.bulk_create([
+                Word(word='apples', definition='n. 苹果（复数）'),
+                Word(word='apple', definition='n. 苹果'),
+                Word(word='pineapple', definition='n. 菠萝'),
+                Word(word='orchard', definition='n. 果园，种苹果和梨的园子', difficulty_level='advanced'),
+                Word(word='fruit', definition='n. 水果；苹果是一种水果'),
+                Word(word='banana', definition='n. 香蕉'),
+            ])
+        }
+        word_search.invalidate_index()
+
+    def _search(self, q, **params):
+        response = self.client.get('/api/v1/english/words/', {'q': q, **params})
+        return [word['word'] for word in response.data['data']]
+
+    def test_tokenize(self):
+        """测试英文按单词、中文按二元组切分"""
+        self.assertEqual(word_search.tokenize('Red apple, 红苹果'), ['red', 'apple', '红苹', '苹果'])
+
+    def test_prefix_matches_rank_before_definitions(self):
+        """测试完全匹配在前、前缀匹配其次（不再匹配单词中间），释义匹配按BM25排在之后"""
+        self.assertEqual(self._search('apple'), ['apple', 'apples'])
+        self.assertEqual(self._search('苹果'), ['apple', 'apples', 'fruit', 'orchard'])
+        self.assertEqual(self._search('苹果', difficulty_level='advanced'), ['orchard'])
+
+        response = self.client.get('/api/v1/english/words/', {'q': '苹果', 'page_size': 1, 'page': 2})
+        self.assertEqual([word['word'] for word in response.data['data']], ['apples'])
+        self.assertEqual(response.data['pagination']['total'], 4)
+
+    def test_index_rebuilt_after_word_changes(self):
+        """测试通过接口修改或删除单词后检索结果随之更新"""
+        self._search('香蕉')
+        admin = User.objects.create_user(username='searchadmin', email='admin@example.com', password='x', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        self.client.delete(f"/api/v1/english/words/{self.words['banana'].id}/")
+        self.client.put(f"/api/v1/english/words/{self.words['pineapple'].id}/", {
+            'word': 'pineapple', 'definition': 'n. 菠萝，又叫凤梨，像香蕉一样是热带水果'
+        }, format='json')
+
+        self.assertEqual(self._search('香蕉'), ['pineapple'])
+
+    def test_autocomplete(self):
+        """测试自动补全按前缀从进程内索引返回，不查数据库"""
+        url = '/api/v1/english/words/autocomplete/'
+        self.client.get(url, {'q': 'ap'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'AP', 'limit': 1})
+        empty = self.client.get(url, {'q': ''})
+        invalid = self.client.get(url, {'q': 'ap', 'limit': 'x'})
+
+        self.assertEqual(response.data['data'], [
+            {'id': self.words['apple'].id, 'word': 'apple', 'phonetic': None, 'part_of_speech': None}
+        ])
+        self.assertEqual(empty.data['data'], [])
+        self.assertEqual(invalid.status_code, 400)